@@ -1,23 +1,43 @@
-from typing import Dict, List, Any
+import os
+from typing import Dict, List, Any, Optional
 from datetime import datetime
+import pandas as pd
+from .event_store import EventStore, INDEX_FILE
 from .data_transformers import (
     transform_lead_research_event,
     transform_intent_event,
     transform_email_event,
-    transform_followup_event
+    transform_followup_event,
+    transform_lead_research_events,
+    transform_intent_events,
+    transform_email_events,
+    transform_followup_events,
+    transform_standard_events,
+    EVENT_COLUMNS
 )
 
 class CRMLoggerAgent:
     """CRM Logger Agent for tracking all lead-related events."""
     
-    def __init__(self):
-        self.leads = {}  # Store lead data
+    def __init__(self, store_path: Optional[str] = None):
+        # Reopen a saved store memory-mapped, or start empty
+        if store_path and os.path.exists(os.path.join(store_path, INDEX_FILE)):
+            self.store = EventStore.open(store_path)
+        else:
+            self.store = EventStore()
+        self.leads = self.store.leads  # lead_id -> LeadEvents
         self.transformers = {
             "lead_research": transform_lead_research_event,
             "intent_qualifier": transform_intent_event,
             "email_strategy": transform_email_event,
             "followup_timing": transform_followup_event
         }
+        self.bulk_transformers = {
+            "lead_research": transform_lead_research_events,
+            "intent_qualifier": transform_intent_events,
+            "email_strategy": transform_email_events,
+            "followup_timing": transform_followup_events
+        }
     
     def process_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """Process and store an event."""
@@ -31,116 +51,77 @@ class CRMLoggerAgent:
             if not self._validate_event(event):
                 return {"status": "error", "message": "Invalid event format"}
             
-            # Initialize lead if not exists
-            lead_id = event["lead_id"]
-            if lead_id not in self.leads:
-                self.leads[lead_id] = {
-                    "events": [],
-                    "metrics": self._init_metrics()
-                }
+            # Store event in time order; metrics and timeline are updated on insert
+            self.store.add(
+                event["lead_id"],
+                event.get("timestamp") or datetime.now().isoformat(),
+                event["event_type"],
+                event["source_agent"],
+                event["data"]
+            )
+            
+            return {"status": "success", "message": "Event processed"}
             
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.now().isoformat()
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+    
+    def process_events_bulk(self, df, source_agent: Optional[str] = None) -> Dict[str, Any]:
+        """Process a DataFrame of events at once, e.g. a replay of Email_Logs.csv.
+        
+        Rows are the same dicts process_event takes: their source_agent column
+        (or the `source_agent` argument, for the whole frame) picks the
+        transform. Rows without a lead_id, event_type or data are rejected.
+        """
+        try:
+            if source_agent is not None:
+                df = df.assign(source_agent=source_agent)
+            if "source_agent" not in df.columns:
+                return {"status": "error", "message": "Invalid event format: no source_agent"}
             
-            # Store event
-            self.leads[lead_id]["events"].append(event)
+            # Transform each source agent's rows column-wise
+            now = datetime.now().isoformat()
+            frames = [
+                self.bulk_transformers.get(agent, transform_standard_events)(rows, now)
+                for agent, rows in df.groupby("source_agent", sort=False, dropna=False)
+            ]
+            events = pd.concat(frames) if frames else pd.DataFrame(columns=EVENT_COLUMNS)
             
-            # Update metrics
-            self._update_metrics(lead_id, event)
+            # Validate column-wise and store the valid rows
+            valid = self._validate_events(events)
+            processed = self.store.add_bulk(events[valid])
             
-            return {"status": "success", "message": "Event processed"}
+            return {
+                "status": "success",
+                "message": "Events processed",
+                "processed": processed,
+                "rejected": int((~valid).sum())
+            }
             
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
     def get_lead_history(self, lead_id: str) -> List[Dict]:
-        """Get all events for a lead."""
-        if lead_id not in self.leads:
-            return []
-        return sorted(
-            self.leads[lead_id]["events"],
-            key=lambda x: x["timestamp"]
-        )
+        """Get all events for a lead, oldest first."""
+        return self.store.history(lead_id)
     
     def get_lead_metrics(self, lead_id: str) -> Dict[str, Any]:
         """Get metrics for a lead."""
-        if lead_id not in self.leads:
-            return self._init_metrics()
-        return self.leads[lead_id]["metrics"]
+        return self.store.metrics(lead_id)
     
     def get_lead_timeline(self, lead_id: str) -> Dict[str, Any]:
         """Get timeline information for a lead."""
-        if lead_id not in self.leads:
-            return {
-                "first_contact": None,
-                "last_email_sent": None,
-                "next_scheduled_followup": None
-            }
-        
-        events = self.leads[lead_id]["events"]
-        timeline = {
-            "first_contact": None,
-            "last_email_sent": None,
-            "next_scheduled_followup": None
-        }
-        
-        for event in events:
-            event_type = event["event_type"]
-            timestamp = event["timestamp"]
-            
-            # Track first contact
-            if not timeline["first_contact"]:
-                timeline["first_contact"] = timestamp
-            
-            # Track last email
-            if event_type == "email_sent":
-                timeline["last_email_sent"] = timestamp
-            
-            # Track next followup
-            if event_type == "followup_scheduled":
-                scheduled_time = event["data"].get("scheduled_time")
-                if scheduled_time:
-                    if not timeline["next_scheduled_followup"] or scheduled_time > timeline["next_scheduled_followup"]:
-                        timeline["next_scheduled_followup"] = scheduled_time
-        
-        return timeline
+        return self.store.timeline(lead_id)
+    
+    def save(self, path: str):
+        """Persist all events to directory `path` (see CRMLoggerAgent(store_path=...))."""
+        self.store.save(path)
     
     def _validate_event(self, event: Dict) -> bool:
         """Validate event format."""
         required_fields = ["lead_id", "event_type", "source_agent", "data"]
         return all(field in event for field in required_fields)
     
-    def _init_metrics(self) -> Dict[str, Any]:
-        """Initialize metrics structure."""
-        return {
-            "total_events": 0,
-            "event_counts": {},
-            "email_metrics": {
-                "total_sent": 0,
-                "total_replies": 0,
-                "response_rate": 0.0
-            }
-        }
-    
-    def _update_metrics(self, lead_id: str, event: Dict):
-        """Update metrics based on new event."""
-        metrics = self.leads[lead_id]["metrics"]
-        
-        # Update total events
-        metrics["total_events"] += 1
-        
-        # Update event counts
-        event_type = event["event_type"]
-        metrics["event_counts"][event_type] = metrics["event_counts"].get(event_type, 0) + 1
-        
-        # Update email metrics
-        if event_type == "email_sent":
-            metrics["email_metrics"]["total_sent"] += 1
-            if event["data"]["engagement"]["replied"]:
-                metrics["email_metrics"]["total_replies"] += 1
-            
-            # Update response rate
-            total_sent = metrics["email_metrics"]["total_sent"]
-            total_replies = metrics["email_metrics"]["total_replies"]
-            metrics["email_metrics"]["response_rate"] = (total_replies / total_sent) if total_sent > 0 else 0.0
+    def _validate_events(self, events: pd.DataFrame) -> pd.Series:
+        """Column-wise _validate_event: mask of rows with every required field."""
+        required_columns = ["lead_id", "event_type", "source_agent", "payload"]
+        return events[required_columns].notna().all(axis=1) & (events["lead_id"] != "")
@@ -1,7 +1,9 @@
 """Data transformers for different agent event types."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
+import json
+import pandas as pd
 
 def transform_lead_research_event(lead_data: Dict[str, Any]) -> Dict[str, Any]:
     """Transform lead research data into standard event format."""
@@ -74,3 +76,129 @@ def transform_followup_event(followup_data: Dict[str, Any]) -> Dict[str, Any]:
             })
         }
     }
+
+
+# Bulk transforms: the same events as above for a whole DataFrame of agent
+# outputs at once. Each returns a frame with one row per event and the columns
+# in EVENT_COLUMNS; "payload" is the event's data as JSON, "replied" and
+# "scheduled_time" feed the per-lead metrics and timeline.
+
+EVENT_COLUMNS = ["lead_id", "event_type", "source_agent", "timestamp", "payload", "replied", "scheduled_time"]
+
+
+def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def _number(df: pd.DataFrame, name: str, default: float = 0) -> pd.Series:
+    return pd.to_numeric(_column(df, name, default), errors="coerce").fillna(default)
+
+
+def _text(df: pd.DataFrame, name: str, default: str = "") -> pd.Series:
+    column = _column(df, name, default)
+    return column.where(column.notna(), default).astype(str)
+
+
+def _json_lines(frame: pd.DataFrame) -> pd.Series:
+    """One JSON object per row (pandas escapes newlines inside strings)."""
+    if frame.empty:
+        return pd.Series([], index=frame.index, dtype=object)
+    text = frame.to_json(orient="records", lines=True, double_precision=15)
+    return pd.Series(text.rstrip("\n").split("\n"), index=frame.index, dtype=object)
+
+
+def _nest(outer: pd.DataFrame, key: str, inner: pd.DataFrame) -> pd.Series:
+    """JSON of `outer` with the JSON of `inner` nested under `key`."""
+    return _json_lines(outer).str[:-1] + f',"{key}":' + _json_lines(inner) + "}"
+
+
+def _lead_ids(df: pd.DataFrame) -> pd.Series:
+    lead_id = _column(df, "lead_id", None)
+    return lead_id.where(lead_id.isna(), lead_id.astype(str))
+
+
+def _events(df: pd.DataFrame, event_type: str, source_agent: str, timestamp, payload: pd.Series,
+            replied=False, scheduled_time: Optional[pd.Series] = None) -> pd.DataFrame:
+    return pd.DataFrame({
+        "lead_id": _lead_ids(df),
+        "event_type": event_type,
+        "source_agent": source_agent,
+        "timestamp": timestamp,
+        "payload": payload,
+        "replied": replied,
+        "scheduled_time": scheduled_time if scheduled_time is not None else None,
+    }, index=df.index, columns=EVENT_COLUMNS)
+
+
+def transform_lead_research_events(df: pd.DataFrame, now: str) -> pd.DataFrame:
+    """Vectorized transform_lead_research_event."""
+    outer = pd.DataFrame({
+        "company_name": _text(df, "company"),
+        "industry": _text(df, "industry", "Technology"),
+        "region": _text(df, "region"),
+    }, index=df.index)
+    metrics = pd.DataFrame({
+        "visits": _number(df, "visits").astype(int),
+        "time_on_site": _number(df, "time_on_site").astype(int),
+        "pages_per_visit": _number(df, "pages_per_visit").astype(float),
+    }, index=df.index)
+    return _events(df, "lead_research_update", "lead_research", now, _nest(outer, "behavioral_metrics", metrics))
+
+
+def transform_intent_events(df: pd.DataFrame, now: str) -> pd.DataFrame:
+    """Vectorized transform_intent_event."""
+    data = pd.DataFrame({
+        "intent_score": _number(df, "intent_score").astype(float),
+        "signals": _column(df, "intent_signals", []),
+        "recommendations": _column(df, "recommendations", []),
+        "confidence": _text(df, "confidence_tag", "medium"),
+    }, index=df.index)
+    return _events(df, "intent_update", "intent_qualifier", now, _json_lines(data))
+
+
+def transform_email_events(df: pd.DataFrame, now: str) -> pd.DataFrame:
+    """Vectorized transform_email_event."""
+    replied = _column(df, "replied_time", None).notna()
+    outer = pd.DataFrame({
+        "email_id": _text(df, "email_id", "None"),
+        "subject": _text(df, "subject"),
+        "type": _text(df, "email_type", "initial"),
+        "reply_status": _text(df, "reply_status", "pending"),
+    }, index=df.index)
+    engagement = pd.DataFrame({
+        "opened": _number(df, "opened").astype(bool),
+        "replied": replied,
+        "engagement_score": _number(df, "engagement_score").astype(float),
+    }, index=df.index)
+    timestamp = _text(df, "sent_time", now)
+    return _events(df, "email_sent", "email_strategy", timestamp, _nest(outer, "engagement", engagement), replied=replied)
+
+
+def transform_followup_events(df: pd.DataFrame, now: str) -> pd.DataFrame:
+    """Vectorized transform_followup_event."""
+    scheduled_time = _text(df, "scheduled_time")
+    data = pd.DataFrame({
+        "scheduled_time": scheduled_time,
+        "followup_type": _text(df, "followup_type", "email"),
+        "urgency_score": _number(df, "urgency_score", 50).astype(float),
+        "timing_patterns": _column(df, "timing_patterns", {"best_days": [], "best_hours": []}),
+    }, index=df.index)
+    return _events(df, "followup_scheduled", "followup_timing", now, _json_lines(data),
+                   scheduled_time=scheduled_time.where(scheduled_time != "", None))
+
+
+def transform_standard_events(df: pd.DataFrame, now: str) -> pd.DataFrame:
+    """Rows that already are standard events (lead_id, event_type, source_agent, data[, timestamp])."""
+    data = _column(df, "data", None)
+    payload = data.map(lambda d: json.dumps(d, separators=(",", ":"), default=str) if isinstance(d, dict) else None)
+    event_type = _column(df, "event_type", None)
+    replied = data.map(lambda d: bool((d.get("engagement") or {}).get("replied")) if isinstance(d, dict) else False)
+    scheduled_time = data.map(lambda d: d.get("scheduled_time") or None if isinstance(d, dict) else None)
+    events = _events(df, "", "", _text(df, "timestamp", now), payload,
+                     replied=replied & (event_type == "email_sent"),
+                     scheduled_time=scheduled_time.where(event_type == "followup_scheduled", None))
+    events["event_type"] = event_type.where(event_type.isna(), event_type.astype(str))
+    events["source_agent"] = _column(df, "source_agent", None)
+    return events
@@ -9,6 +9,14 @@ import pandas as pd
 import json
 from langgraph_nodes.email_strategy_node import create_email_strategy_graph
 from prompts.email_strategy_prompts import email_strategy_prompts
+from utils.email_store import load_email_log
+from utils.exemplar_index import load_exemplar_index
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Successful emails shown to the LLM as examples
+EXAMPLES = 5
 
 class EmailStrategyAgent:
     def __init__(self, llm, company_info: Dict[str, str]):
@@ -16,74 +24,70 @@ class EmailStrategyAgent:
         self.llm = llm
         self.company_info = company_info
         self.email_data = None
+        self.email_log = None
     
     def load_data(self, email_path: str):
-        """Load historical email data from CSV"""
-        print("\n=== Loading Data ===")
-        
+        """Load historical email data from CSV (bodies are read on demand)"""
         # Load emails
-        self.email_data = pd.read_csv(email_path)
-        print(f"Loaded email data shape: {self.email_data.shape}")
-        print(f"Email columns: {self.email_data.columns.tolist()}")
+        self.email_log = load_email_log(email_path)
+        self.email_data = self.email_log.meta
+        logger.info("Loaded email data shape: %s", self.email_data.shape)
+        logger.debug("Email columns: %s", self.email_data.columns)
     
     def _validate_data(self):
-        """Validate and prepare data for the workflow"""
-        if self.email_data is None:
+        """Validate data and return the exemplar index of the loaded email log"""
+        if self.email_log is None:
             raise ValueError("Must load data before processing")
-        
-        # Convert emails to list format
-        emails_list = []
-        for _, row in self.email_data.iterrows():
-            email = {
-                "email_id": str(row.get("email_id", "")),
-                "subject": str(row.get("subject", "")),
-                "email_text": str(row.get("email_text", "")),
-                "stage": str(row.get("stage", "")),
-                "opened": bool(row.get("opened", False)),
-                "reply_status": bool(row.get("replied", False)),
-                "sentiment": str(row.get("sentiment", "")),
-                "engagement_score": float(row.get("engagement_score", 0))
-            }
-            emails_list.append(email)
-        
-        return emails_list
+        # Built once per version of the log and shared by every drafted email
+        return load_exemplar_index(self.email_log)
+    
+    def _query(self, lead: Dict[str, Any], intent_data: Dict[str, Any]) -> str:
+        """Text a lead's exemplars should resemble: its role, industry and intent"""
+        parts = [lead.get("title"), lead.get("industry"), lead.get("company")]
+        for item in intent_data.get("intent_signals", []) + intent_data.get("recommendations", []):
+            if isinstance(item, dict):
+                parts.extend(str(value) for value in item.values())
+            else:
+                parts.append(str(item))
+        return " ".join(str(part) for part in parts if part)
     
     def craft_email(self, lead: Dict[str, Any], intent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Craft a personalized email for a qualified lead"""
-        print("\n=== Crafting Email ===")
-        
         try:
-            # Get email examples
-            emails = self._validate_data()
-            print(f"Found {len(emails)} email examples")
-            
-            # Get successful examples
-            successful = [e for e in emails if e.get('opened') and e.get('reply_status')]  # Fix: check bool
-            examples = successful[:5]  # Use top 5
-            print(f"Using {len(examples)} successful examples")
+            # Top 5 successful emails most similar to this lead; only their bodies are read
+            exemplars = self._validate_data()
+            examples = exemplars.search(
+                self._query(lead, intent_data),
+                k=EXAMPLES,
+                stage=lead.get("stage"),
+                topic=lead.get("topic"),
+                sentiment=lead.get("sentiment"),
+                industry=lead.get("industry"),
+            )
+            logger.debug("Using %d of %d successful examples", len(examples), len(exemplars))
             
             # Format context for LLM
-            context = {
-                "lead": {
-                    "company": lead.get('company'),
-                    "title": lead.get('title'),
-                    "industry": lead.get('industry')
-                },
-                "company": self.company_info,
-                "intent": {
-                    "score": lead.get('intent_score', 0),
-                    "signals": intent_data.get('intent_signals', []),
-                    "recommendations": intent_data.get('recommendations', [])
-                },
-                "examples": examples
+            lead_context = {
+                "company": lead.get('company'),
+                "title": lead.get('title'),
+                "industry": lead.get('industry'),
+                "intent_score": lead.get('intent_score', 0)
+            }
+            intent = {
+                "signals": intent_data.get('intent_signals', []),
+                "recommendations": intent_data.get('recommendations', [])
             }
             
-            # Generate email using LLM
+            # Generate email using LLM; the exemplars follow the shared template
             prompt = email_strategy_prompts["craft_email"].format(
-                context=json.dumps(context, indent=2)
+                lead=json.dumps(lead_context, indent=2),
+                intent_signals=json.dumps(intent, indent=2),
+                company_info=json.dumps(self.company_info, indent=2)
             )
+            if examples:
+                prompt += "\nSUCCESSFUL EMAILS TO SIMILAR LEADS (match their tone, do not copy):\n"
+                prompt += json.dumps(examples, indent=2) + "\n"
             
-            print("\n=== Generating Email ===")
             response = self.llm.generate_content(prompt)
             response_text = response.text
             
@@ -92,11 +96,13 @@ class EmailStrategyAgent:
                 response_text = response_text.split("```json")[1]
                 response_text = response_text.split("```")[0]
             
-            print(f"Cleaned response: {response_text}")
+            logger.debug("Cleaned response: %s", response_text)
             
             email = json.loads(response_text)
-            print("\n=== Parsed Email ===")
-            print(json.dumps(email, indent=2))
+            logger.debug("Parsed email: %s", email)
+            # The shared template names the body and factors like the batch pipeline does
+            email.setdefault("body", email.get("email_preview"))
+            email.setdefault("personalization", email.get("personalization_factors"))
             
             # Validate required fields
             required = ["subject", "body", "personalization"]
@@ -107,7 +113,5 @@ class EmailStrategyAgent:
             return email
             
         except Exception as e:
-            print(f"\n=== Error Details ===")
-            print(f"Type: {type(e).__name__}")
-            print(f"Message: {str(e)}")
+            logger.error("Failed to craft email (%s): %s", type(e).__name__, e)
             raise ValueError(f"Failed to craft email: {str(e)}")
@@ -0,0 +1,263 @@
+"""Compact, time-ordered event storage for the CRM logger."""
+
+import bisect
+import json
+import mmap
+import os
+import sys
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PAYLOAD_FILE = "events.bin"
+INDEX_FILE = "index.json"
+
+
+def _encode(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def init_metrics() -> Dict[str, Any]:
+    """Initialize metrics structure."""
+    return {
+        "total_events": 0,
+        "event_counts": {},
+        "email_metrics": {
+            "total_sent": 0,
+            "total_replies": 0,
+            "response_rate": 0.0
+        }
+    }
+
+
+def init_timeline() -> Dict[str, Any]:
+    """Initialize timeline structure."""
+    return {
+        "first_contact": None,
+        "last_email_sent": None,
+        "next_scheduled_followup": None
+    }
+
+
+class Event:
+    """One stored event. `data` is kept as compact JSON (bytes, or a slice of the
+    memory-mapped payload file) and only decoded when the event is read."""
+
+    __slots__ = ("timestamp", "event_type", "source_agent", "payload")
+
+    def __init__(self, timestamp: str, event_type: str, source_agent: str, payload):
+        self.timestamp = timestamp
+        self.event_type = sys.intern(event_type)
+        self.source_agent = sys.intern(source_agent)
+        self.payload = payload
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return json.loads(bytes(self.payload))
+
+    def to_dict(self, lead_id: str) -> Dict[str, Any]:
+        return {
+            "lead_id": lead_id,
+            "event_type": self.event_type,
+            "source_agent": self.source_agent,
+            "timestamp": self.timestamp,
+            "data": self.data
+        }
+
+
+class LeadEvents:
+    """Events of one lead in timestamp order, with metrics and timeline kept up to date on insert."""
+
+    __slots__ = ("timestamps", "events", "metrics", "timeline")
+
+    def __init__(self):
+        self.timestamps: List[str] = []
+        self.events: List[Event] = []
+        self.metrics = init_metrics()
+        self.timeline = init_timeline()
+
+    def insert(self, event: Event, replied: bool = False, scheduled_time: Optional[str] = None):
+        # bisect_right keeps events with equal timestamps in arrival order
+        position = bisect.bisect_right(self.timestamps, event.timestamp)
+        self.timestamps.insert(position, event.timestamp)
+        self.events.insert(position, event)
+        self._count(event.event_type, replied)
+        self._extend_timeline(event.timestamp, event.event_type, scheduled_time)
+
+    def extend(self, timestamps: List[str], events: List[Event]):
+        """Insert events that are already in timestamp order (summaries are updated by the caller)."""
+        if not self.timestamps or timestamps[0] >= self.timestamps[-1]:
+            self.timestamps.extend(timestamps)
+            self.events.extend(events)
+            return
+        # Stable merge: on equal timestamps the events already stored come first
+        merged = sorted(zip(self.timestamps + timestamps, self.events + events), key=lambda pair: pair[0])
+        self.timestamps = [timestamp for timestamp, _ in merged]
+        self.events = [event for _, event in merged]
+
+    def add_summary(self, event_counts: Dict[str, int], sent: int, replies: int, first_contact: str,
+                    last_email_sent: Optional[str], next_scheduled_followup: Optional[str]):
+        """Fold the aggregated summary of a bulk insert into the metrics and timeline."""
+        metrics = self.metrics
+        for event_type, count in event_counts.items():
+            metrics["total_events"] += count
+            metrics["event_counts"][event_type] = metrics["event_counts"].get(event_type, 0) + count
+        if sent:
+            email_metrics = metrics["email_metrics"]
+            email_metrics["total_sent"] += sent
+            email_metrics["total_replies"] += replies
+            email_metrics["response_rate"] = email_metrics["total_replies"] / email_metrics["total_sent"]
+        self._extend_timeline(first_contact, "", next_scheduled_followup)
+        if last_email_sent is not None:
+            self._extend_timeline(last_email_sent, "email_sent", None)
+
+    def _count(self, event_type: str, replied: bool):
+        metrics = self.metrics
+        metrics["total_events"] += 1
+        metrics["event_counts"][event_type] = metrics["event_counts"].get(event_type, 0) + 1
+        if event_type == "email_sent":
+            email_metrics = metrics["email_metrics"]
+            email_metrics["total_sent"] += 1
+            if replied:
+                email_metrics["total_replies"] += 1
+            email_metrics["response_rate"] = email_metrics["total_replies"] / email_metrics["total_sent"]
+
+    def _extend_timeline(self, timestamp: str, event_type: str, scheduled_time: Optional[str]):
+        timeline = self.timeline
+        if timeline["first_contact"] is None or timestamp < timeline["first_contact"]:
+            timeline["first_contact"] = timestamp
+        if event_type == "email_sent" and (timeline["last_email_sent"] is None or timestamp > timeline["last_email_sent"]):
+            timeline["last_email_sent"] = timestamp
+        if scheduled_time and (timeline["next_scheduled_followup"] is None
+                               or scheduled_time > timeline["next_scheduled_followup"]):
+            timeline["next_scheduled_followup"] = scheduled_time
+
+
+class EventStore:
+    """Per-lead event store that can be saved to a directory and reopened memory-mapped.
+
+    `save` writes every event's data to one payload file and the per-lead
+    index (timestamps, types, offsets, metrics, timeline) to index.json.
+    `open` maps the payload file instead of reading it, so event data of a
+    reopened store stays on disk until a lead's history is actually read.
+    """
+
+    def __init__(self):
+        self.leads: Dict[str, LeadEvents] = {}
+        self._mapped = None
+
+    def add(self, lead_id: str, timestamp: str, event_type: str, source_agent: str,
+            data: Dict[str, Any]) -> Event:
+        replied = False
+        scheduled_time = None
+        if event_type == "email_sent":
+            replied = bool((data.get("engagement") or {}).get("replied"))
+        elif event_type == "followup_scheduled":
+            scheduled_time = data.get("scheduled_time") or None
+        event = Event(str(timestamp), event_type, source_agent, _encode(data))
+        self._lead(lead_id).insert(event, replied, scheduled_time)
+        return event
+
+    def _lead(self, lead_id: str) -> LeadEvents:
+        lead = self.leads.get(lead_id)
+        if lead is None:
+            lead = self.leads[lead_id] = LeadEvents()
+        return lead
+
+    def add_bulk(self, events: "pd.DataFrame") -> int:
+        """Insert a frame of transformed events (see data_transformers.EVENT_COLUMNS).
+
+        Rows are sorted once by (lead_id, timestamp) and each lead's metrics and
+        timeline are updated from group-by aggregates instead of per event.
+        """
+        if events.empty:
+            return 0
+        events = events.assign(timestamp=events["timestamp"].astype(str), replied=events["replied"].astype(bool))
+        events = events.sort_values(["lead_id", "timestamp"], kind="stable")
+
+        # Rows are in (lead_id, timestamp) order: a lead's first row is its first
+        # contact and its last email row its last email
+        event_counts = {}
+        for (lead_id, event_type), count in events.groupby(["lead_id", "event_type"], sort=False).size().items():
+            event_counts.setdefault(lead_id, {})[event_type] = int(count)
+        emails = events[events["event_type"] == "email_sent"]
+        email_stats = emails.groupby("lead_id", sort=False)["replied"].agg(["size", "sum"])
+        email_stats["last"] = emails.drop_duplicates("lead_id", keep="last").set_index("lead_id")["timestamp"]
+        email_stats = email_stats.to_dict("index")
+        followups = events[events["scheduled_time"].notna()].groupby("lead_id", sort=False)["scheduled_time"].max()
+        followups = followups.to_dict()
+
+        lead_ids = events["lead_id"].to_numpy(dtype=object)
+        timestamps = events["timestamp"].tolist()
+        records = [
+            Event(timestamp, event_type, source_agent, payload.encode("utf-8"))
+            for timestamp, event_type, source_agent, payload in zip(
+                timestamps, events["event_type"].tolist(), events["source_agent"].tolist(), events["payload"].tolist())
+        ]
+        starts = np.flatnonzero(np.r_[True, lead_ids[1:] != lead_ids[:-1]])
+        ends = np.r_[starts[1:], len(lead_ids)]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            lead_id = lead_ids[start]
+            lead = self._lead(lead_id)
+            lead.extend(timestamps[start:end], records[start:end])
+            stats = email_stats.get(lead_id, {"size": 0, "sum": 0, "last": None})
+            lead.add_summary(event_counts[lead_id], int(stats["size"]), int(stats["sum"]),
+                             timestamps[start], stats["last"], followups.get(lead_id))
+        return len(records)
+
+    def history(self, lead_id: str) -> List[Dict[str, Any]]:
+        lead = self.leads.get(lead_id)
+        return [event.to_dict(lead_id) for event in lead.events] if lead else []
+
+    def metrics(self, lead_id: str) -> Dict[str, Any]:
+        lead = self.leads.get(lead_id)
+        return lead.metrics if lead else init_metrics()
+
+    def timeline(self, lead_id: str) -> Dict[str, Any]:
+        lead = self.leads.get(lead_id)
+        return dict(lead.timeline) if lead else init_timeline()
+
+    def save(self, path: str):
+        """Write the store to directory `path` (replacing a previous save atomically per file)."""
+        os.makedirs(path, exist_ok=True)
+        index = {}
+        payload_tmp = os.path.join(path, f"{PAYLOAD_FILE}.{os.getpid()}.tmp")
+        with open(payload_tmp, "wb") as f:
+            offset = 0
+            for lead_id, lead in self.leads.items():
+                records = []
+                for event in lead.events:
+                    payload = bytes(event.payload)
+                    f.write(payload)
+                    records.append([event.timestamp, event.event_type, event.source_agent, offset, len(payload)])
+                    offset += len(payload)
+                index[lead_id] = {"events": records, "metrics": lead.metrics, "timeline": lead.timeline}
+        index_tmp = os.path.join(path, f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(index_tmp, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(payload_tmp, os.path.join(path, PAYLOAD_FILE))
+        os.replace(index_tmp, os.path.join(path, INDEX_FILE))
+
+    @classmethod
+    def open(cls, path: str) -> "EventStore":
+        """Reopen a saved store; event data is read from a memory map on demand."""
+        store = cls()
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        payload_path = os.path.join(path, PAYLOAD_FILE)
+        view = memoryview(b"")
+        if os.path.getsize(payload_path):
+            with open(payload_path, "rb") as f:
+                store._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(store._mapped)
+        for lead_id, saved in index.items():
+            lead = store.leads[lead_id] = LeadEvents()
+            for timestamp, event_type, source_agent, offset, length in saved["events"]:
+                lead.timestamps.append(timestamp)
+                lead.events.append(Event(timestamp, event_type, source_agent, view[offset:offset + length]))
+            lead.metrics = saved["metrics"]
+            lead.timeline = saved["timeline"]
+        return store
@@ -9,6 +9,10 @@ import pandas as pd
 from datetime import datetime
 from langgraph_nodes.followup_timing_node import create_followup_timing_graph
 from prompts.followup_timing_prompts import followup_timing_prompts
+from utils.email_store import read_email_metadata
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class FollowUpTimingAgent:
     def __init__(self, llm):
@@ -18,12 +22,10 @@ class FollowUpTimingAgent:
     
     def load_data(self, email_logs_path: str = None, email_logs_df: pd.DataFrame = None):
         """Load historical email logs from CSV or DataFrame"""
-        print("\n=== Loading Data ===")
-        
         if email_logs_df is not None:
             self.email_logs = email_logs_df
         elif isinstance(email_logs_path, str):
-            self.email_logs = pd.read_csv(email_logs_path)
+            self.email_logs = read_email_metadata(email_logs_path)
         elif isinstance(email_logs_path, pd.DataFrame):
             self.email_logs = email_logs_path
         else:
@@ -40,8 +42,8 @@ class FollowUpTimingAgent:
             if col in self.email_logs.columns:
                 self.email_logs[col] = pd.to_datetime(self.email_logs[col])
                 
-        print(f"Loaded email logs shape: {self.email_logs.shape}")
-        print(f"Email columns: {self.email_logs.columns.tolist()}")
+        logger.info("Loaded email logs shape: %s", self.email_logs.shape)
+        logger.debug("Email columns: %s", self.email_logs.columns)
     
     def _validate_data(self, lead_id: str):
         """Validate and prepare data for the workflow"""
@@ -67,12 +69,10 @@ class FollowUpTimingAgent:
     
     def process_task(self, lead_id: str) -> Dict[str, Any]:
         """Process follow-up timing for a lead"""
-        print("\n=== Processing Follow-up Timing Task ===")
-        
         try:
             # Step 1: Validate data
             emails_list = self._validate_data(lead_id)
-            print(f"Found {len(emails_list)} emails for lead")
+            logger.debug("Found %d emails for lead %s", len(emails_list), lead_id)
             
             # Step 2: Prepare initial state
             initial_state = {
@@ -83,22 +83,17 @@ class FollowUpTimingAgent:
             }
             
             # Step 3: Get our workflow
-            print("\n=== Creating Follow-up Timing Graph ===")
             workflow = create_followup_timing_graph(self.llm, followup_timing_prompts)
             
             # Step 4: Execute workflow
             result = workflow.invoke(initial_state)
-            print("\n=== Workflow Completed ===")
             
             if "error" in result:
-                print("\n=== Workflow Error ===")
-                print(result["error"])
+                logger.warning("Follow-up timing workflow error: %s", result["error"])
                 return {"error": result["error"]}
                 
             return result["strategy"]
             
         except Exception as e:
-            print(f"\n=== Error Details ===")
-            print(f"Type: {type(e).__name__}")
-            print(f"Message: {str(e)}")
+            logger.error("Follow-up timing failed (%s): %s", type(e).__name__, e)
             return {"error": str(e)}
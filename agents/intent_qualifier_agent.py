@@ -9,6 +9,10 @@ import pandas as pd
 import json
 from langgraph_nodes.intent_qualifier_node import create_intent_qualifier_graph
 from prompts.intent_qualifier_prompts import intent_qualifier_prompts
+from utils.email_store import read_email_metadata
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class IntentQualifierAgent:
     def __init__(self, llm):
@@ -19,17 +23,15 @@ class IntentQualifierAgent:
     
     def load_data(self, leads_path: str, email_path: str):
         """Load lead and email data from CSV files"""
-        print("\n=== Loading Data ===")
-        
         # Load leads
         self.leads_data = pd.read_csv(leads_path)
-        print(f"Loaded leads data shape: {self.leads_data.shape}")
-        print(f"Leads columns: {self.leads_data.columns.tolist()}")
+        logger.info("Loaded leads data shape: %s", self.leads_data.shape)
+        logger.debug("Leads columns: %s", self.leads_data.columns)
         
-        # Load emails
-        self.email_data = pd.read_csv(email_path)
-        print(f"Loaded email data shape: {self.email_data.shape}")
-        print(f"Email columns: {self.email_data.columns.tolist()}")
+        # Load emails (metadata only; the bodies are not used for scoring)
+        self.email_data = read_email_metadata(email_path)
+        logger.info("Loaded email data shape: %s", self.email_data.shape)
+        logger.debug("Email columns: %s", self.email_data.columns)
     
     def _validate_data(self):
         """Validate and prepare data for the workflow"""
@@ -65,8 +67,6 @@ class IntentQualifierAgent:
     
     def process_task(self, task):
         """Process a lead qualification task using LangGraph workflow"""
-        print("\n=== Processing Intent Qualification Task ===")
-        
         # Step 1: Validate data
         leads_list, emails_list = self._validate_data()
         
@@ -79,17 +79,15 @@ class IntentQualifierAgent:
         }
         
         # Step 3: Get our workflow
-        print("\n=== Creating Intent Qualifier Graph ===")
         workflow = create_intent_qualifier_graph(self.llm, intent_qualifier_prompts)
         
         # Step 4: Execute workflow
         try:
             result = workflow.invoke(initial_state)  # Fixed: use invoke() method
-            print("\n=== Workflow Completed ===")
-            print(f"Found {len(result['qualified_leads'])} qualified leads")
+            logger.info("Found %d qualified leads", len(result['qualified_leads']))
             return result
         except Exception as e:
-            print(f"Error in workflow: {str(e)}")
+            logger.error("Error in workflow: %s", e)
             return {
                 "error": str(e),
                 "qualified_leads": [],
@@ -3,36 +3,39 @@ import pandas as pd
 import json
 from langgraph_nodes.lead_research_node import create_lead_research_graph
 from prompts.lead_research_prompts import lead_research_prompts
+from utils.logger import get_logger
+from utils.opportunity_index import load_opportunity_index
+
+logger = get_logger(__name__)
 
 class LeadResearchAgent:
     def __init__(self, llm):
         self.llm = llm
         self.leads_data = None
-        self.sales_pipeline = None
+        self.opportunities = None
         
-    def load_data(self, leads_path: str, sales_path: str = None):
+    def load_data(self, leads_path: str, sales_path: str = None, crm_path: str = None):
         """Load the necessary datasets for lead research"""
-        print("\n=== Loading Data ===")
         self.leads_data = pd.read_csv(leads_path)
-        print(f"Loaded leads data shape: {self.leads_data.shape}")
-        print(f"Leads data columns: {self.leads_data.columns.tolist()}")
+        logger.info("Loaded leads data shape: %s", self.leads_data.shape)
+        logger.debug("Leads data columns: %s", self.leads_data.columns)
         
-        # Load sales pipeline if available
-        if sales_path:
-            try:
-                self.sales_pipeline = pd.read_csv(sales_path)
-                print(f"Loaded sales data shape: {self.sales_pipeline.shape}")
-                print(f"Sales data columns: {self.sales_pipeline.columns.tolist()}")
-            except:
-                print("Sales pipeline data unavailable or could not be loaded")
+        # Deal context of the leads from the sales and CRM pipelines, if available
+        try:
+            self.opportunities = load_opportunity_index(sales_path, crm_path)
+        except Exception:
+            logger.warning("Sales pipeline data unavailable or could not be loaded")
     
     def _validate_data(self):
         """Validate and prepare data for the workflow"""
         # Convert leads to list format
         leads_list = []
+        sales_list = []
         if self.leads_data is not None:
-            for _, row in self.leads_data.iterrows():
+            for row in self.leads_data.to_dict("records"):
+                lead_id = str(row.get('lead_id', ''))
                 lead = {
+                    'lead_id': lead_id,
                     'visits': int(row.get('visits', 0)),
                     'time_on_site': float(row.get('time_on_site', 0.0)),
                     'pages_per_visit': float(row.get('pages_per_visit', 0.0)),
@@ -44,27 +47,15 @@ class LeadResearchAgent:
                 }
                 leads_list.append(lead)
                 
-        # Convert sales to list format
-        sales_list = []
-        if self.sales_pipeline is not None:
-            for _, row in self.sales_pipeline.iterrows():
-                sale = {
-                    'opportunity_id': str(row.get('opportunity_id', '')),
-                    'deal_stage': str(row.get('deal_stage', '')),
-                    'close_value': float(row.get('close_value', 0.0)),
-                    'company': str(row.get('company', '')),
-                    'lead_id': str(row.get('lead_id', '')),
-                    'close_date': str(row.get('close_date', '')),
-                    'engage_date': str(row.get('engage_date', ''))
-                }
-                sales_list.append(sale)
+                # Only the loaded leads' opportunities, looked up in the join index
+                if self.opportunities is not None:
+                    for opportunity in self.opportunities.opportunities(lead_id):
+                        sales_list.append({**opportunity, 'lead_id': lead_id})
                 
         return leads_list, sales_list
     
     def process_task(self, task):
         """Process a lead research task using LangGraph workflow"""
-        print("\n=== Processing Lead Research Task ===")
-        
         # Step 1: Validate data
         leads_list, sales_list = self._validate_data()
         
@@ -76,6 +67,14 @@ class LeadResearchAgent:
             "llm": self.llm,
             "prompt_templates": lead_research_prompts
         }
+        if len(leads_list) == 1:
+            # A single lead runs through the per-lead workflow with its deal context
+            lead = leads_list[0]
+            initial_state["lead"] = lead
+            if self.opportunities is not None:
+                company_id = self.leads_data.iloc[0].get('company_id')
+                initial_state["deal_context"] = self.opportunities.context(
+                    lead['lead_id'], company_id if pd.notna(company_id) else None)
         
         # Step 3: Get our existing workflow
         workflow = create_lead_research_graph(self.llm, lead_research_prompts)
@@ -104,7 +103,6 @@ Learning: {insight['learning']}
                 insights=insights_text
             )
             
-            print("\n=== Interpreting Insights ===")
             response = self.llm.generate_content(interpretation_prompt)
             response_text = response.text.strip()
             
@@ -126,7 +124,7 @@ Learning: {insight['learning']}
                     raise ValueError("engagement_recommendations must be an array")
                 return json.dumps(result)
             except (json.JSONDecodeError, ValueError) as e:
-                print(f"Error parsing interpretation: {str(e)}")
+                logger.warning("Error parsing interpretation: %s", e)
                 return "Error interpreting insights"
         else:
             return "No insights were generated from the lead analysis."
\ No newline at end of file
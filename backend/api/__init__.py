@@ -1 +1,8 @@
 # API package
+import os
+import sys
+
+# Routers share the project-level packages (agents, langgraph_nodes, prompts, utils)
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
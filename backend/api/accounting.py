@@ -0,0 +1,188 @@
+"""
+Per-lead cost and latency accounting.
+
+`process_batch_background` opens a `LeadAccount` for every lead and runs each
+LangGraph pipeline inside `account.stage(...)`. LLM wrappers report their
+calls with `record_llm_call`, which charges the lead and stage that are
+active in the calling context, so no accounting state has to be threaded
+through the graphs. The finished account is stored on the intel record under
+"accounting" and aggregated by `aggregate_costs` for the cost endpoint.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STAGE_COUNTERS = ("llm_calls", "prompt_tokens", "completion_tokens", "llm_seconds", "retries", "cache_hits",
+                  "memo_hits", "archetype_hits", "company_hits", "company_misses")
+
+_current_account = contextvars.ContextVar("lead_account", default=None)
+_current_stage = contextvars.ContextVar("lead_stage", default=None)
+
+
+class LeadAccount:
+    """Wall time, queue wait and LLM usage of one lead, broken down by stage."""
+
+    def __init__(self, queue_wait_seconds: float = 0.0):
+        self.queue_wait_seconds = queue_wait_seconds
+        self.stages: Dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {"wall_seconds": 0.0, **{c: 0 for c in STAGE_COUNTERS}}
+        return self.stages[name]
+
+    @contextmanager
+    def active(self):
+        """Charge LLM calls made inside the block to this account."""
+        token = _current_account.set(self)
+        try:
+            yield self
+        finally:
+            _current_account.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage and charge LLM calls made inside it to the stage."""
+        with self._lock:
+            self._stage(name)
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_stage.reset(token)
+            with self._lock:
+                self.stages[name]["wall_seconds"] += elapsed
+
+    def add_llm_call(self, stage: str, prompt_tokens: int = 0, completion_tokens: int = 0, seconds: float = 0.0,
+                     retries: int = 0, cache_hit: bool = False):
+        with self._lock:
+            counters = self._stage(stage or "unstaged")
+            counters["llm_calls"] += 1
+            counters["prompt_tokens"] += int(prompt_tokens or 0)
+            counters["completion_tokens"] += int(completion_tokens or 0)
+            counters["llm_seconds"] += seconds
+            counters["retries"] += retries
+            counters["cache_hits"] += int(cache_hit)
+
+    def add_memo_hit(self, stage: str):
+        """Count a stage served from the stage memo instead of being run."""
+        with self._lock:
+            self._stage(stage)["memo_hits"] += 1
+
+    def add_archetype_hit(self, stage: str):
+        """Count a stage served from another lead of the same archetype instead of being run."""
+        with self._lock:
+            self._stage(stage)["archetype_hits"] += 1
+
+    def add_company_lookup(self, stage: str, hit: bool):
+        """Count a lookup in the company research cache (a miss pays for one company analysis)."""
+        with self._lock:
+            self._stage(stage or "unstaged")["company_hits" if hit else "company_misses"] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {k: round(v, 4) if isinstance(v, float) else v for k, v in counters.items()}
+                for name, counters in self.stages.items()
+            }
+        totals = {c: sum(s[c] for s in stages.values()) for c in STAGE_COUNTERS}
+        totals["llm_seconds"] = round(totals["llm_seconds"], 4)
+        return {
+            "queue_wait_seconds": round(self.queue_wait_seconds, 4),
+            "wall_seconds": round(time.perf_counter() - self._started, 4),
+            **totals,
+            "stages": stages,
+        }
+
+
+def record_llm_call(prompt_tokens: int = 0, completion_tokens: int = 0, seconds: float = 0.0,
+                    retries: int = 0, cache_hit: bool = False):
+    """Charge one LLM call to the lead and stage active in this context (no-op outside a lead)."""
+    account = _current_account.get()
+    if account is not None:
+        account.add_llm_call(_current_stage.get(), prompt_tokens, completion_tokens, seconds, retries, cache_hit)
+
+
+def record_company_lookup(hit: bool):
+    """Charge a company research cache lookup to the lead and stage active in this context."""
+    account = _current_account.get()
+    if account is not None:
+        account.add_company_lookup(_current_stage.get(), hit)
+
+
+GROUP_BYS = ("region", "lead_source", "stage")
+COST_METRICS = ("wall_seconds",) + STAGE_COUNTERS
+
+
+def _stage_frame(records: Dict[str, dict]) -> "pd.DataFrame":
+    """One row per (lead, stage) from intel records carrying an accounting block."""
+    import pandas as pd
+
+    rows = []
+    for lead_id, record in records.items():
+        accounting = record.get("accounting")
+        if not accounting:
+            continue
+        lead = record.get("lead", {})
+        for stage, counters in accounting.get("stages", {}).items():
+            rows.append({
+                "lead_id": lead_id,
+                "region": lead.get("region", "Unknown"),
+                "lead_source": lead.get("lead_source", "Unknown"),
+                "stage": stage,
+                "queue_wait_seconds": accounting.get("queue_wait_seconds", 0.0),
+                **{m: counters.get(m, 0) for m in COST_METRICS},
+            })
+    return pd.DataFrame(rows, columns=["lead_id", "region", "lead_source", "stage", "queue_wait_seconds", *COST_METRICS])
+
+
+def _group(frame: "pd.DataFrame", key: str) -> List[dict]:
+    metrics = list(COST_METRICS)
+    grouped = frame.groupby(key, sort=False)
+    out = grouped[metrics].sum()
+    out["leads"] = grouped["lead_id"].nunique()
+    out["mean_wall_seconds_per_lead"] = out["wall_seconds"] / out["leads"]
+    out["tokens_per_lead"] = (out["prompt_tokens"] + out["completion_tokens"]) / out["leads"]
+    out = out.sort_values("wall_seconds", ascending=False).round(4)
+    return out.reset_index().to_dict("records")
+
+
+def aggregate_costs(records: Dict[str, dict], top_n: int = 10) -> dict:
+    """Aggregate the accounting blocks of intel records by region, lead_source and stage."""
+    frame = _stage_frame(records)
+    if frame.empty:
+        return {"leads": 0, "totals": {}, "company_research": {"lookups": 0, "analyses": 0, "hits": 0, "hit_rate": 0.0},
+                "by": {key: [] for key in GROUP_BYS}, "slowest_leads": []}
+
+    per_lead = frame.groupby("lead_id", sort=False).agg(
+        region=("region", "first"),
+        lead_source=("lead_source", "first"),
+        queue_wait_seconds=("queue_wait_seconds", "first"),
+        **{m: (m, "sum") for m in COST_METRICS},
+    )
+    totals = {c: round(per_lead[c].sum().item(), 4) for c in ("queue_wait_seconds", *COST_METRICS)}
+    slowest = per_lead.nlargest(top_n, "wall_seconds").round(4).reset_index()
+    lookups = totals["company_hits"] + totals["company_misses"]
+
+    return {
+        "leads": int(len(per_lead)),
+        "totals": totals,
+        "company_research": {
+            "lookups": lookups,
+            "analyses": totals["company_misses"],
+            "hits": totals["company_hits"],
+            "hit_rate": round(totals["company_hits"] / lookups, 4) if lookups else 0.0,
+        },
+        "by": {key: _group(frame, key) for key in GROUP_BYS},
+        "slowest_leads": slowest.to_dict("records"),
+    }
@@ -1,52 +1,23 @@
 import sys
 import os
 import json
-import pandas as pd
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from dotenv import load_dotenv
-import requests
 
-class OllamaResponse:
-    def __init__(self, text):
-        self.text = text
-
-class OllamaWrapper:
-    def __init__(self, model_name="minimax-m2.5:cloud"):
-        self.model_name = model_name
-        
-    def generate_content(self, prompt):
-        url = "http://127.0.0.1:11434/api/generate"
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False
-        }
-        headers = {"Content-Type": "application/json"}
-        try:
-            res = requests.post(url, json=payload, headers=headers, timeout=120)
-            res.raise_for_status()
-            data = res.json()
-            return OllamaResponse(data.get("response", ""))
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            if res is not None and hasattr(res, 'text'):
-                error_msg += f" Response: {res.text}"
-            print(f"Ollama generation failed: {error_msg}")
-            return OllamaResponse("{}")
+from utils.logger import get_logger
+from api.responses import conditional_json, file_version
+from api.shared_state import get_state_store
 
+logger = get_logger(__name__)
 
 # Add the project root to sys.path so we can import the agents
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from agents.lead_research_agent import LeadResearchAgent
-from agents.intent_qualifier_agent import IntentQualifierAgent
-
-# Load environment variables for LangGraph LLM
-load_dotenv(os.path.join(root_dir, ".env"))
+# pandas, the agent classes (and through them langgraph) and the Ollama client
+# are imported inside the endpoints that need them, keeping API startup light
 
 router = APIRouter()
 
@@ -54,6 +25,7 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__
 OUTPUTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "outputs")
 LEADS_CSV = os.path.join(DATA_DIR, "Leads_Data.csv")
 SALES_CSV = os.path.join(DATA_DIR, "Sales_Pipeline.csv")
+CRM_CSV = os.path.join(DATA_DIR, "CRM_Pipeline.csv")
 
 
 class AgentRunRequest(BaseModel):
@@ -62,19 +34,27 @@ class AgentRunRequest(BaseModel):
     params: Optional[Dict[str, Any]] = None
 
 
-# In-memory agent status tracking
-_agent_status = {
-    "lead_research": {"status": "idle", "last_run": None, "result": None},
-    "intent_qualifier": {"status": "idle", "last_run": None, "result": None},
-    "email_strategy": {"status": "idle", "last_run": None, "result": None},
-    "followup_timing": {"status": "idle", "last_run": None, "result": None},
-    "crm_logger": {"status": "idle", "last_run": None, "result": None},
-}
+AGENT_IDS = ("lead_research", "intent_qualifier", "email_strategy", "followup_timing", "crm_logger")
+STATUS_NAMESPACE = "agent_status"
+
+
+def _state_store():
+    # Agent status lives in SQLite so every API worker process sees the same board
+    return get_state_store(os.path.join(OUTPUTS_DIR, "state.db"))
+
+
+def _agent_status():
+    stored = _state_store().items(STATUS_NAMESPACE)
+    return {
+        agent_id: {"status": "idle", "last_run": None, "result": None, **stored.get(agent_id, {})}
+        for agent_id in AGENT_IDS
+    }
 
 
 @router.get("/status")
 def get_agent_status():
     """Get status of all agents in the pipeline."""
+    status = _agent_status()
     agents = [
         {
             "id": "lead_research",
@@ -82,8 +62,8 @@ def get_agent_status():
             "description": "Behavioral pattern analysis & lead segmentation",
             "icon": "search",
             "stage": 1,
-            "status": _agent_status["lead_research"]["status"],
-            "last_run": _agent_status["lead_research"]["last_run"],
+            "status": status["lead_research"]["status"],
+            "last_run": status["lead_research"]["last_run"],
         },
         {
             "id": "intent_qualifier",
@@ -91,8 +71,8 @@ def get_agent_status():
             "description": "Evaluates engagement patterns & contextual intent",
             "icon": "target",
             "stage": 2,
-            "status": _agent_status["intent_qualifier"]["status"],
-            "last_run": _agent_status["intent_qualifier"]["last_run"],
+            "status": status["intent_qualifier"]["status"],
+            "last_run": status["intent_qualifier"]["last_run"],
         },
         {
             "id": "email_strategy",
@@ -100,8 +80,8 @@ def get_agent_status():
             "description": "Personalized content creation & success patterns",
             "icon": "mail",
             "stage": 3,
-            "status": _agent_status["email_strategy"]["status"],
-            "last_run": _agent_status["email_strategy"]["last_run"],
+            "status": status["email_strategy"]["status"],
+            "last_run": status["email_strategy"]["last_run"],
         },
         {
             "id": "followup_timing",
@@ -109,8 +89,8 @@ def get_agent_status():
             "description": "Response pattern analysis & engagement timing",
             "icon": "clock",
             "stage": 4,
-            "status": _agent_status["followup_timing"]["status"],
-            "last_run": _agent_status["followup_timing"]["last_run"],
+            "status": status["followup_timing"]["status"],
+            "last_run": status["followup_timing"]["last_run"],
         },
         {
             "id": "crm_logger",
@@ -118,16 +98,27 @@ def get_agent_status():
             "description": "Records interactions & calculates metrics",
             "icon": "database",
             "stage": 5,
-            "status": _agent_status["crm_logger"]["status"],
-            "last_run": _agent_status["crm_logger"]["last_run"],
+            "status": status["crm_logger"]["status"],
+            "last_run": status["crm_logger"]["last_run"],
         },
     ]
     return {"agents": agents}
 
 
+def _output_files():
+    if not os.path.exists(OUTPUTS_DIR):
+        return []
+    return sorted(os.path.join(OUTPUTS_DIR, f) for f in os.listdir(OUTPUTS_DIR) if f.endswith(".json"))
+
+
 @router.get("/outputs")
-def list_outputs():
+def list_outputs(request: Request):
     """List available pre-computed agent outputs."""
+    version, last_modified = file_version(_output_files())
+    return conditional_json(request, version, _list_outputs, last_modified)
+
+
+def _list_outputs():
     outputs = []
     if os.path.exists(OUTPUTS_DIR):
         for fname in os.listdir(OUTPUTS_DIR):
@@ -153,18 +144,22 @@ def list_outputs():
 
 
 @router.get("/outputs/{filename}")
-def get_output(filename: str):
+def get_output(request: Request, filename: str):
     """Get a specific agent output file."""
     fpath = os.path.join(OUTPUTS_DIR, filename)
     if not os.path.exists(fpath):
         raise HTTPException(status_code=404, detail="Output not found")
 
-    try:
-        with open(fpath, "r") as f:
-            data = json.load(f)
-        return {"filename": filename, "data": data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to read output: {str(e)}")
+    def build():
+        try:
+            with open(fpath, "r") as f:
+                data = json.load(f)
+            return {"filename": filename, "data": data}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to read output: {str(e)}")
+
+    version, last_modified = file_version([fpath])
+    return conditional_json(request, version, build, last_modified)
 
 
 import tempfile
@@ -172,6 +167,10 @@ import tempfile
 @router.post("/analyze/{lead_id}")
 async def analyze_lead(lead_id: str):
     """Trigger the LangGraph workflow to compute real insights for a specific lead."""
+    import pandas as pd
+    from api.llm import OllamaWrapper
+    from agents.lead_research_agent import LeadResearchAgent
+    
     # Configure the Ollama LLM
     try:
         llm = OllamaWrapper('minimax-m2.5:cloud')
@@ -190,9 +189,6 @@ async def analyze_lead(lead_id: str):
         if lead_match.empty:
             raise HTTPException(status_code=404, detail=f"Lead '{lead_id}' not found")
         test_lead = lead_match.iloc[0]
-        # Get matching sales pipeline data
-        sales_df = pd.read_csv(SALES_CSV) if os.path.exists(SALES_CSV) else pd.DataFrame()
-        test_sale = sales_df[sales_df['lead_id'] == test_lead['lead_id']] if 'lead_id' in sales_df.columns else pd.DataFrame()
     else:
         raise HTTPException(status_code=400, detail="Database missing 'lead_id' column")
     
@@ -200,18 +196,11 @@ async def analyze_lead(lead_id: str):
     with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as leads_file:
         pd.DataFrame([test_lead]).to_csv(leads_file.name, index=False)
         leads_path = leads_file.name
-        
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as sales_file:
-        if not test_sale.empty:
-            pd.DataFrame(test_sale).to_csv(sales_file.name, index=False)
-        else:
-            pd.DataFrame(columns=sales_df.columns if not sales_df.empty else []).to_csv(sales_file.name, index=False)
-        sales_path = sales_file.name
 
     try:
-        # Run Lead Research Agent
+        # Run Lead Research Agent; its deal context comes from the pipelines' join index
         research_agent = LeadResearchAgent(llm)
-        research_agent.load_data(leads_path, sales_path)
+        research_agent.load_data(leads_path, SALES_CSV, CRM_CSV)
         
         research_task = {
             "input": f"Analyze lead {lead_id} ({test_lead.get('company', 'Unknown')}) and provide insights",
@@ -255,7 +244,7 @@ async def analyze_lead(lead_id: str):
         leads_df.at[lead_index, "intent_score"] = new_intent_score
         leads_df.at[lead_index, "status"] = "Ready"  # Change status to show it was processed
         
-        _agent_status["lead_research"]["last_run"] = pd.Timestamp.now().isoformat()
+        _state_store().merge(STATUS_NAMESPACE, "lead_research", {"last_run": pd.Timestamp.now().isoformat()})
         
         return {
             "status": "success",
@@ -266,28 +255,31 @@ async def analyze_lead(lead_id: str):
         }
         
     finally:
-        # Cleanup temp files
+        # Cleanup temp file
         os.unlink(leads_path)
-        os.unlink(sales_path)
 
 async def analyze_dataset_bulk():
     """Trigger the LangGraph workflow on the entire dataset instantly in the background."""
-    print("Starting global background dataset analysis...")
+    import pandas as pd
+    from api.llm import OllamaWrapper
+    from agents.lead_research_agent import LeadResearchAgent
+    
+    logger.info("Starting global background dataset analysis...")
     # Configure the Ollama LLM
     try:
         llm = OllamaWrapper('minimax-m2.5:cloud')
     except Exception as e:
-        print(f"Error initializing Ollama LLM: {str(e)}")
+        logger.error("Error initializing Ollama LLM: %s", e)
         return
         
     if not os.path.exists(LEADS_CSV):
-        print("Error: Leads_Data.csv not found")
+        logger.error("Leads_Data.csv not found")
         return
         
     try:
         # Run Lead Research Agent on the entire CSV
         research_agent = LeadResearchAgent(llm)
-        research_agent.load_data(LEADS_CSV, SALES_CSV if os.path.exists(SALES_CSV) else None)
+        research_agent.load_data(LEADS_CSV, SALES_CSV, CRM_CSV)
         
         research_task = {
             "input": "Analyze the entire newly updated dataset and provide global macro insights",
@@ -306,22 +298,22 @@ async def analyze_dataset_bulk():
             with open(output_file, "w") as f:
                 json.dump(research_result, f, indent=4)
                 
-            _agent_status["lead_research"]["last_run"] = pd.Timestamp.now().isoformat()
+            _state_store().merge(STATUS_NAMESPACE, "lead_research", {"last_run": pd.Timestamp.now().isoformat()})
             
-            print(f"Successfully processed and generated global bulk analysis to {output_file}")
+            logger.info("Successfully processed and generated global bulk analysis to %s", output_file)
             
         except Exception as e:
-            print(f"Failed to parse or write research insights JSON: {e}")
-            print(f"Raw output: {research_result_raw[:200]}")
+            logger.error("Failed to parse or write research insights JSON: %s", e)
+            logger.debug("Raw output: %s", research_result_raw[:200])
             
     except Exception as e:
-         print(f"Error during bulk agent processing: {e}")
+         logger.exception("Error during bulk agent processing: %s", e)
 
 
 @router.post("/run/{agent_id}")
 def run_agent(agent_id: str, request: AgentRunRequest):
     """Trigger an agent run (returns pre-computed results for demo)."""
-    if agent_id not in _agent_status:
+    if agent_id not in AGENT_IDS:
         raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
 
     from datetime import datetime
@@ -337,13 +329,15 @@ def run_agent(agent_id: str, request: AgentRunRequest):
             pass
 
     # Update status
-    _agent_status[agent_id]["status"] = "completed"
-    _agent_status[agent_id]["last_run"] = datetime.now().isoformat()
-    _agent_status[agent_id]["result"] = result
+    status = _state_store().merge(STATUS_NAMESPACE, agent_id, {
+        "status": "completed",
+        "last_run": datetime.now().isoformat(),
+        "result": result,
+    })
 
     return {
         "agent_id": agent_id,
         "status": "completed",
-        "timestamp": _agent_status[agent_id]["last_run"],
+        "timestamp": status["last_run"],
         "result": result,
     }
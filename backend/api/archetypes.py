@@ -0,0 +1,156 @@
+"""
+Archetype bucketing of the leads in a batch.
+
+The research stage depends on a few lead features: title seniority, region,
+lead_source and visit / time / pages buckets, plus the lead's company (whose
+cached analysis goes into the prompt) and whether it has deal context.
+Leads with identical bucketed features form an archetype; the stage runs for the first lead of each
+archetype and its outputs are fanned out to the others. Intent and the email
+message stay per lead, and timing is predicted per lead by the send-time
+model without an LLM call.
+
+Granularity is the number of quantile buckets per numeric feature (`bins`,
+from the `archetype_bins` upload field or ARCHETYPE_BINS). 0 turns archetypes
+off: every lead runs every stage.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_BINS = int(os.getenv("ARCHETYPE_BINS", "0"))
+
+# Bucketed features each archetype stage depends on
+STAGE_FEATURES = {
+    "research": ("seniority", "region", "lead_source", "visits", "time_on_site", "pages_per_visit",
+                 "company", "deals"),
+}
+# State fields a stage's run is fanned out with; the rest of its output is per lead
+STAGE_OUTPUTS = {
+    "research": ("company_analysis", "quality_indicators", "recommendation"),
+}
+CATEGORICAL_FEATURES = ("region", "lead_source")
+NUMERIC_FEATURES = ("visits", "time_on_site", "pages_per_visit")
+# Title keywords by seniority level, most senior first
+SENIORITY_PATTERNS = (
+    (4, r"\b(?:chief|ceo|cto|cfo|coo|cmo|cio|founder|president|owner)\b"),
+    (3, r"\b(?:vp|vice president|head)\b"),
+    (2, r"\bdirector\b"),
+    (1, r"\b(?:manager|lead|principal)\b"),
+)
+
+
+def seniority(titles: "pd.Series") -> np.ndarray:
+    """Seniority level (0-4) of each title."""
+    lowered = titles.fillna("").astype(str).str.lower()
+    conditions = [lowered.str.contains(pattern, regex=True).to_numpy() for _, pattern in SENIORITY_PATTERNS]
+    return np.select(conditions, [level for level, _ in SENIORITY_PATTERNS], default=0)
+
+
+def quantile_buckets(values: np.ndarray, bins: int) -> np.ndarray:
+    """Bucket of each value among `bins` quantile buckets of the batch; -1 for missing values."""
+    known = ~np.isnan(values)
+    buckets = np.full(len(values), -1)
+    if known.any():
+        edges = np.unique(np.quantile(values[known], np.linspace(0, 1, bins + 1)[1:-1]))
+        buckets[known] = np.searchsorted(edges, values[known], side="right")
+    return buckets
+
+
+def feature_matrix(leads: "pd.DataFrame", bins: int, deal_leads=()) -> Dict[str, np.ndarray]:
+    """Bucketed feature codes of every lead, by feature; `deal_leads` are the row indices of
+    leads with deal context."""
+    import pandas as pd
+    from langgraph_nodes.lead_research_node import company_key
+    features = {"seniority": seniority(leads.get("title", pd.Series("", index=leads.index)))}
+    # Leads of unknown companies are coded -1 and grouped by their other features
+    features["company"] = pd.factorize(pd.Series([company_key(lead) for lead in leads.to_dict("records")]))[0]
+    features["deals"] = leads.index.isin(list(deal_leads)).astype(int)
+    for column in CATEGORICAL_FEATURES:
+        values = leads[column] if column in leads.columns else pd.Series("", index=leads.index)
+        features[column] = pd.factorize(values.fillna("").astype(str).str.strip().str.lower())[0]
+    for column in NUMERIC_FEATURES:
+        if column in leads.columns:
+            values = pd.to_numeric(leads[column], errors="coerce").to_numpy(dtype=float)
+        else:
+            values = np.full(len(leads), np.nan)
+        features[column] = quantile_buckets(values, bins)
+    return features
+
+
+class Archetypes:
+    """Archetype of each lead of a batch per stage, and the stage outputs shared within an archetype."""
+
+    def __init__(self, leads: "pd.DataFrame", bins: int = None, deal_leads=()):
+        self.bins = DEFAULT_BINS if bins is None else bins
+        self.ids: Dict[str, Dict] = {}
+        if self.bins > 0 and len(leads):
+            features = feature_matrix(leads, self.bins, deal_leads)
+            for stage, names in STAGE_FEATURES.items():
+                matrix = np.column_stack([features[name] for name in names])
+                _, inverse = np.unique(matrix, axis=0, return_inverse=True)
+                self.ids[stage] = dict(zip(leads.index, inverse.reshape(-1).tolist()))
+        self._outputs: Dict[tuple, dict] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counts = {stage: {"runs": 0, "reused": 0} for stage in self.ids}
+
+    def key(self, stage: str, index) -> Optional[tuple]:
+        """Archetype of a lead (by its row index) for `stage`, or None if the stage runs per lead."""
+        ids = self.ids.get(stage)
+        if ids is None or index not in ids:
+            return None
+        return stage, ids[index]
+
+    def acquire(self, key: Optional[tuple]) -> Optional[dict]:
+        """Outputs of the archetype's run, or None: the caller then runs the stage and must
+        `put` (on success) and `release` the key. Waits while another lead's run is in progress."""
+        if key is None:
+            return None
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        lock.acquire()
+        outputs = self._outputs.get(key)
+        if outputs is not None:
+            lock.release()
+            with self._lock:
+                self._counts[key[0]]["reused"] += 1
+        return outputs
+
+    def put(self, key: Optional[tuple], result: dict):
+        if key is None:
+            return
+        with self._lock:
+            self._outputs[key] = {field: result.get(field) for field in STAGE_OUTPUTS[key[0]]}
+            self._counts[key[0]]["runs"] += 1
+
+    def release(self, key: Optional[tuple]):
+        if key is not None:
+            self._locks[key].release()
+
+    def apply(self, stage: str, state: dict, outputs: dict) -> dict:
+        """A lead's state after `stage`, with the archetype's outputs in place of an LLM call."""
+        from langgraph_nodes.lead_research_node import prepare_data
+        prepared = prepare_data(state)
+        if prepared.get("status") == "error":
+            return prepared
+        return {**prepared, **outputs, "status": "completed"}
+
+    def report(self) -> dict:
+        """Per-stage archetype counts and the LLM calls the fan-out saved."""
+        stages = {}
+        with self._lock:
+            for stage, ids in self.ids.items():
+                counts = self._counts[stage]
+                stages[stage] = {
+                    "leads": len(ids),
+                    "archetypes": len(set(ids.values())),
+                    "llm_runs": counts["runs"],
+                    "calls_saved": counts["reused"],
+                }
+        return {"bins": self.bins, "stages": stages, "calls_saved": sum(s["calls_saved"] for s in stages.values())}
@@ -2,15 +2,26 @@ import os
 import io
 import time
 import json
-import pandas as pd
 from datetime import datetime
-from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Form
+from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Form, Request, Query
 import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 
-# Import Ollama wrapper
-from api.agents import OllamaWrapper
+from api.cassette import LLMCassette, CASSETTE_FILENAME, CASSETTE_MODES
+from api.company_research import CompanyResearchCache
+from api.accounting import LeadAccount, aggregate_costs
+from api.search_index import LEAD_SEARCH_INDEX
+from api.priority_index import PRIORITY_INDEX
+from api.intel_views import ledger_status, materialize
+from api.intel_store import IntelStore
+from api.fingerprints import FINGERPRINT_KEY, OUTPUT_COLUMNS, lead_fingerprint, pipeline_version, stage_versions
+from api.stage_memo import StageMemo, PIPELINE_STAGES
+from api.responses import conditional_json, file_version
+from api.shared_state import get_state_store, update_json
+from api.lead_ordering import order_leads, DEFAULT_ORDERING, ORDERING_POLICIES
+from api.batch_control import (BatchCancelled, BatchControl, SlotPool, CANCELLED, PAUSED, RUNNING,
+                               get_control, set_control)
 
 # Import our LangGraph node compilers
 import sys
@@ -18,61 +29,152 @@ root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from langgraph_nodes.lead_research_node import create_lead_research_graph
-from langgraph_nodes.intent_qualifier_node import create_intent_qualifier_graph
-from langgraph_nodes.email_strategy_node import create_email_strategy_graph
-from langgraph_nodes.followup_timing_node import create_followup_timing_graph
-from langgraph_nodes.crm_logger_node import create_crm_logger_graph
+from utils.logger import get_logger, log_context
 
-from prompts.lead_research_prompts import lead_research_prompts
-from prompts.intent_qualifier_prompts import intent_qualifier_prompts
-from prompts.email_strategy_prompts import email_strategy_prompts
-from prompts.followup_timing_prompts import followup_timing_prompts
+logger = get_logger(__name__)
 
 router = APIRouter()
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 BATCHES_DIR = os.path.join(DATA_DIR, "batches")
+OUTPUTS_DIR = os.path.join(root_dir, "outputs")
 GLOBAL_LEADS_CSV = os.path.join(DATA_DIR, "Leads_Data.csv")
 
+LLM_MODEL = "minimax-m2.5:cloud"
+MAX_WORKERS = 5
+# Leads submitted to a batch's executor ahead of the ones running
+IN_FLIGHT_PER_WORKER = 2
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+# Delay before the worker starts so the UI can render the upload response
+UI_GRACE_SECONDS = 1
+# Minimum interval between rewrites of a running batch's Leads_Data.csv
+LEADS_SAVE_SECONDS = 2.0
+
 os.makedirs(BATCHES_DIR, exist_ok=True)
 
+# Concurrent pipeline stages across every batch this process runs, handed out by batch priority
+LLM_SLOTS = SlotPool(MAX_WORKERS)
+
+def _state_store():
+    return get_state_store(os.path.join(OUTPUTS_DIR, "state.db"))
+
+def _intel_store() -> IntelStore:
+    return IntelStore(OUTPUTS_DIR)
+
+def compile_pipeline(llm, company_cache=None, send_times=None):
+    """Compile the 5 independent LangGraph pipelines.
+
+    `company_cache` shares the research stage's company analyses between
+    leads of the same company (see api/company_research.py). `send_times`
+    predicts the timing stage from the email logs instead of the LLM (see
+    utils/send_time_model.py).
+
+    The node modules (and langgraph itself) are imported here rather than at
+    module load, so the API starts without them.
+    """
+    from langgraph_nodes.lead_research_node import create_lead_research_graph
+    from langgraph_nodes.intent_qualifier_node import create_intent_qualifier_graph
+    from langgraph_nodes.email_strategy_node import create_email_strategy_graph
+    from langgraph_nodes.followup_timing_node import create_followup_timing_graph
+    from langgraph_nodes.crm_logger_node import create_crm_logger_graph
+
+    from prompts.lead_research_prompts import lead_research_prompts
+    from prompts.intent_qualifier_prompts import intent_qualifier_prompts
+    from prompts.email_strategy_prompts import email_strategy_prompts
+    from prompts.followup_timing_prompts import followup_timing_prompts
+
+    return (
+        create_lead_research_graph(llm, lead_research_prompts, company_cache),
+        create_intent_qualifier_graph(llm, intent_qualifier_prompts),
+        create_email_strategy_graph(llm, email_strategy_prompts),
+        create_followup_timing_graph(llm, followup_timing_prompts, send_times),
+        create_crm_logger_graph(),
+    )
+
+def _initial_progress(batch_id: str) -> dict:
+    return {
+        "batch_id": batch_id,
+        "status": "processing",
+        "percent": 0,
+        "processed_count": 0,
+        "total_count": 0,
+        "agents": {
+            "research": "pending",
+            "intent": "pending",
+            "message": "pending",
+            "timing": "pending",
+            "logger": "pending"
+        }
+    }
+
+def _email_metadata(emails_file: str):
+    """Email_Logs.csv without the email bodies, which no pipeline stage reads"""
+    import pandas as pd
+    from utils.email_store import load_email_log
+    email_log = load_email_log(emails_file)
+    return email_log.meta if email_log is not None else pd.DataFrame()
+
+def _email_histories(emails_df) -> dict:
+    """Email history per lead, grouped once rather than filtered for every lead"""
+    if emails_df.empty or 'lead_id' not in emails_df.columns:
+        return {}
+    return {lead_id: group.to_dict('records') for lead_id, group in emails_df.groupby('lead_id', sort=False)}
+
+def _opportunities(batch_dir: str):
+    """Lead -> opportunity join index of the batch's Sales_Pipeline.csv and CRM_Pipeline.csv"""
+    from utils.opportunity_index import load_directory_index
+    return load_directory_index(batch_dir)
+
+def _deal_context(opportunities, lead_dict: dict):
+    return opportunities.context(lead_dict.get("lead_id", ""), lead_dict.get("company_id"))
+
+def _split_unchanged(df_to_process, email_histories: dict, opportunities, model_name: str, force: bool = False):
+    """Split leads into ones to run, (index, lead_dict, fingerprint), and ones whose
+    inputs, prompts and model are unchanged since their last run, (index, lead_id, lead_dict, prior)."""
+    version = pipeline_version(model_name)
+    store = _intel_store()
+    leads, reused = [], []
+    for index, row in df_to_process.iterrows():
+        # Columns this worker wrote back on a previous run are not inputs
+        lead_dict = row.dropna().drop(list(OUTPUT_COLUMNS), errors="ignore").to_dict()
+        lead_id = lead_dict.get("lead_id", "")
+        fingerprint = lead_fingerprint(lead_dict, email_histories.get(lead_id, []), version,
+                                       _deal_context(opportunities, lead_dict))
+        prior = store.get(lead_id)
+        if not force and prior is not None and prior.get(FINGERPRINT_KEY) == fingerprint:
+            reused.append((index, lead_id, lead_dict, prior))
+        else:
+            leads.append((index, lead_dict, fingerprint))
+    return leads, reused
+
+def _send_times(emails_file: str):
+    """Send-time model of the batch's Email_Logs.csv, refreshed as rows are appended"""
+    from utils.send_time_model import load_send_time_model
+    return load_send_time_model(emails_file)
+
+def _stage_memo(model_name: str) -> StageMemo:
+    return StageMemo(get_state_store(os.path.join(OUTPUTS_DIR, "stage_memo.db")), stage_versions(model_name))
+
+def _company_cache(model_name: str, refresh: bool = False) -> CompanyResearchCache:
+    return CompanyResearchCache(get_state_store(os.path.join(OUTPUTS_DIR, "stage_memo.db")),
+                                stage_versions(model_name)["research"], refresh=refresh)
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", type(llm).__name__)
+
 def update_batch_progress(batch_id: str, updates: dict):
-    """Helper to merge updates into the batch's _progress.json"""
-    batch_dir = os.path.join(BATCHES_DIR, batch_id)
-    progress_file = os.path.join(batch_dir, "_progress.json")
+    """Helper to merge updates into the batch's _progress.json (locked across worker processes)"""
+    progress_file = os.path.join(BATCHES_DIR, batch_id, "_progress.json")
     
-    if os.path.exists(progress_file):
-        with open(progress_file, "r") as f:
-            data = json.load(f)
-    else:
-        data = {
-            "batch_id": batch_id,
-            "status": "processing",
-            "percent": 0,
-            "processed_count": 0,
-            "total_count": 0,
-            "agents": {
-                "research": "pending",
-                "intent": "pending",
-                "message": "pending",
-                "timing": "pending",
-                "logger": "pending"
-            }
-        }
+    def merge(data):
+        for key, val in updates.items():
+            if key == "agents":
+                data["agents"].update(val)
+            else:
+                data[key] = val
     
-    for key, val in updates.items():
-        if key == "agents":
-            data["agents"].update(val)
-        else:
-            data[key] = val
-        
-    temp_file = progress_file + ".tmp"
-    with open(temp_file, "w") as f:
-        json.dump(data, f, indent=4)
-    os.replace(temp_file, progress_file)
+    update_json(progress_file, merge, default=lambda: _initial_progress(batch_id))
 
-@router.get("/{batch_id}/progress")
 def get_batch_progress(batch_id: str):
     progress_file = os.path.join(BATCHES_DIR, batch_id, "_progress.json")
     if not os.path.exists(progress_file):
@@ -80,13 +182,40 @@ def get_batch_progress(batch_id: str):
     with open(progress_file, "r") as f:
         return json.load(f)
 
-def process_batch_background(batch_id: str, start_index: int = None, end_index: int = None):
+@router.get("/{batch_id}/progress")
+def batch_progress(request: Request, batch_id: str):
+    """Batch progress; pollers that send back the ETag get a 304 until it moves."""
+    progress_file = os.path.join(BATCHES_DIR, batch_id, "_progress.json")
+    if not os.path.exists(progress_file):
+        raise HTTPException(status_code=404, detail="Batch progress not found")
+    version, last_modified = file_version([progress_file])
+    return conditional_json(request, version, lambda: get_batch_progress(batch_id), last_modified)
+
+def process_batch_background(batch_id: str, start_index: int = None, end_index: int = None, llm=None,
+                             cassette_mode: str = None, simulate_latency: bool = False, ordering: str = None,
+                             force: bool = False, archetype_bins: int = None):
     """
     Background worker that uses LangGraph to process each lead sequentially 
     through 5 AI agents, updating the CSV instantly so the UI can stream it.
+
+    `llm` may be any object exposing `generate_content(prompt)`; it defaults to
+    the Ollama backend and is overridden by the offline benchmarks.
+    `cassette_mode` ("off", "record" or "replay", default from the
+    LLM_CASSETTE_MODE env var) records every Ollama call of the batch to a
+    cassette, or serves a previous recording back with optional latency.
+    Recording implies `force`, so no call is answered from a cache instead.
+    `ordering` picks the lead processing order (see api/lead_ordering.py,
+    default from the BATCH_ORDERING env var).
+    Leads whose fingerprint (inputs, prompts and model) matches their stored
+    intel record keep their previous results unless `force` is set.
+    `archetype_bins` sets the archetype granularity (see api/archetypes.py,
+    default from the ARCHETYPE_BINS env var; 0 runs every lead separately).
     """
+    import pandas as pd
+    from api.archetypes import Archetypes
+    
     try:
-        time.sleep(1) # Give the UI a second to process the success response
+        time.sleep(UI_GRACE_SECONDS) # Give the UI a second to process the success response
         
         batch_dir = os.path.join(BATCHES_DIR, batch_id)
         leads_file = os.path.join(batch_dir, "Leads_Data.csv")
@@ -97,7 +226,7 @@ def process_batch_background(batch_id: str, start_index: int = None, end_index:
             return
             
         df = pd.read_csv(leads_file)
-        emails_df = pd.read_csv(emails_file) if os.path.exists(emails_file) else pd.DataFrame()
+        emails_df = _email_metadata(emails_file)
         
         # Apply range filtering if specified
         original_total = len(df)
@@ -111,15 +240,43 @@ def process_batch_background(batch_id: str, start_index: int = None, end_index:
         # Slice the dataframe to only process the requested leads
         df_to_process = df.iloc[start_idx:end_idx].copy()
         
+        # Highest-value leads first, so the top of the ledger fills early
+        opportunities = _opportunities(batch_dir)
+        order, value = order_leads(df_to_process, batch_dir, ordering, opportunities)
+        lead_value = dict(zip(df_to_process.index, value.tolist()))
+        value_total = float(value.sum())
+        df_to_process = df_to_process.iloc[order]
+        
         # Load the Ollama LLM
-        llm = OllamaWrapper('minimax-m2.5:cloud')
+        if llm is None:
+            cassette_mode = cassette_mode or os.getenv("LLM_CASSETTE_MODE", "off")
+            if cassette_mode not in CASSETTE_MODES:
+                raise ValueError(f"Unknown LLM cassette mode '{cassette_mode}'")
+            # A recording must see every LLM call: no memo, reused lead or cached company analysis
+            force = force or cassette_mode == "record"
+            cassette = None
+            if cassette_mode != "off":
+                cassette_path = os.path.join(batch_dir, CASSETTE_FILENAME)
+                if cassette_mode == "record" and os.path.exists(cassette_path):
+                    os.remove(cassette_path)  # Start a fresh recording
+                cassette = LLMCassette(cassette_path, cassette_mode, simulate_latency)
+            from api.llm import OllamaWrapper
+            llm = OllamaWrapper(LLM_MODEL, cassette=cassette)
         
         # Compile the 5 independent LangGraph pipelines
-        lead_research_agent = create_lead_research_graph(llm, lead_research_prompts)
-        intent_qualifier_agent = create_intent_qualifier_graph(llm, intent_qualifier_prompts)
-        email_strategy_agent = create_email_strategy_graph(llm, email_strategy_prompts)
-        followup_timing_agent = create_followup_timing_graph(llm, followup_timing_prompts)
-        crm_logger_agent = create_crm_logger_graph()
+        send_times = _send_times(emails_file)
+        pipeline = dict(zip(PIPELINE_STAGES, compile_pipeline(llm, _company_cache(_model_name(llm), force), send_times)))
+        # Stage results keyed by each stage's inputs and prompt version
+        memo = _stage_memo(_model_name(llm))
+        
+        # Split off the leads whose inputs, prompts and model are unchanged since their last run
+        intel_store = _intel_store()
+        email_histories = _email_histories(emails_df)
+        leads, reused = _split_unchanged(df_to_process, email_histories, opportunities, _model_name(llm), force)
+        # Leads sharing bucketed features share their research outputs
+        archetypes = Archetypes(df_to_process.loc[[index for index, _, _ in leads]], archetype_bins,
+                                {index for index, lead_dict, _ in leads
+                                 if _deal_context(opportunities, lead_dict) is not None})
         
         total = len(df_to_process)
         
@@ -127,103 +284,192 @@ def process_batch_background(batch_id: str, start_index: int = None, end_index:
             "percent": 0,
             "processed_count": 0,
             "total_count": total,
+            "start_index": start_idx,
+            "end_index": end_idx,
+            "ordering": ordering or DEFAULT_ORDERING,
+            "archetype_bins": archetypes.bins,
+            "value_total": round(value_total, 2),
+            "value_processed": 0,
+            "value_percent": 0,
+            "reused_count": len(reused),
+            "archetypes": archetypes.report(),
             "agents": { k: "running" for k in ["research", "intent", "message", "timing", "logger"] },
             "message": f"Processing subset of {total} leads (rows {start_idx} to {end_idx-1})" if total < original_total else f"Processing all {total} leads"
         })
         
+        # Cancel / pause / priority requests, checked between pipeline stages
+        control = BatchControl(_state_store(), batch_id, LLM_SLOTS)
+        
         # Stream analytics loop
         file_lock = threading.Lock()
         processed = 0
+        value_processed = 0.0
+        saved_at = time.monotonic()
+
+        def save_leads(final: bool = False):
+            # The ledger reads the intel store, so the CSV is rewritten on an interval, not per lead
+            nonlocal saved_at
+            if not final and time.monotonic() - saved_at < LEADS_SAVE_SECONDS:
+                return
+            temp_leads = leads_file + ".tmp"
+            df.to_csv(temp_leads, index=False)
+            os.replace(temp_leads, leads_file)
+            saved_at = time.monotonic()
 
-        def process_lead(index, row):
-            nonlocal processed
-            lead_dict = row.dropna().to_dict()
+        if reused:
+            # Carry the previous results over to this batch in one write
+            records = {}
+            for index, lead_id, lead_dict, prior in reused:
+                records[lead_id] = {
+                    **prior,
+                    "batch_id": batch_id,
+                    "reused_from_batch": prior.get("reused_from_batch") or prior.get("batch_id"),
+                    "accounting": LeadAccount().to_dict(),
+                }
+                df.at[index, "status"] = ledger_status(prior)
+                df.at[index, "intent_score"] = prior.get("intent_score", 0.0)
+                df.at[index, "subject"] = prior.get("subject", "")
+                df.at[index, "email_preview"] = prior.get("email_preview", "")
+                LEAD_SEARCH_INDEX.upsert(lead_id, lead_dict)
+            with PRIORITY_INDEX.writing(intel_store):
+                intel_store.put(batch_id, records)
+                for lead_id, record in records.items():
+                    PRIORITY_INDEX.upsert(lead_id, record)
+            save_leads(final=True)
+            
+            processed = len(reused)
+            value_processed = sum(lead_value[index] for index, *_ in reused)
+            update_batch_progress(batch_id, {
+                "percent": int((processed / total) * 100),
+                "processed_count": processed,
+                "value_processed": round(value_processed, 2),
+                "value_percent": int(value_processed / value_total * 100) if value_total else int((processed / total) * 100)
+            })
+            logger.info("Reusing previous results for %d of %d unchanged leads", len(reused), total)
+
+        def process_lead(index, lead_dict, fingerprint, submitted_at):
+            nonlocal processed, value_processed
+            account = LeadAccount(queue_wait_seconds=time.perf_counter() - submitted_at)
             lead_id = lead_dict.get("lead_id", "")
             
-            # Extract previous emails for this specific lead to give to the state
-            if not emails_df.empty and 'lead_id' in emails_df.columns:
-                email_history = emails_df[emails_df['lead_id'] == lead_id].to_dict('records')
-            else:
-                email_history = []
+            with log_context(batch_id=batch_id, lead_id=lead_id), account.active():
+                # Previous emails for this specific lead to give to the state
+                email_history = email_histories.get(lead_id, [])
                 
-            # Initialize unifying state
-            state = {
-                "lead": lead_dict,
-                "email_history": email_history
-            }
+                # Initialize unifying state
+                state = {
+                    "lead": lead_dict,
+                    "email_history": email_history
+                }
+                deal_context = _deal_context(opportunities, lead_dict)
+                if deal_context is not None:
+                    state["deal_context"] = deal_context
             
-            print(f"\\n[Processing] Lead {lead_id} ({lead_dict.get('company', 'Unknown')}) through LangGraph pipeline...")
+                logger.debug("Processing lead (%s) through LangGraph pipeline", lead_dict.get('company', 'Unknown'))
             
-            try:
-                # Node 1: Lead Research
-                state = lead_research_agent.invoke(state)
-                # Node 2: Intent Qualifier
-                state = intent_qualifier_agent.invoke(state)
-                # Node 3: Email Strategy 
-                state = email_strategy_agent.invoke(state)
-                # Node 4: Followup Timing
-                state = followup_timing_agent.invoke(state)
-                # Node 5: CRM Logger
-                state = crm_logger_agent.invoke(state)
-                
-                with file_lock:
-                    # Success! Extract the outputs into our dataframe for the frontend
-                    df.at[index, "status"] = "Ready"
-                    df.at[index, "intent_score"] = state.get("intent_score", 0.0)
-                    df.at[index, "subject"] = state.get("subject", "")
-                    df.at[index, "email_preview"] = state.get("email_preview", "")
+                try:
+                    # Research -> Intent -> Email Strategy -> Followup Timing -> CRM Logger
+                    for stage in PIPELINE_STAGES:
+                        key = memo.key(stage, state)
+                        cached = None if force else memo.get(stage, key)
+                        if cached is not None:
+                            # Same inputs and prompt as a previous run: reuse its output
+                            control.checkpoint()
+                            account.add_memo_hit(stage)
+                            state = {**state, **cached}
+                            continue
+                        archetype = archetypes.key(stage, index)
+                        shared = archetypes.acquire(archetype)
+                        if shared is not None:
+                            # Another lead of the same archetype already ran this stage
+                            control.checkpoint()
+                            account.add_archetype_hit(stage)
+                            state = archetypes.apply(stage, state, shared)
+                            continue
+                        try:
+                            with control.stage(), account.stage(stage):
+                                result = pipeline[stage].invoke(state)
+                            if result.get("status") != "error":
+                                archetypes.put(archetype, result)
+                        finally:
+                            archetypes.release(archetype)
+                        memo.put(stage, key, state, result)
+                        state = result
                     
-                    # Dump the full LangGraph state to an intel payload for the frontend /intel page
-                    outputs_dir = os.path.join(root_dir, "outputs")
-                    os.makedirs(outputs_dir, exist_ok=True)
+                    state["batch_id"] = batch_id
+                    state["accounting"] = account.to_dict()
+                    state[FINGERPRINT_KEY] = fingerprint
+                
+                    with file_lock:
+                        # Success! Extract the outputs into our dataframe for the frontend
+                        df.at[index, "status"] = "Ready"
+                        df.at[index, "intent_score"] = state.get("intent_score", 0.0)
+                        df.at[index, "subject"] = state.get("subject", "")
+                        df.at[index, "email_preview"] = state.get("email_preview", "")
                     
-                    intel_db_path = os.path.join(outputs_dir, "intel_db.json")
-                    intel_db = {}
-                    if os.path.exists(intel_db_path):
-                        try:
-                            with open(intel_db_path, "r") as f:
-                                intel_db = json.load(f)
-                        except json.JSONDecodeError:
-                            pass
+                        # Dump the full LangGraph state to an intel payload for the frontend /intel page
+                        os.makedirs(OUTPUTS_DIR, exist_ok=True)
                     
-                    intel_db[lead_id] = state
-                    temp_intel = intel_db_path + ".tmp"
-                    with open(temp_intel, "w") as f:
-                        json.dump(intel_db, f, indent=4)
-                    os.replace(temp_intel, intel_db_path)
-                        
-                    # Stream this row instantly to the Ledger
-                    temp_leads = leads_file + ".tmp"
-                    df.to_csv(temp_leads, index=False)
-                    os.replace(temp_leads, leads_file)
+                        # Journaled, not a partition rewrite; folded in once the batch ends
+                        with PRIORITY_INDEX.writing(intel_store):
+                            intel_store.append(batch_id, {lead_id: materialize(lead_id, state)})
+                            PRIORITY_INDEX.upsert(lead_id, state)
+                        LEAD_SEARCH_INDEX.upsert(lead_id, lead_dict)
+                        save_leads()
                 
-            except Exception as e:
-                print(f"Error processing lead {lead_id}: {e}")
-                with file_lock:
-                    df.at[index, "status"] = "Error"
-                    temp_leads = leads_file + ".tmp"
-                    df.to_csv(temp_leads, index=False)
-                    os.replace(temp_leads, leads_file)
+                except BatchCancelled:
+                    logger.debug("Batch cancelled; dropping lead")
+                    return
+                except Exception as e:
+                    logger.error("Error processing lead %s: %s (accounting: %s)", lead_id, e, account.to_dict())
+                    with file_lock:
+                        df.at[index, "status"] = "Error"
+                        save_leads()
                 
-            with file_lock:
-                # Tick progress
-                processed += 1
-                percent = int((processed / total) * 100)
-                update_batch_progress(batch_id, {
-                    "percent": percent,
-                    "processed_count": processed,
-                    "total_count": total
-                })
-
-        # Process all leads concurrently using worker threads
-        # Set max_workers=2 to balance parallel execution without overloading the local Ollama instance & locking up the system CPU.
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(process_lead, index, row) for index, row in df_to_process.iterrows()]
-            for future in as_completed(futures):
+                with file_lock:
+                    # Tick progress
+                    processed += 1
+                    value_processed += lead_value[index]
+                    percent = int((processed / total) * 100)
+                    update_batch_progress(batch_id, {
+                        "percent": percent,
+                        "processed_count": processed,
+                        "total_count": total,
+                        "value_processed": round(value_processed, 2),
+                        "value_percent": int(value_processed / value_total * 100) if value_total else percent
+                    })
+
+        def collect(futures):
+            for future in futures:
                 try:
                     future.result()
                 except Exception as e:
-                    print(f"Future execution error: {e}")
+                    logger.error("Future execution error: %s", e)
+
+        # Process leads concurrently using worker threads. Leads are submitted
+        # lazily through a bounded window, so a cancelled batch stops at once
+        # instead of leaving thousands of queued futures behind.
+        window = MAX_WORKERS * IN_FLIGHT_PER_WORKER
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            in_flight = set()
+            for index, lead_dict, fingerprint in leads:
+                if control.cancelled:
+                    break
+                if len(in_flight) >= window:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(executor.submit(process_lead, index, lead_dict, fingerprint, time.perf_counter()))
+            collect(as_completed(in_flight))
+        save_leads(final=True)
+        
+        if control.cancelled:
+            update_batch_progress(batch_id, {
+                "status": "cancelled",
+                "archetypes": archetypes.report(),
+                "agents": { k: "cancelled" for k in ["research", "intent", "message", "timing", "logger"] }
+            })
+            logger.info("Batch %s cancelled after %d of %d leads.", batch_id, processed, total)
+            return
             
         # Finish
         update_batch_progress(batch_id, {
@@ -231,13 +477,21 @@ def process_batch_background(batch_id: str, start_index: int = None, end_index:
             "percent": 100,
             "processed_count": total,
             "total_count": total,
+            "value_processed": round(value_total, 2),
+            "value_percent": 100,
+            "archetypes": archetypes.report(),
             "agents": { k: "completed" for k in ["research", "intent", "message", "timing", "logger"] }
         })
-        print(f"Batch {batch_id} fully processed through LangGraph and synced to global Ledger mapping.")
+        logger.info("Batch %s fully processed through LangGraph and synced to global Ledger mapping.", batch_id)
                 
     except Exception as e:
-        print(f"Error during Background Batch processing: {e}")
+        logger.exception("Error during Background Batch processing: %s", e)
         update_batch_progress(batch_id, { "status": "failed", "percent": 0 })
+    finally:
+        # Merge the leads journaled by this run into the batch's partition in one write
+        store = _intel_store()
+        with PRIORITY_INDEX.writing(store):
+            store.fold(batch_id)
 
 @router.post("/upload")
 async def upload_batch(
@@ -249,9 +503,18 @@ async def upload_batch(
     sales_pipeline: UploadFile = File(...),
     start_index: int = Form(None),
     end_index: int = Form(None),
+    priority: int = Form(0),
+    ordering: str = Form(None),
+    force: bool = Form(False),
+    archetype_bins: int = Form(None),
 ):
+    if ordering is not None and ordering not in ORDERING_POLICIES:
+        raise HTTPException(status_code=400, detail=f"ordering must be one of {ORDERING_POLICIES}")
+    if archetype_bins is not None and archetype_bins < 0:
+        raise HTTPException(status_code=400, detail="archetype_bins must be 0 (off) or a positive bucket count")
     try:
         import uuid
+        import pandas as pd
         date_str = datetime.now().strftime("%Y_%m_%d")
         short_id = str(uuid.uuid4())[:8].upper()
         batch_id = f"BATCH_{date_str}_{short_id}"
@@ -272,9 +535,11 @@ async def upload_batch(
         await save_file(leads_data, "Leads_Data.csv")
         await save_file(sales_pipeline, "Sales_Pipeline.csv")
         
-        update_batch_progress(batch_id, { "percent": 0 })
+        update_batch_progress(batch_id, { "percent": 0, "priority": priority })
+        set_control(_state_store(), batch_id, state=RUNNING, priority=priority)
         
-        background_tasks.add_task(process_batch_background, batch_id, start_index, end_index)
+        background_tasks.add_task(process_batch_background, batch_id, start_index, end_index,
+                                  ordering=ordering, force=force, archetype_bins=archetype_bins)
         
         return {
             "batch_id": batch_id,
@@ -284,3 +549,144 @@ async def upload_batch(
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch upload rejected: {str(e)}")
+
+@router.post("/{batch_id}/replay")
+def replay_batch(batch_id: str, background_tasks: BackgroundTasks, simulate_latency: bool = False):
+    """Re-run a batch offline against the LLM cassette recorded for it."""
+    batch_dir = os.path.join(BATCHES_DIR, batch_id)
+    if not os.path.exists(os.path.join(batch_dir, "Leads_Data.csv")):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if not os.path.exists(os.path.join(batch_dir, CASSETTE_FILENAME)):
+        raise HTTPException(status_code=404, detail="No LLM cassette recorded for this batch")
+    
+    # Replay the same lead range the recording covered
+    progress_file = os.path.join(batch_dir, "_progress.json")
+    start_index = end_index = ordering = archetype_bins = None
+    if os.path.exists(progress_file):
+        with open(progress_file, "r") as f:
+            previous = json.load(f)
+        start_index, end_index = previous.get("start_index"), previous.get("end_index")
+        ordering = previous.get("ordering")
+        archetype_bins = previous.get("archetype_bins")
+    
+    update_batch_progress(batch_id, { "status": "processing", "percent": 0, "processed_count": 0 })
+    set_control(_state_store(), batch_id, state=RUNNING)
+    background_tasks.add_task(
+        process_batch_background, batch_id, start_index, end_index,
+        cassette_mode="replay", simulate_latency=simulate_latency, ordering=ordering, force=True,
+        archetype_bins=archetype_bins
+    )
+    return {
+        "batch_id": batch_id,
+        "status": "processing",
+        "mode": "replay"
+    }
+
+
+def _control_batch(batch_id: str, progress_status: str = None, **updates):
+    """Apply a control request to an unfinished batch and mirror it in its progress."""
+    progress = get_batch_progress(batch_id)
+    if progress.get("status") in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Batch already {progress['status']}")
+    store = _state_store()
+    if get_control(store, batch_id)["state"] == CANCELLED:
+        raise HTTPException(status_code=409, detail="Batch is being cancelled")
+    control = set_control(store, batch_id, **updates)
+    update_batch_progress(batch_id, {"priority": control["priority"],
+                                     **({"status": progress_status} if progress_status else {})})
+    return {"batch_id": batch_id, **control}
+
+@router.post("/{batch_id}/cancel")
+def cancel_batch(batch_id: str):
+    """Stop a batch: no new leads start, running ones stop at their next stage."""
+    return _control_batch(batch_id, "cancelling", state=CANCELLED)
+
+@router.post("/{batch_id}/pause")
+def pause_batch(batch_id: str):
+    """Hold a batch at its next stage boundaries, releasing its LLM slots to other batches."""
+    return _control_batch(batch_id, "paused", state=PAUSED)
+
+@router.post("/{batch_id}/resume")
+def resume_batch(batch_id: str):
+    return _control_batch(batch_id, "processing", state=RUNNING)
+
+@router.post("/{batch_id}/priority")
+def set_batch_priority(batch_id: str, priority: int = Query(...)):
+    """Change a batch's priority; higher-priority batches get freed LLM slots first."""
+    return _control_batch(batch_id, priority=priority)
+
+
+@router.get("/{batch_id}/plan")
+def plan_batch(batch_id: str, force: bool = False, model: str = LLM_MODEL):
+    """Dry run of reprocessing a batch: how many leads and stage runs (LLM calls) it would take.
+
+    Unchanged leads are reused whole; for the rest each stage is looked up in
+    the stage memo. Stage counts are an upper bound (see StageMemo.plan).
+    """
+    import pandas as pd
+    
+    batch_dir = os.path.join(BATCHES_DIR, batch_id)
+    leads_file = os.path.join(batch_dir, "Leads_Data.csv")
+    if not os.path.exists(leads_file):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    emails_file = os.path.join(batch_dir, "Email_Logs.csv")
+    df = pd.read_csv(leads_file)
+    emails_df = _email_metadata(emails_file)
+    
+    # Same lead range as the batch's last run
+    progress_file = os.path.join(batch_dir, "_progress.json")
+    start_index = end_index = None
+    if os.path.exists(progress_file):
+        progress = get_batch_progress(batch_id)
+        start_index, end_index = progress.get("start_index"), progress.get("end_index")
+    df = df.iloc[start_index or 0:end_index or len(df)]
+    
+    email_histories = _email_histories(emails_df)
+    opportunities = _opportunities(batch_dir)
+    leads, reused = _split_unchanged(df, email_histories, opportunities, model, force)
+    states = (
+        {"lead": lead_dict, "email_history": email_histories.get(lead_dict.get("lead_id", ""), []),
+         "deal_context": _deal_context(opportunities, lead_dict)}
+        for _, lead_dict, _ in leads
+    )
+    stages = _stage_memo(model).plan(states, force)
+    return {
+        "batch_id": batch_id,
+        "model": model,
+        "leads": len(df),
+        "reused_leads": len(reused),
+        "leads_to_run": len(leads),
+        "stages": stages,
+        "llm_calls": sum(s["llm_calls"] for s in stages.values()),
+    }
+
+
+@router.get("/{batch_id}/cost")
+def get_batch_cost(batch_id: str, top: int = 10):
+    """Aggregate per-lead LLM usage and stage latency of a batch by region, lead_source and stage."""
+    try:
+        records = _intel_store().records(batch_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+    
+    if not records:
+        raise HTTPException(status_code=404, detail="No accounting recorded for this batch")
+    
+    return {
+        "batch_id": batch_id,
+        **aggregate_costs(records, top_n=top)
+    }
+
+
+@router.post("/{batch_id}/compact")
+def compact_batch(batch_id: str):
+    """Rewrite a finished batch's intel partition in the read-optimized format."""
+    progress_file = os.path.join(BATCHES_DIR, batch_id, "_progress.json")
+    if os.path.exists(progress_file) and get_batch_progress(batch_id).get("status") not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail="Batch is still running")
+    try:
+        return _intel_store().compact(batch_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No intel records for this batch")
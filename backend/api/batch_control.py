@@ -0,0 +1,127 @@
+"""
+Cooperative control of running batches: cancel, pause/resume and priority.
+
+The requested state of each batch lives in the shared StateStore (see
+api/shared_state.py), so a request handled by any API worker reaches the
+process running the batch. Lead workers call `BatchControl.stage()` around
+every pipeline stage:
+
+- a cancelled batch raises `BatchCancelled` at the next stage boundary,
+- a paused batch blocks there until it is resumed (or cancelled),
+- each stage runs holding one slot of the process-wide `SlotPool`, which
+  caps concurrent LLM work across all batches and hands freed slots to the
+  highest-priority waiter first. Slots are released between stages, so a
+  paused, cancelled or deprioritized batch gives its capacity up right away.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+RUNNING, PAUSED, CANCELLED = "running", "paused", "cancelled"
+CONTROL_NAMESPACE = "batch_control"
+# How often workers re-read the control state (also the pause/cancel latency)
+POLL_SECONDS = 0.25
+DEFAULT_CONTROL = {"state": RUNNING, "priority": 0}
+
+
+class BatchCancelled(Exception):
+    pass
+
+
+class SlotPool:
+    """Counting semaphore whose waiters are served by priority (higher first), then FIFO."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._free = size
+        self._waiting = []  # sorted (-priority, ticket)
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int = 0, should_abort=None, poll_seconds: float = POLL_SECONDS) -> bool:
+        """Take a slot; returns False (without one) if `should_abort()` turns true while waiting."""
+        entry = (-priority, next(self._tickets))
+        with self._cond:
+            bisect.insort(self._waiting, entry)
+            try:
+                while not (self._free and self._waiting[0] == entry):
+                    if should_abort is not None and should_abort():
+                        return False
+                    self._cond.wait(poll_seconds)
+                self._free -= 1
+                return True
+            finally:
+                self._waiting.remove(entry)
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+    def in_use(self) -> int:
+        with self._cond:
+            return self.size - self._free
+
+
+class BatchControl:
+    """Read side of one batch's control state, as seen by its lead workers."""
+
+    def __init__(self, store, batch_id: str, pool: SlotPool, poll_seconds: float = POLL_SECONDS):
+        self.store = store
+        self.batch_id = batch_id
+        self.pool = pool
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._cached = None
+        self._read_at = 0.0
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            if self._cached is None or now - self._read_at >= self.poll_seconds:
+                self._cached = get_control(self.store, self.batch_id)
+                self._read_at = now
+            return self._cached
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state()["state"] == CANCELLED
+
+    def checkpoint(self) -> int:
+        """Block while paused, raise if cancelled; returns the batch's current priority."""
+        while True:
+            control = self.state()
+            if control["state"] == CANCELLED:
+                raise BatchCancelled(self.batch_id)
+            if control["state"] != PAUSED:
+                return int(control.get("priority", 0))
+            time.sleep(self.poll_seconds)
+
+    @contextmanager
+    def stage(self):
+        while True:
+            priority = self.checkpoint()
+            def changed():
+                # Give up the place in line if the batch is paused, cancelled or reprioritized meanwhile
+                control = self.state()
+                return control["state"] != RUNNING or int(control["priority"]) != priority
+
+            if self.pool.acquire(priority, should_abort=changed, poll_seconds=self.poll_seconds):
+                break
+        try:
+            yield
+        finally:
+            self.pool.release()
+
+
+def get_control(store, batch_id: str) -> dict:
+    return {**DEFAULT_CONTROL, **store.get(CONTROL_NAMESPACE, batch_id, {})}
+
+
+def set_control(store, batch_id: str, **updates) -> dict:
+    """Merge `updates` (state and/or priority) into a batch's control record."""
+    return {**DEFAULT_CONTROL, **store.merge(CONTROL_NAMESPACE, batch_id, updates)}
@@ -0,0 +1,77 @@
+"""
+LLM cassette — record and replay LLM calls.
+
+A cassette is a gzip-compressed JSON-lines file holding one entry per call:
+the (model, prompt) key hash, the raw response text and the observed latency.
+Recording a batch once lets it be re-run deterministically, without paying
+for the LLM again.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional, Tuple
+
+CASSETTE_FILENAME = "_llm_cassette.jsonl.gz"
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+def cassette_key(model: str, prompt: str) -> str:
+    return hashlib.sha1(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class LLMCassette:
+    """Thread-safe cassette shared by every LLM call of one batch."""
+
+    def __init__(self, path: str, mode: str = "record", simulate_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', got '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = defaultdict(deque)
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No cassette recorded at {self.path}")
+        for entry in self.entries():
+            self._entries[entry["k"]].append((entry["r"], entry.get("l", 0.0)))
+
+    def entries(self):
+        """Iterate over every recorded entry in call order."""
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def record(self, model: str, prompt: str, response: str, latency: float):
+        entry = {"k": cassette_key(model, prompt), "m": model, "r": response, "l": round(latency, 4)}
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            # One gzip member per call keeps the file readable if the batch dies mid-run
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    def replay(self, model: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return the next recorded (response, latency) for this call, or None."""
+        key = cassette_key(model, prompt)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Identical prompts replay in recorded order; the last answer repeats
+            response, latency = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self.simulate_latency and latency > 0:
+            time.sleep(latency)
+        return response, latency
@@ -0,0 +1,82 @@
+"""
+Company-level research shared by every lead at the same account.
+
+The research stage splits into a company analysis (industry, fit, segment)
+and a short per-contact prompt that reuses it. Company analyses are cached
+in a StateStore per normalized company and research prompt version, and
+expire after COMPANY_RESEARCH_TTL_HOURS, so an account with 40 contacts pays
+for one company analysis instead of 40.
+
+Concurrent leads of the same company in one process wait for the first one's
+analysis instead of each asking the LLM. Every lookup is charged to the
+active lead's accounting as a company hit or miss.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from api.accounting import record_company_lookup
+from api.fingerprints import digest
+
+NAMESPACE = "company_research"
+DEFAULT_TTL_HOURS = 24 * 7
+
+
+class CompanyResearchCache:
+    def __init__(self, store, version: str, ttl_seconds: Optional[float] = None, refresh: bool = False):
+        self.store = store
+        self.version = version
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("COMPANY_RESEARCH_TTL_HOURS", DEFAULT_TTL_HOURS)) * 3600
+        self.ttl_seconds = ttl_seconds
+        # Analyze every company again once (forced reruns), then share the new analysis
+        self.refresh = refresh
+        self._refreshed = set()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _key(self, company_key: str) -> str:
+        return digest({"version": self.version, "company": company_key})
+
+    def get(self, company_key: str) -> Optional[dict]:
+        """The cached analysis of a company, unless it is missing or older than the TTL."""
+        entry = self.store.get(NAMESPACE, self._key(company_key))
+        if entry is None or time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            return None
+        return entry["analysis"]
+
+    def _cached(self, company_key: str) -> Optional[dict]:
+        if self.refresh and company_key not in self._refreshed:
+            return None
+        return self.get(company_key)
+
+    def put(self, company_key: str, analysis: dict):
+        self.store.set(NAMESPACE, self._key(company_key), {
+            "company": company_key,
+            "created_at": time.time(),
+            "analysis": analysis,
+        })
+
+    def _lock(self, company_key: str) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._locks.get(company_key)
+            if lock is None:
+                lock = self._locks[company_key] = threading.Lock()
+            return lock
+
+    def get_or_compute(self, company_key: str, compute: Callable[[], dict]) -> Tuple[dict, bool]:
+        """(analysis, hit): the cached analysis, or the one `compute()` produces (and caches)."""
+        analysis = self._cached(company_key)
+        if analysis is None:
+            with self._lock(company_key):
+                analysis = self._cached(company_key)
+                if analysis is None:
+                    record_company_lookup(False)
+                    analysis = compute()
+                    self.put(company_key, analysis)
+                    self._refreshed.add(company_key)
+                    return analysis, False
+        record_company_lookup(True)
+        return analysis, True
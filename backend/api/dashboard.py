@@ -4,20 +4,34 @@ Dashboard API — Aggregated stats and activity feed.
 
 import os
 import json
-import pandas as pd
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request
 from datetime import datetime, timedelta
 import random
 
+from api.intel_store import IntelStore
+from api.priority_index import PRIORITY_INDEX
+from api.responses import conditional_json, file_version
+
 router = APIRouter()
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 OUTPUTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "outputs")
 
 
+def _data_version(*filenames):
+    return file_version([os.path.join(DATA_DIR, name) for name in filenames])
+
+
 @router.get("/stats")
-def dashboard_stats():
+def dashboard_stats(request: Request):
     """Get KPI card data for the dashboard."""
+    version, last_modified = _data_version("Leads_Data.csv", "Sales_Pipeline.csv", "Email_Logs.csv")
+    return conditional_json(request, version, _compute_stats, last_modified)
+
+
+def _compute_stats():
+    import pandas as pd
+
     stats = {
         "total_leads": 0,
         "conversion_rate": 0,
@@ -46,7 +60,8 @@ def dashboard_stats():
     # Email stats
     email_path = os.path.join(DATA_DIR, "Email_Logs.csv")
     if os.path.exists(email_path):
-        df = pd.read_csv(email_path)
+        from utils.email_store import load_email_log
+        df = load_email_log(email_path).meta
         stats["emails_sent"] = len(df)
         if "opened" in df.columns:
             stats["response_rate"] = round(float(df["opened"].mean()) * 100, 1)
@@ -130,8 +145,15 @@ def dashboard_activity():
 
 
 @router.get("/pipeline")
-def dashboard_pipeline():
+def dashboard_pipeline(request: Request):
     """Get sales pipeline breakdown."""
+    version, last_modified = _data_version("Sales_Pipeline.csv")
+    return conditional_json(request, version, _compute_pipeline, last_modified)
+
+
+def _compute_pipeline():
+    import pandas as pd
+
     pipeline_path = os.path.join(DATA_DIR, "Sales_Pipeline.csv")
     if not os.path.exists(pipeline_path):
         return {"stages": []}
@@ -153,52 +175,13 @@ def dashboard_pipeline():
 
 
 @router.get("/priority-targets")
-def priority_targets():
-    """Get top priority leads for the dashboard."""
-    leads_path = os.path.join(DATA_DIR, "Leads_Data.csv")
-    if not os.path.exists(leads_path):
-        return {"targets": []}
-
-    df = pd.read_csv(leads_path)
-    df = df.loc[:, ~df.columns.str.startswith("Unnamed")]
+def priority_targets(request: Request, limit: int = Query(6, ge=1, le=50)):
+    """Get the top priority leads for the dashboard, scored from their intel records."""
+    store = IntelStore(OUTPUTS_DIR)
+    version, last_modified = store.version()
 
-    # Pick leads with high activity as priority targets
-    score_cols = []
-    if "time_on_site" in df.columns:
-        score_cols.append("time_on_site")
-    if "pages_per_visit" in df.columns:
-        score_cols.append("pages_per_visit")
-    if "visits" in df.columns:
-        score_cols.append("visits")
-
-    if score_cols:
-        for col in score_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-        df["_score"] = df[score_cols].sum(axis=1)
-        df = df.sort_values("_score", ascending=False)
-
-    top = df.head(6)
-    records = json.loads(top.to_json(orient="records"))
-
-    # Enrich with fake signals for the dashboard display
-    signals = [
-        "Viewed pricing page 4x in last 24h",
-        "Downloaded Q3 whitepaper",
-        "LinkedIn connection accepted",
-        "Attended product webinar",
-        "Opened 3 emails this week",
-        "Visited case studies section",
-    ]
-
-    targets = []
-    for i, rec in enumerate(records):
-        targets.append({
-            "index": i,
-            "name": rec.get("name", f"Lead {i}"),
-            "title": rec.get("title", "Unknown"),
-            "company": rec.get("company", "Unknown"),
-            "region": rec.get("region", ""),
-            "signal": signals[i % len(signals)],
-        })
+    def build():
+        PRIORITY_INDEX.ensure(version, store.latest_records)
+        return {"targets": PRIORITY_INDEX.top(limit)}
 
-    return {"targets": targets}
+    return conditional_json(request, version, build, last_modified)
@@ -0,0 +1,79 @@
+"""
+Input fingerprints for incremental batch reprocessing.
+
+A lead's fingerprint hashes everything its pipeline output depends on: the
+normalized lead row, its email history slice, its deal context from the
+sales and CRM pipelines and the pipeline version (the prompt templates plus
+the model name). It is stored on the intel record;
+when a batch is re-uploaded, leads whose fingerprint matches their stored
+record keep their previous results instead of going through the LLM again.
+"""
+
+import hashlib
+import json
+import math
+
+FINGERPRINT_KEY = "fingerprint"
+# Bump to invalidate every stored fingerprint after a change to the node code
+PIPELINE_REVISION = 2
+# Columns the batch worker writes back into the batch's Leads_Data.csv
+OUTPUT_COLUMNS = ("status", "intent_score", "subject", "email_preview")
+
+
+def digest(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _normalize(value):
+    """Canonical form of a CSV cell, so re-exports that only change formatting hash the same."""
+    if hasattr(value, "item"):  # numpy scalar
+        value = value.item()
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _normalize_row(row: dict) -> dict:
+    normalized = {str(k).strip(): _normalize(v) for k, v in row.items()}
+    return {k: v for k, v in normalized.items() if v is not None and v != ""}
+
+
+def stage_versions(model_name: str) -> dict:
+    """Per-stage hash of the stage's prompt templates, the node revision and the model."""
+    from prompts.lead_research_prompts import lead_research_prompts
+    from prompts.intent_qualifier_prompts import intent_qualifier_prompts
+    from prompts.email_strategy_prompts import email_strategy_prompts
+    from prompts.followup_timing_prompts import followup_timing_prompts
+
+    prompts = {
+        "research": lead_research_prompts,
+        "intent": intent_qualifier_prompts,
+        "message": email_strategy_prompts,
+        "timing": followup_timing_prompts,
+        "logger": None,
+    }
+    return {
+        stage: digest({"prompts": templates, "revision": PIPELINE_REVISION, "model": model_name})
+        for stage, templates in prompts.items()
+    }
+
+
+def pipeline_version(model_name: str) -> str:
+    """Hash of the prompt templates, node revision and model the whole pipeline runs with."""
+    return digest(stage_versions(model_name))
+
+
+def lead_fingerprint(lead: dict, email_history: list, version: str, deal_context: dict = None) -> str:
+    inputs = {k: v for k, v in lead.items() if k not in OUTPUT_COLUMNS}
+    emails = [_normalize_row(e) for e in email_history]
+    payload = {"lead": _normalize_row(inputs), "emails": emails, "version": version}
+    if deal_context:
+        # Only leads with pipeline opportunities hash them, so the others keep their fingerprints
+        payload["deals"] = deal_context
+    return digest(payload)
@@ -0,0 +1,363 @@
+"""
+Intel records partitioned by batch.
+
+Every batch writes its leads' pipeline states to its own partition,
+`outputs/intel/<batch_id>.json`, and `outputs/intel/_latest.json` maps each
+lead to the batch that wrote it last. Ledger queries for one batch only
+parse that batch's partition; the cross-batch view (what the single
+intel_db.json used to hold) takes every lead from its latest batch.
+
+A running batch appends each lead's record to a journal,
+`outputs/intel/<batch_id>.jsonl`, instead of rewriting the partition and
+`_latest.json` per lead; reads overlay the journal on the partition, and
+`fold` merges it into both files once when the batch ends (or before it is
+compacted).
+
+A finished batch can be compacted into a read-optimized pair of files:
+`<batch_id>.records` (the records' JSON back to back) and
+`<batch_id>.index.json` (the flat ledger rows plus each record's offset and
+length), so listing its leads never parses the records and fetching one
+record reads only its bytes. Writing to a compacted batch again (a replay)
+turns it back into a plain partition first.
+
+An existing outputs/intel_db.json is split into partitions by each record's
+batch_id the first time the store is used.
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from api.intel_views import ledger_status, load_intel_db
+from api.responses import file_version, parse_file_version
+from api.shared_state import locked, update_json, write_json_atomic
+
+INTEL_DIR = "intel"
+LATEST_FILE = "_latest.json"
+LEGACY_DB = "intel_db.json"
+# Partition for records of a legacy intel_db.json that carry no batch_id
+LEGACY_BATCH = "legacy"
+PARTITION_SUFFIX = ".json"
+RECORDS_SUFFIX = ".records"
+COMPACT_INDEX_SUFFIX = ".index.json"
+JOURNAL_SUFFIX = ".jsonl"
+
+
+def ledger_row(lead_id: str, record: dict) -> dict:
+    """Flat ledger row of an intel record."""
+    lead_info = record.get("lead", {})
+    return {
+        "lead_id": lead_id,
+        "name": lead_info.get("name", "Unknown"),
+        "company": lead_info.get("company", "Unknown"),
+        "title": lead_info.get("title", "Unknown"),
+        "region": lead_info.get("region", "Unknown"),
+        "lead_source": lead_info.get("lead_source", "Unknown"),
+        "visits": lead_info.get("visits", 0),
+        "time_on_site": lead_info.get("time_on_site", 0.0),
+        "pages_per_visit": lead_info.get("pages_per_visit", 0.0),
+        "converted": lead_info.get("converted", False),
+        "intent_score": record.get("intent_score", 0),
+        "status": ledger_status(record),
+        "record_id": lead_id
+    }
+
+
+class IntelStore:
+    def __init__(self, outputs_dir: str):
+        self.dir = os.path.join(outputs_dir, INTEL_DIR)
+        self.latest_path = os.path.join(self.dir, LATEST_FILE)
+        self.legacy_path = os.path.join(outputs_dir, LEGACY_DB)
+        self._migrate()
+
+    # Paths
+
+    def _path(self, batch_id: str, suffix: str = PARTITION_SUFFIX) -> str:
+        batch_id = str(batch_id)
+        if not batch_id or os.path.basename(batch_id) != batch_id or batch_id[0] in "._":
+            raise ValueError(f"Invalid batch id '{batch_id}'")
+        return os.path.join(self.dir, batch_id + suffix)
+
+    def _files(self, batch_id: str) -> List[str]:
+        return [self._path(batch_id), self._path(batch_id, COMPACT_INDEX_SUFFIX), self._path(batch_id, JOURNAL_SUFFIX)]
+
+    def is_compacted(self, batch_id: str) -> bool:
+        return not os.path.exists(self._path(batch_id)) and os.path.exists(self._path(batch_id, COMPACT_INDEX_SUFFIX))
+
+    def batches(self) -> List[str]:
+        """Batch ids with a partition, plain, compacted or still journaled."""
+        try:
+            names = os.listdir(self.dir)
+        except OSError:
+            return []
+        batches = set()
+        for name in names:
+            for suffix in (COMPACT_INDEX_SUFFIX, JOURNAL_SUFFIX, PARTITION_SUFFIX):
+                if name.endswith(suffix) and not name.startswith(("_", ".")):
+                    batches.add(name[:-len(suffix)])
+                    break
+        return sorted(batches)
+
+    def version(self, batch_id: Optional[str] = None) -> Tuple[str, Optional[float]]:
+        """Data version of one partition, or of the cross-batch view."""
+        if batch_id is not None:
+            return file_version(self._files(batch_id))
+        paths = [self.latest_path]
+        for batch in self.batches():
+            paths.extend(self._files(batch))
+        return file_version(paths)
+
+    # Reads
+
+    def _journals(self) -> List[str]:
+        """Batches with an unfolded journal, oldest write first."""
+        journals = []
+        for batch in self.batches():
+            try:
+                journals.append((os.path.getmtime(self._path(batch, JOURNAL_SUFFIX)), batch))
+            except OSError:
+                pass
+        return [batch for _, batch in sorted(journals)]
+
+    def _read_journal(self, batch_id: str) -> Dict[str, dict]:
+        """Records appended by a running batch; a lead's last line wins."""
+        records = {}
+        try:
+            with open(self._path(batch_id, JOURNAL_SUFFIX), "rb") as f:
+                for line in f:
+                    # A torn last line (a crash mid-append) is dropped
+                    try:
+                        lead_id, record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[lead_id] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def latest(self) -> Dict[str, str]:
+        """lead_id -> id of the batch that wrote the lead last."""
+        latest = load_intel_db(self.latest_path)
+        for batch in self._journals():
+            latest.update(dict.fromkeys(self._read_journal(batch), batch))
+        return latest
+
+    def records(self, batch_id: str) -> dict:
+        """All records of one batch; callers must not mutate the result."""
+        if self.is_compacted(batch_id):
+            records = self._read_compacted(batch_id)
+        else:
+            records = load_intel_db(self._path(batch_id))
+        journal = self._read_journal(batch_id)
+        if journal:
+            records = {**records, **journal}
+        return records
+
+    def get(self, lead_id: str, batch_id: Optional[str] = None) -> Optional[dict]:
+        """A lead's record in `batch_id`, or in its latest batch."""
+        batch_id = batch_id or self.latest().get(lead_id)
+        if batch_id is None:
+            return None
+        journaled = self._read_journal(batch_id).get(lead_id)
+        if journaled is not None:
+            return journaled
+        if not self.is_compacted(batch_id):
+            return load_intel_db(self._path(batch_id)).get(lead_id)
+        span = load_intel_db(self._path(batch_id, COMPACT_INDEX_SUFFIX)).get("offsets", {}).get(lead_id)
+        if span is None:
+            return None
+        with open(self._path(batch_id, RECORDS_SUFFIX), "rb") as f:
+            f.seek(span[0])
+            return json.loads(f.read(span[1]))
+
+    def latest_records(self) -> Iterator[Tuple[str, dict]]:
+        """(lead_id, record) of every lead's latest record."""
+        by_batch = {}
+        for lead_id, batch in self.latest().items():
+            if batch not in by_batch:
+                by_batch[batch] = self.records(batch)
+            record = by_batch[batch].get(lead_id)
+            if record is not None:
+                yield lead_id, record
+
+    def changes(self, since: str, until: str) -> Optional[Dict[str, dict]]:
+        """Records journaled between two versions of the store (or of one partition),
+        in write order; None when anything besides journal appends changed in between."""
+        before, after = parse_file_version(since), parse_file_version(until)
+        if set(before) - set(after):
+            return None
+        records = {}
+        for path, stat in after.items():
+            old = before.get(path)
+            if old == stat:
+                continue
+            start = old[1] if old is not None else 0
+            if not path.endswith(JOURNAL_SUFFIX) or stat is None or stat[1] < start:
+                return None
+            try:
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    chunk = f.read(stat[1] - start)
+                for line in chunk.splitlines():
+                    lead_id, record = json.loads(line)
+                    records[lead_id] = record
+            except (OSError, ValueError):
+                return None
+            if len(chunk) != stat[1] - start or not chunk.endswith(b"\n"):
+                return None  # Truncated or caught mid-append
+        return records
+
+    def rows(self, batch_id: Optional[str] = None) -> List[dict]:
+        """Flat ledger rows of one batch, or of every lead's latest record."""
+        if batch_id is not None:
+            return list(self._partition_rows(batch_id).values())
+        by_batch = {}
+        rows = []
+        for lead_id, batch in self.latest().items():
+            if batch not in by_batch:
+                by_batch[batch] = self._partition_rows(batch)
+            row = by_batch[batch].get(lead_id)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _partition_rows(self, batch_id: str) -> Dict[str, dict]:
+        if self.is_compacted(batch_id):
+            rows = load_intel_db(self._path(batch_id, COMPACT_INDEX_SUFFIX)).get("rows", [])
+            rows = {row["lead_id"]: row for row in rows}
+            rows.update({lead_id: ledger_row(lead_id, record)
+                         for lead_id, record in self._read_journal(batch_id).items()})
+            return rows
+        return {lead_id: ledger_row(lead_id, record) for lead_id, record in self.records(batch_id).items()}
+
+    def _read_compacted(self, batch_id: str) -> dict:
+        offsets = load_intel_db(self._path(batch_id, COMPACT_INDEX_SUFFIX)).get("offsets", {})
+        with open(self._path(batch_id, RECORDS_SUFFIX), "rb") as f:
+            raw = f.read()
+        return {lead_id: json.loads(raw[start:start + length]) for lead_id, (start, length) in offsets.items()}
+
+    # Writes
+
+    def _update_partition(self, batch_id: str, mutate: Callable[[dict], None]):
+        """Locked read-modify-write of a partition (thawing it first if it was compacted)."""
+        path = self._path(batch_id)
+        with locked(path):
+            compacted = self.is_compacted(batch_id)
+            if compacted:
+                data = self._read_compacted(batch_id)
+            elif os.path.exists(path):
+                with open(path, "r") as f:
+                    data = json.load(f)
+            else:
+                data = {}
+            mutate(data)
+            os.makedirs(self.dir, exist_ok=True)
+            write_json_atomic(path, data)
+            if compacted:
+                os.remove(self._path(batch_id, COMPACT_INDEX_SUFFIX))
+                os.remove(self._path(batch_id, RECORDS_SUFFIX))
+
+    def put(self, batch_id: str, records: Dict[str, dict]):
+        """Store records written by `batch_id` and make it their leads' latest batch."""
+        self._update_partition(batch_id, lambda data: data.update(records))
+        update_json(self.latest_path, lambda latest: latest.update({lead_id: batch_id for lead_id in records}))
+
+    def append(self, batch_id: str, records: Dict[str, dict]):
+        """Journal records written by a running batch, without rewriting its partition;
+        they read as the leads' latest records until `fold` merges them in."""
+        with locked(self._path(batch_id, JOURNAL_SUFFIX)):
+            self._append_journal(batch_id, records)
+
+    def _append_journal(self, batch_id: str, records: Dict[str, dict]):
+        lines = b"".join(json.dumps([lead_id, record], separators=(",", ":")).encode("utf-8") + b"\n"
+                         for lead_id, record in records.items())
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self._path(batch_id, JOURNAL_SUFFIX), "ab") as f:
+            f.write(lines)
+
+    def fold(self, batch_id: str) -> int:
+        """Merge a batch's journal into its partition and `_latest.json`; returns the leads folded."""
+        path = self._path(batch_id, JOURNAL_SUFFIX)
+        with locked(path):
+            journal = self._read_journal(batch_id)
+            if journal:
+                self.put(batch_id, journal)
+            if os.path.exists(path):
+                os.remove(path)
+        return len(journal)
+
+    def patch(self, lead_id: str, mutate: Callable[[dict], None]) -> bool:
+        """Edit a lead's latest record in place; False if the lead has none."""
+        batch_id = self.latest().get(lead_id)
+        if batch_id is None:
+            return False
+        found = []
+
+        def apply(data):
+            if lead_id in data:
+                mutate(data[lead_id])
+                found.append(lead_id)
+
+        with locked(self._path(batch_id, JOURNAL_SUFFIX)):
+            journaled = self._read_journal(batch_id).get(lead_id)
+            if journaled is not None:
+                # Still journaled by a running batch: append the edited record
+                mutate(journaled)
+                self._append_journal(batch_id, {lead_id: journaled})
+                return True
+            self._update_partition(batch_id, apply)
+        return bool(found)
+
+    def compact(self, batch_id: str) -> dict:
+        """Rewrite a plain partition as records + index files; returns the partition's size info."""
+        self.fold(batch_id)
+        path = self._path(batch_id)
+        with locked(path):
+            if self.is_compacted(batch_id):
+                index = load_intel_db(self._path(batch_id, COMPACT_INDEX_SUFFIX))
+                return {"batch_id": batch_id, "leads": len(index.get("offsets", {})), "compacted": True}
+            if not os.path.exists(path):
+                raise KeyError(batch_id)
+            with open(path, "r") as f:
+                records = json.load(f)
+
+            offsets, rows = {}, []
+            records_path = self._path(batch_id, RECORDS_SUFFIX)
+            temp_records = f"{records_path}.{os.getpid()}.tmp"
+            with open(temp_records, "wb") as out:
+                offset = 0
+                for lead_id, record in records.items():
+                    raw = json.dumps(record, separators=(",", ":")).encode("utf-8")
+                    out.write(raw)
+                    offsets[lead_id] = [offset, len(raw)]
+                    offset += len(raw)
+                    rows.append(ledger_row(lead_id, record))
+            os.replace(temp_records, records_path)
+            write_json_atomic(self._path(batch_id, COMPACT_INDEX_SUFFIX), {"rows": rows, "offsets": offsets},
+                              indent=None)
+            os.remove(path)
+        return {"batch_id": batch_id, "leads": len(offsets), "compacted": True}
+
+    def _migrate(self):
+        """Split a legacy intel_db.json into per-batch partitions (once)."""
+        if not os.path.exists(self.legacy_path) or os.path.exists(self.latest_path):
+            return
+        with locked(self.latest_path):
+            if os.path.exists(self.latest_path) or not os.path.exists(self.legacy_path):
+                return
+            with open(self.legacy_path, "r") as f:
+                legacy = json.load(f)
+            partitions, latest = {}, {}
+            for lead_id, record in legacy.items():
+                batch_id = str(record.get("batch_id") or LEGACY_BATCH)
+                try:
+                    self._path(batch_id)
+                except ValueError:
+                    batch_id = LEGACY_BATCH
+                partitions.setdefault(batch_id, {})[lead_id] = record
+                latest[lead_id] = batch_id
+            os.makedirs(self.dir, exist_ok=True)
+            for batch_id, records in partitions.items():
+                write_json_atomic(self._path(batch_id), records)
+            write_json_atomic(self.latest_path, latest)
+            os.replace(self.legacy_path, self.legacy_path + ".migrated")
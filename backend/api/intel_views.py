@@ -0,0 +1,175 @@
+"""
+Materialized intelligence-report views.
+
+The nested report served by `GET /api/leads/{record_id}` is built once from a
+lead's LangGraph state, when the batch worker finishes the lead or a status
+is patched, and stored on the intel record under "report" together with its
+"report_etag". The endpoint then serves the stored view as-is.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+REPORT_KEY = "report"
+ETAG_KEY = "report_etag"
+# Ledger status of a lead, set by the status PATCH; "status" is the pipeline's own node status
+LEDGER_STATUS_KEY = "ledger_status"
+DEFAULT_LEDGER_STATUS = "Ready"
+
+
+def ledger_status(record: dict) -> str:
+    return record.get(LEDGER_STATUS_KEY) or DEFAULT_LEDGER_STATUS
+
+
+def _draft_blocks(raw_text) -> list:
+    """Split an email body into text/br blocks for React rendering."""
+    blocks = []
+    for line in str(raw_text).replace('\\n', '\n').split('\n'):
+        if line.strip() == "":
+            blocks.append({"type": "br"})
+        else:
+            blocks.append({"type": "text", "content": line})
+    return blocks
+
+
+def build_report_view(lead_id: str, state: dict, built_at: Optional[datetime] = None) -> dict:
+    """Map a lead's pipeline state onto the nested Intelligence Report schema."""
+    lead = state.get("lead", {})
+    name = lead.get("name") or lead.get("first_name") or "Unknown"
+    company = lead.get("company") or lead.get("organization") or "Unknown"
+    title = lead.get("title", "Unknown")
+    now_str = (built_at or datetime.now()).strftime("%H:%M:%S")
+
+    # Map research (Agent 1)
+    # Each signal is a flat string because the frontend expects an array of strings
+    research_signals = ["High Engagement", "Target Account Hit"]
+    if isinstance(state.get("quality_indicators"), list):
+        research_signals = [
+            f"{q.get('metric', '')}: {q.get('value', '')}" if isinstance(q, dict) else str(q)
+            for q in state["quality_indicators"]
+        ]
+
+    # Map intent (Agent 2)
+    intent_reasoning = f"Based on {lead.get('visits', 0)} visits and {lead.get('pages_per_visit', 0)} pages/visit."
+    if isinstance(state.get("key_signals"), list):
+        signals = [s.get("signal", str(s)) if isinstance(s, dict) else str(s) for s in state["key_signals"]]
+        intent_reasoning = " • ".join(signals)
+    intent_recommendation = state.get("intent_recommendation", {"next_best_action": "Pending analysis", "urgency": "Medium"})
+
+    # Map message (Agent 3)
+    email_draft = [
+        {"type": "text", "content": f"Hi {name.split(' ')[0]},"},
+        {"type": "br"},
+        {"type": "text", "content": "I noticed your recent activity..."}
+    ]
+    if "email_preview" in state:
+        email_draft = _draft_blocks(state["email_preview"])
+
+    # Map timing (Agent 4)
+    timing_rec = "Tuesday 10:00 AM"
+    timing_reason = "High probability of engagement based on historical activity."
+    optimal_time_window = "N/A"
+    if isinstance(state.get("timing"), dict):
+        timing = state["timing"]
+        timing_rec = f"{timing.get('recommended_date', '')} {timing.get('send_time', '')}".strip()
+        timing_reason = timing.get('reasoning', '')
+        optimal_time_window = timing.get('optimal_time_window', '')
+
+    # Map logs (Agent 5 - Construct from the state's success)
+    crm_logs = [
+        {"time": now_str, "agent": "SYSTEM", "action": "Initialized lead record.", "status": "INIT"}
+    ]
+    if "lead_summary" in state:
+        crm_logs = [
+            {"time": now_str, "agent": "RESEARCH", "action": f"Identified {len(research_signals)} signals.", "status": "SUCCESS"},
+            {"time": now_str, "agent": "INTENT", "action": f"Calculated Intent Score: {state.get('intent_score', 0)}", "status": "SUCCESS"},
+            {"time": now_str, "agent": "STRATEGY", "action": "Draft generated via LangGraph.", "status": "SUCCESS"},
+            {"time": now_str, "agent": "TIMING", "action": f"Analyzed history and targeted {timing_rec}", "status": "SUCCESS"},
+            {"time": now_str, "agent": "SYSTEM", "action": "Graph sequence processing finished.", "status": "SUCCESS"}
+        ]
+
+    return {
+        "lead_id": lead_id,
+        "profile": {
+            "name": name,
+            "title": title,
+            "company": company,
+            "linkedin": lead.get('linkedin', f"linkedin.com/in/{name.lower().replace(' ', '')}"),
+            "website": lead.get('website', f"{company.lower().replace(' ', '')}.com"),
+            "bio": lead.get('bio', f"{title} at {company}. Leading strategic initiatives and growth.")
+        },
+        "agents": {
+            "research": {
+                "summary": "Processed via LangGraph Pipeline.",
+                "signals": research_signals
+            },
+            "intent": {
+                "score": state.get("intent_score", 0),
+                "reasoning": intent_reasoning,
+                "recommendation": intent_recommendation
+            },
+            "message": {
+                "draft": email_draft,
+                "subject": state.get("subject", "Checking in"),
+                "personalization_factors": state.get("personalization_factors", [])
+            },
+            "timing": {
+                "recommended": timing_rec,
+                "recommendedReason": timing_reason,
+                "optimal_time_window": optimal_time_window,
+                "approach": state.get("approach", {"type": "standard", "urgency": 50, "content_suggestions": ["Follow up"]}),
+                "engagement_prediction": state.get("engagement_prediction", {"response_probability": 0.0, "expected_delay": 24}),
+                "timeline": state.get("timeline", {})
+            },
+            "crm": {
+                "logs": crm_logs
+            }
+        },
+        "status": ledger_status(state),
+    }
+
+
+def report_etag(view: dict) -> str:
+    digest = hashlib.sha1(json.dumps(view, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return digest[:20]
+
+
+def materialize(lead_id: str, state: dict) -> dict:
+    """Store the report view and its ETag on an intel record (in place) and return the record."""
+    view = build_report_view(lead_id, {k: v for k, v in state.items() if k not in (REPORT_KEY, ETAG_KEY)})
+    state[REPORT_KEY] = view
+    state[ETAG_KEY] = report_etag(view)
+    return state
+
+
+# Parsed JSON documents by path, for the most recently read files
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 16
+
+
+def load_intel_db(path: str) -> dict:
+    """Parse an intel JSON file once per version of the file; callers must not mutate the result."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            _cache.move_to_end(path)
+            return cached[1]
+    with open(path, "r") as f:
+        data = json.load(f)
+    with _cache_lock:
+        _cache[path] = (key, data)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
@@ -0,0 +1,113 @@
+"""
+Processing order of the leads in a batch.
+
+Batches used to run in file order, so the ledger filled with whatever rows
+came first. An ordering policy scores every lead up front (vectorized over
+the batch CSVs) and the batch worker submits leads by descending score:
+
+- ``value`` (default): open value of the lead's own opportunities in the
+  batch's opportunity index (utils/opportunity_index.py, so its stage lists
+  and validity flags apply), then the behavioral pre-score for leads without
+  (or with equal) deals,
+- ``behavior``: pre-score from visits, time on site and pages per visit,
+- ``engagement``: engagement of the lead's opened emails, then behavior,
+- ``file``: the original file order.
+
+The primary score doubles as the lead's "value" weight in the progress
+report (`value_processed` / `value_total`), so the ledger can show how much
+of the batch's value is already done.
+"""
+
+import os
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+ORDERING_POLICIES = ("value", "behavior", "engagement", "file")
+DEFAULT_ORDERING = os.getenv("BATCH_ORDERING", "value")
+if DEFAULT_ORDERING not in ORDERING_POLICIES:
+    raise ValueError(f"Unknown BATCH_ORDERING '{DEFAULT_ORDERING}', expected one of {ORDERING_POLICIES}")
+
+BEHAVIOR_COLUMNS = ("visits", "time_on_site", "pages_per_visit")
+
+
+def _read_csv(batch_dir: str, filename: str, columns) -> "pd.DataFrame":
+    import pandas as pd
+    path = os.path.join(batch_dir, filename)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=list(columns))
+    header = pd.read_csv(path, nrows=0).columns
+    return pd.read_csv(path, usecols=[c for c in columns if c in header])
+
+
+def _per_lead(leads: "pd.DataFrame", frame: "pd.DataFrame", value: "pd.Series") -> "np.ndarray":
+    """Sum `value` over the rows of `frame` by lead_id, aligned to `leads`."""
+    import numpy as np
+    if "lead_id" not in leads.columns or frame.empty or "lead_id" not in frame.columns:
+        return np.zeros(len(leads))
+    totals = value.groupby(frame["lead_id"].astype(str)).sum()
+    return leads["lead_id"].astype(str).map(totals).fillna(0.0).to_numpy(dtype=float)
+
+
+def behavior_score(leads: "pd.DataFrame") -> "np.ndarray":
+    """Mean percentile rank of the behavioral columns, in [0, 1]."""
+    import numpy as np
+    import pandas as pd
+    ranks = [pd.to_numeric(leads[c], errors="coerce").rank(pct=True).fillna(0.0).to_numpy()
+             for c in BEHAVIOR_COLUMNS if c in leads.columns]
+    return np.mean(ranks, axis=0) if ranks else np.zeros(len(leads))
+
+
+def pipeline_value(leads: "pd.DataFrame", opportunities) -> "np.ndarray":
+    """Open value of each lead's own opportunities in an OpportunityIndex."""
+    import numpy as np
+    from utils.opportunity_index import summarize
+    if "lead_id" not in leads.columns:
+        return np.zeros(len(leads))
+    return np.array([summarize(opportunities.opportunities(lead_id))["open_value"]
+                     for lead_id in leads["lead_id"].astype(str)], dtype=float)
+
+
+def email_engagement(leads: "pd.DataFrame", batch_dir: str) -> "np.ndarray":
+    """Summed engagement_score of each lead's opened emails."""
+    import numpy as np
+    import pandas as pd
+    emails = _read_csv(batch_dir, "Email_Logs.csv", ("lead_id", "opened", "engagement_score"))
+    if "engagement_score" not in emails.columns:
+        return np.zeros(len(leads))
+    engagement = pd.to_numeric(emails["engagement_score"], errors="coerce").fillna(0.0)
+    if "opened" in emails.columns:
+        engagement = engagement * (pd.to_numeric(emails["opened"], errors="coerce").fillna(0) > 0)
+    return _per_lead(leads, emails, engagement)
+
+
+def order_leads(leads: "pd.DataFrame", batch_dir: str, policy: str = None,
+                opportunities=None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """(order, value) where `order` lists row positions of `leads` in processing order
+    and `value[i]` is the value weight of row i.
+
+    `opportunities` is the batch's OpportunityIndex, loaded from `batch_dir` if not given.
+    """
+    import numpy as np
+    policy = policy or DEFAULT_ORDERING
+    if policy not in ORDERING_POLICIES:
+        raise ValueError(f"Unknown ordering policy '{policy}', expected one of {ORDERING_POLICIES}")
+    positions = np.arange(len(leads))
+    if policy == "file" or not len(leads):
+        return positions, np.ones(len(leads))
+
+    behavior = behavior_score(leads)
+    if policy == "behavior":
+        primary = behavior
+    elif policy == "engagement":
+        primary = email_engagement(leads, batch_dir)
+    else:
+        if opportunities is None:
+            from utils.opportunity_index import load_directory_index
+            opportunities = load_directory_index(batch_dir)
+        primary = pipeline_value(leads, opportunities)
+    # Highest primary score first, then behavior, then file order
+    order = np.lexsort((positions, -behavior, -primary))
+    return order, np.maximum(primary, 0.0)
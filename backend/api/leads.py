@@ -1,344 +1,252 @@
 import os
-import pandas as pd
 from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request
+
+from utils.logger import get_logger
+from api.intel_store import IntelStore, ledger_row
+from api.priority_index import PRIORITY_INDEX
+from api.intel_views import build_report_view, materialize, report_etag, REPORT_KEY, ETAG_KEY, LEDGER_STATUS_KEY
+from api.responses import conditional_json, file_version, json_with_etag
+from api.shared_state import locked
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
 # Setup correct absolute paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+BATCHES_DIR = os.path.join(DATA_DIR, "batches")
+OUTPUTS_DIR = os.path.join(BASE_DIR, "outputs")
 LEADS_CSV = os.path.join(DATA_DIR, "Leads_Data.csv")
 
-import json
 
-def _load_leads_df(batch_id: Optional[str] = None):
-    """Load the leads DataFrame from intel_db.json, optionally constrained to a specific batch."""
-    
-    intel_db_path = os.path.join(BASE_DIR, "outputs", "intel_db.json")
-    
-    if not os.path.exists(intel_db_path):
-        return pd.DataFrame()
-        
+def _intel_store() -> IntelStore:
+    return IntelStore(OUTPUTS_DIR)
+
+def _intel_version(batch_id: Optional[str] = None):
+    """Data version of a batch's intel partition, or of the cross-batch view."""
     try:
-        with open(intel_db_path, "r") as f:
-            intel_data = json.load(f)
-            
-        leads_list = []
-        for lead_id, data in intel_data.items():
-            lead_info = data.get("lead", {})
-            
-            # Map the nested structure to a flat dictionary for the dataframe
-            flat_lead = {
-                "lead_id": lead_id,
-                "name": lead_info.get("name", "Unknown"),
-                "company": lead_info.get("company", "Unknown"),
-                "title": lead_info.get("title", "Unknown"),
-                "region": lead_info.get("region", "Unknown"),
-                "lead_source": lead_info.get("lead_source", "Unknown"),
-                "visits": lead_info.get("visits", 0),
-                "time_on_site": lead_info.get("time_on_site", 0.0),
-                "pages_per_visit": lead_info.get("pages_per_visit", 0.0),
-                "converted": lead_info.get("converted", False),
-                "intent_score": data.get("intent_score", 0),
-                "status": "Ready",
-                "record_id": lead_id
-            }
-            leads_list.append(flat_lead)
-            
-        df = pd.DataFrame(leads_list)
-        return df
-        
+        return _intel_store().version(batch_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+
+def _lead_rows(batch_id: Optional[str] = None) -> list:
+    """Flat ledger rows of one batch's intel partition, or of every lead's latest record."""
+    try:
+        return _intel_store().rows(batch_id)
     except Exception as e:
-        print(f"Error loading intel_db.json: {e}")
-        return pd.DataFrame()
+        logger.error("Error loading intel records: %s", e)
+        return []
+
+def _changed_rows(since: str, until: str) -> Optional[list]:
+    """Ledger rows journaled between two intel versions, or None if the ledger must be reloaded."""
+    records = _intel_store().changes(since, until)
+    if records is None:
+        return None
+    return [ledger_row(lead_id, record) for lead_id, record in records.items()]
+
+def _load_leads_df(batch_id: Optional[str] = None):
+    """Load the leads DataFrame from the intel records, optionally constrained to a specific batch."""
+    import pandas as pd
+    return pd.DataFrame(_lead_rows(batch_id))
 
 @router.get("")
 def list_leads(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
     search: Optional[str] = None,
     region: Optional[str] = None,
     lead_source: Optional[str] = None,
     sort_by: Optional[str] = None,
-    sort_dir: str = Query("asc", regex="^(asc|desc)$"),
+    sort_dir: str = Query("asc", pattern="^(asc|desc)$"),
     batch_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fuzzy: bool = False,
 ):
-    """List leads with pagination, search, and filtering."""
-    df = _load_leads_df(batch_id)
-    
-    # 1) Search filter
-    if search:
-        search = search.lower()
-        search_mask = (
-            df['name'].str.lower().str.contains(search, na=False) |
-            df['company'].str.lower().str.contains(search, na=False) |
-            df['title'].str.lower().str.contains(search, na=False)
-        )
-        df = df[search_mask]
-        
-    # 2) Specific filters
-    if region:
-        df = df[df['region'].str.lower() == region.lower()]
-    if lead_source:
-        df = df[df['lead_source'].str.lower() == lead_source.lower()]
+    """List leads with pagination, search, and filtering.
+
+    Pass the returned `next_cursor` back as `cursor` (with the same sort) to
+    page by keyset instead of page number. `search` matches name, company and
+    title tokens by prefix or infix (`fuzzy=true` also tolerates typos); without
+    `sort_by`, results are ranked by match quality then intent_score.
+    """
+    def build():
+        # numpy/pandas load on the first ledger query, not at API startup
+        from api.leads_index import get_leads_index, InvalidCursor
         
-    # 3) Sorting
-    if sort_by and sort_by in df.columns:
-        ascending = sort_dir == "asc"
-        df = df.sort_values(by=sort_by, ascending=ascending)
+        index = get_leads_index(batch_id, version, lambda: _lead_rows(batch_id), _changed_rows)
+        try:
+            result = index.query(page, page_size, search, region, lead_source, sort_by, sort_dir, cursor, fuzzy)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-    # 4) Pagination
-    total = len(df)
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    
-    paginated = df.iloc[start_idx:end_idx].copy()
-    paginated = paginated.where(pd.notnull(paginated), None)
-    
-    leads_list = paginated.to_dict(orient="records")
-    
-    return {
-        "data": leads_list,
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        return {
+            "data": result["data"],
+            "total": result["total"],
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": result["next_cursor"]
+        }
+    
+    version, last_modified = _intel_version(batch_id)
+    return conditional_json(request, version, build, last_modified)
 
 @router.get("/stats")
-def lead_stats(batch_id: Optional[str] = None):
-    df = _load_leads_df(batch_id)
-    total_leads = len(df)
-    active_pursuits = len(df[df['status'].isin(['Analysis', 'Processing_'])])
-    
-    converted_mask = df['converted'] == True
-    conversion_rate = 0
-    if total_leads > 0:
-        conversion_rate = round((len(df[converted_mask]) / total_leads) * 100, 1)
+def lead_stats(request: Request, batch_id: Optional[str] = None):
+    def build():
+        df = _load_leads_df(batch_id)
+        total_leads = len(df)
+        if total_leads == 0:
+            return {"total": 0, "active_pursuits": 0, "conversion_rate": 0, "ready": 0}
+        active_pursuits = len(df[df['status'].isin(['Analysis', 'Processing_'])])
         
-    return {
-        "total": total_leads,
-        "active_pursuits": active_pursuits,
-        "conversion_rate": conversion_rate,
-        "ready": len(df[df['status'] == 'Ready'])
-    }
+        converted_mask = df['converted'] == True
+        conversion_rate = round((len(df[converted_mask]) / total_leads) * 100, 1)
+            
+        return {
+            "total": total_leads,
+            "active_pursuits": active_pursuits,
+            "conversion_rate": conversion_rate,
+            "ready": len(df[df['status'] == 'Ready'])
+        }
+    
+    version, last_modified = _intel_version(batch_id)
+    return conditional_json(request, version, build, last_modified)
 
 @router.get("/filters")
-def lead_filters(batch_id: Optional[str] = None):
-    df = _load_leads_df(batch_id)
-    regions = df['region'].dropna().unique().tolist()
-    sources = df['lead_source'].dropna().unique().tolist()
-    # Filter out nan/None just in case
-    regions = [r for r in regions if r]
-    sources = [s for s in sources if s]
+def lead_filters(request: Request, batch_id: Optional[str] = None):
+    def build():
+        df = _load_leads_df(batch_id)
+        if df.empty:
+            return {"regions": [], "lead_sources": []}
+        regions = df['region'].dropna().unique().tolist()
+        sources = df['lead_source'].dropna().unique().tolist()
+        # Filter out nan/None just in case
+        regions = [r for r in regions if r]
+        sources = [s for s in sources if s]
+        
+        return {
+            "regions": sorted(regions),
+            "lead_sources": sorted(sources)
+        }
     
-    return {
-        "regions": sorted(regions),
-        "lead_sources": sorted(sources)
-    }
+    version, last_modified = _intel_version(batch_id)
+    return conditional_json(request, version, build, last_modified)
 
 @router.get("/{record_id}")
-def get_lead_details(record_id: str, batch_id: Optional[str] = None):
-    """Retrieve full intelligence report data for a specific lead."""
-    df = _load_leads_df(batch_id)
-    
-    if 'record_id' not in df.columns:
-        df['record_id'] = df.index.astype(str)
-        
-    if record_id in df['record_id'].values:
-        idx = df[df['record_id'] == record_id].index[0]
-    elif 'lead_id' in df.columns and record_id in df['lead_id'].values:
-        idx = df[df['lead_id'] == record_id].index[0]
-    else:
+def get_lead_details(request: Request, record_id: str, batch_id: Optional[str] = None):
+    """Retrieve full intelligence report data for a specific lead.
+
+    Serves the report view materialized when the lead was processed; repeated
+    fetches carrying the returned ETag in If-None-Match get a 304.
+    """
+    store = _intel_store()
+    try:
+        # The lead's record in that batch, else its latest one
+        state = (batch_id and store.get(record_id, batch_id)) or store.get(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+    if state is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-        
-    row = df.loc[idx].where(pd.notnull(df.loc[idx]), None).to_dict()
-    
-    import json
-    # Map CSV fields into the deeply nested Intelligence Report schema
-    lead_id = row.get('lead_id') or str(idx)
-    name = row.get('name') or row.get('first_name') or "Unknown"
-    company = row.get('company') or row.get('organization') or "Unknown"
-    title = row.get('title', "Unknown")
-    
-    # Default Mock / Fallback Values
-    email_draft = [
-        {"type": "text", "content": f"Hi {name.split(' ')[0]},"},
-        {"type": "br"},
-        {"type": "text", "content": "I noticed your recent activity..."}
-    ]
-    email_subject = "Checking in"
-    personalization_factors = []
-    research_signals = ["High Engagement", "Target Account Hit"]
-    intent_reasoning = f"Based on {row.get('visits', 0)} visits and {row.get('pages_per_visit', 0)} pages/visit."
-    intent_recommendation = {"next_best_action": "Pending analysis", "urgency": "Medium"}
-    timing_rec = "Tuesday 10:00 AM"
-    timing_reason = "High probability of engagement based on historical activity."
-    optimal_time_window = "N/A"
-    approach = {"type": "standard", "urgency": 50, "content_suggestions": ["Follow up"]}
-    engagement_prediction = {"response_probability": 0.0, "expected_delay": 24}
-    timeline = {}
-    
-    from datetime import datetime
-    now_str = datetime.now().strftime("%H:%M:%S")
-    crm_logs = [
-        {"time": now_str, "agent": "SYSTEM", "action": "Initialized lead record.", "status": "INIT"}
-    ]
     
-    # Attempt to load rich data from the agent outputs directory
-    outputs_dir = os.path.join(BASE_DIR, "outputs")
-    intel_db_path = os.path.join(outputs_dir, "intel_db.json")
-    
-    if os.path.exists(intel_db_path):
-        try:
-            with open(intel_db_path, "r") as f:
-                intel_db = json.load(f)
-            
-            if lead_id in intel_db:
-                state = intel_db[lead_id]
-                
-                # Map research (Agent 1)
-                # Ensure each signal is a flat string because frontend expects an array of strings
-                if "quality_indicators" in state and isinstance(state["quality_indicators"], list):
-                    research_signals = [
-                        f"{q.get('metric', '')}: {q.get('value', '')}" if isinstance(q, dict) else str(q)
-                        for q in state["quality_indicators"]
-                    ]
-                
-                # Map intent (Agent 2)
-                if "key_signals" in state and isinstance(state["key_signals"], list):
-                    signals = [s.get("signal", str(s)) if isinstance(s, dict) else str(s) for s in state["key_signals"]]
-                    intent_reasoning = " \u2022 ".join(signals)
-                if "intent_recommendation" in state:
-                    intent_recommendation = state["intent_recommendation"]
-                
-                # Map message (Agent 3) - Split into lines and breaks for React rendering
-                if "email_preview" in state:
-                    raw_text = state["email_preview"]
-                    paragraphs = str(raw_text).replace('\\n', '\n').split('\n')
-                    draft_blocks = []
-                    for line in paragraphs:
-                        if line.strip() == "":
-                            draft_blocks.append({"type": "br"})
-                        else:
-                            draft_blocks.append({"type": "text", "content": line})
-                    email_draft = draft_blocks
-                if "subject" in state:
-                    email_subject = state.get("subject", "")
-                if "personalization_factors" in state:
-                    personalization_factors = state.get("personalization_factors", [])
-                
-                # Map timing (Agent 4)
-                if "timing" in state and isinstance(state["timing"], dict):
-                    timing_rec = f"{state['timing'].get('recommended_date', '')} {state['timing'].get('send_time', '')}".strip()
-                    timing_reason = state['timing'].get('reasoning', '')
-                    optimal_time_window = state['timing'].get('optimal_time_window', '')
-                if "approach" in state:
-                    approach = state["approach"]
-                if "engagement_prediction" in state:
-                    engagement_prediction = state["engagement_prediction"]
-                if "timeline" in state:
-                    timeline = state["timeline"]
-                
-                # Map logs (Agent 5 - Construct from the state's success)
-                if "lead_summary" in state:
-                    crm_logs = [
-                        {"time": now_str, "agent": "RESEARCH", "action": f"Identified {len(research_signals)} signals.", "status": "SUCCESS"},
-                        {"time": now_str, "agent": "INTENT", "action": f"Calculated Intent Score: {state.get('intent_score', 0)}", "status": "SUCCESS"},
-                        {"time": now_str, "agent": "STRATEGY", "action": "Draft generated via LangGraph.", "status": "SUCCESS"},
-                        {"time": now_str, "agent": "TIMING", "action": f"Analyzed history and targeted {timing_rec}", "status": "SUCCESS"},
-                        {"time": now_str, "agent": "SYSTEM", "action": "Graph sequence processing finished.", "status": "SUCCESS"}
-                    ]
-                    
-        except Exception as e:
-            print(f"Error loading intel file: {e}")
-    
-    return {
-        "lead_id": lead_id,
-        "profile": {
-            "name": name,
-            "title": title,
-            "company": company,
-            "linkedin": row.get('linkedin', f"linkedin.com/in/{name.lower().replace(' ', '')}"),
-            "website": row.get('website', f"{company.lower().replace(' ', '')}.com"),
-            "bio": row.get('bio', f"{title} at {company}. Leading strategic initiatives and growth.")
-        },
-        "agents": {
-            "research": {
-                "summary": "Processed via LangGraph Pipeline.",
-                "signals": research_signals
-            },
-            "intent": {
-                "score": row.get('intent_score', row.get('intent', 0)),
-                "reasoning": intent_reasoning,
-                "recommendation": intent_recommendation
-            },
-            "message": {
-                "draft": email_draft,
-                "subject": email_subject,
-                "personalization_factors": personalization_factors
-            },
-            "timing": {
-                "recommended": timing_rec,
-                "recommendedReason": timing_reason,
-                "optimal_time_window": optimal_time_window,
-                "approach": approach,
-                "engagement_prediction": engagement_prediction,
-                "timeline": timeline
-            },
-            "crm": {
-                "logs": crm_logs
-            }
-        },
-        "status": row.get('status', 'Ready'),
-        "batch_id": batch_id
-    }
+    view, etag = state.get(REPORT_KEY), state.get(ETAG_KEY)
+    if view is None:
+        # Records written before views were materialized
+        view = build_report_view(record_id, state)
+        etag = report_etag(view)
+    etag = f'"{etag}:{batch_id}"' if batch_id else f'"{etag}"'
+    return json_with_etag(request, {**view, "batch_id": batch_id}, etag)
+
+
+@router.get("/{record_id}/deals")
+def get_lead_deals(request: Request, record_id: str, batch_id: Optional[str] = None,
+                   company_id: Optional[str] = None):
+    """A lead's opportunities in the sales and CRM pipelines, with the totals of its company
+    (`company_id`, by default the company of the lead's own opportunities).
+
+    Read from the join index of the batch's pipeline files (or the global
+    ones without a batch_id), built once per version of the files.
+    """
+    if batch_id is not None and (os.path.basename(batch_id) != batch_id or batch_id.startswith(".")):
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+    data_dir = os.path.join(BATCHES_DIR, batch_id) if batch_id else DATA_DIR
+    from utils.opportunity_index import SALES_FILE, CRM_FILE, load_directory_index
+    version, last_modified = file_version([os.path.join(data_dir, SALES_FILE), os.path.join(data_dir, CRM_FILE)])
+
+    def build():
+        index = load_directory_index(data_dir)
+        return {
+            "lead_id": record_id,
+            "batch_id": batch_id,
+            "deal_context": index.context(record_id, company_id),
+            "opportunities": list(index.opportunities(record_id)),
+        }
+
+    return conditional_json(request, version, build, last_modified)
+
+def _write_back(batch_id: Optional[str], lead_id: str, updates: dict):
+    """Apply a status edit to the lead's row in its batch's Leads_Data.csv (only that batch's file)."""
+    if not batch_id or os.path.basename(str(batch_id)) != str(batch_id):
+        return
+    path = os.path.join(BATCHES_DIR, str(batch_id), "Leads_Data.csv")
+    if not os.path.exists(path):
+        return
+    import pandas as pd
+    with locked(path):
+        df = pd.read_csv(path)
+        if "lead_id" not in df.columns:
+            return
+        rows = df["lead_id"].astype(str) == str(lead_id)
+        if not rows.any():
+            return
+        for column, value in updates.items():
+            df[column] = df[column].astype(object) if column in df.columns else None
+            df.loc[rows, column] = value
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        df.to_csv(temp_file, index=False)
+        os.replace(temp_file, path)
 
 @router.patch("/{record_id}/status")
 def update_lead_status(record_id: str, payload: dict = Body(...)):
+    """Set a lead's ledger status and/or intent_score.
+
+    The lead is found through the intel store's latest-batch map (record ids
+    are lead ids); only its latest record and its batch's CSV are rewritten.
+    """
     new_status = payload.get("status")
     intent_score = payload.get("intent_score")
     
     if not new_status and intent_score is None:
         raise HTTPException(status_code=400, detail="Missing status or intent_score in body")
-        
-    df = _load_leads_df()
     
-    if 'record_id' not in df.columns:
-        df['record_id'] = df.index.astype(str)
-        
-    # Also support searching by lead_id 
-    if record_id in df['record_id'].values:
-        idx = df[df['record_id'] == record_id].index[0]
-    elif 'lead_id' in df.columns and record_id in df['lead_id'].values:
-        idx = df[df['lead_id'] == record_id].index[0]
-    else:
+    patched = {}
+    
+    def patch(record):
+        if new_status:
+            record[LEDGER_STATUS_KEY] = new_status
+        if intent_score is not None:
+            record["intent_score"] = float(intent_score)
+        materialize(record_id, record)
+        PRIORITY_INDEX.upsert(record_id, record)
+        patched.update(record)
+    
+    store = _intel_store()
+    try:
+        # Locked read-modify-write: batch workers in other processes write this partition too
+        with PRIORITY_INDEX.writing(store):
+            found = store.patch(record_id, patch)
+    except Exception as e:
+        logger.error("Failed to update intel record: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update lead")
+    if not found:
         raise HTTPException(status_code=404, detail="Lead not found")
-        
-    if new_status:
-        df.at[idx, 'status'] = new_status
+    
+    updates = {"status": new_status} if new_status else {}
     if intent_score is not None:
-        df.at[idx, 'intent_score'] = intent_score
-        
-    # We should update intel_db.json instead of Leads_Data.csv
-    intel_db_path = os.path.join(BASE_DIR, "outputs", "intel_db.json")
-    if os.path.exists(intel_db_path):
-        try:
-            with open(intel_db_path, "r") as f:
-                intel_data = json.load(f)
-                
-            lead_id_val = df.at[idx, 'lead_id']
-            if lead_id_val in intel_data:
-                if new_status:
-                    intel_data[lead_id_val]["status"] = new_status
-                if intent_score is not None:
-                    intel_data[lead_id_val]["intent_score"] = float(intent_score)
-                    
-            with open(intel_db_path, "w") as f:
-                json.dump(intel_data, f, indent=4)
-        except Exception as e:
-            print(f"Failed to update intel_db.json: {e}")
+        updates["intent_score"] = float(intent_score)
+    _write_back(patched.get("batch_id"), record_id, updates)
     
     # Return updated row
-    updated_row = df.loc[idx].where(pd.notnull(df.loc[idx]), None).to_dict()
-    return updated_row
+    return ledger_row(record_id, patched)
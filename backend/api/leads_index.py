@@ -0,0 +1,275 @@
+"""
+Leads query engine for the ledger.
+
+`LeadsIndex` is built once per version of the intel records it serves (the
+whole ledger or one batch's partition, see api/intel_store.py); while a
+batch runs, a new version only applies the rows journaled since the cached
+one. It keeps:
+- the rows as ready-to-serve dicts,
+- a pre-computed sort order per column (intent_score, visits, time_on_site
+  and company up front, any other column on first use),
+- one boolean bitmap per region / lead_source value,
+- the inverted search index (api/search_index.py), synced to the snapshot.
+
+A query resolves its filters to a bitmap, keeps the matching positions of
+the sort order (cached per query shape) and slices one page out of it, so a
+deep page costs the same as the first one. Keyset cursors name the last lead
+served and resume right after its position in the sort order.
+"""
+
+import base64
+import binascii
+import json
+import math
+import numbers
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.search_index import LeadSearchIndex, LEAD_SEARCH_INDEX
+
+PRESORTED_COLUMNS = ("intent_score", "visits", "time_on_site", "company")
+FILTER_COLUMNS = ("region", "lead_source")
+VIEW_CACHE_SIZE = 64
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: Optional[str], sort_dir: str, last_lead_id: str) -> str:
+    raw = json.dumps({"s": sort_by, "d": sort_dir, "l": last_lead_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {"sort_by": data["s"], "sort_dir": data["d"], "last_lead_id": data["l"]}
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise InvalidCursor("Malformed cursor")
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class LeadsIndex:
+    """Immutable index over one snapshot of the ledger rows.
+
+    Built from plain row dicts with numpy only, so serving the ledger never
+    imports pandas.
+    """
+
+    def __init__(self, rows: List[dict], search_index: Optional[LeadSearchIndex] = None):
+        self.records = [{k: None if _missing(v) else v for k, v in row.items()} for row in rows]
+        self.size = len(self.records)
+        self.columns = set()
+        for row in self.records:
+            self.columns.update(row)
+        self.lead_ids = np.array([str(r.get("lead_id")) for r in self.records], dtype=object)
+        self.position = {lead_id: i for i, lead_id in enumerate(self.lead_ids)}
+
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._views = OrderedDict()
+
+        self.bitmaps = {}
+        for column in FILTER_COLUMNS:
+            if column not in self.columns:
+                continue
+            values, codes = np.unique([str(r.get(column)).lower() for r in self.records], return_inverse=True)
+            self.bitmaps[column] = {value: codes == code for code, value in enumerate(values)}
+
+        self.search_index = search_index if search_index is not None else LeadSearchIndex()
+        self.search_index.sync(self.records)
+        self.intent = np.array([self._number(r.get("intent_score")) for r in self.records], dtype=float)
+
+        for column in PRESORTED_COLUMNS:
+            for sort_dir in ("asc", "desc"):
+                self.order(column, sort_dir)
+
+    def updated(self, rows: List[dict]) -> "LeadsIndex":
+        """A new index with `rows` replacing their leads' rows; rows of new leads are appended."""
+        merged = dict(zip(self.lead_ids.tolist(), self.records))
+        merged.update((str(row.get("lead_id")), row) for row in rows)
+        return LeadsIndex(list(merged.values()), self.search_index)
+
+    @staticmethod
+    def _number(value) -> float:
+        try:
+            return -np.inf if value is None else float(value)
+        except (TypeError, ValueError):
+            return -np.inf
+
+    def order(self, sort_by: Optional[str], sort_dir: str) -> np.ndarray:
+        """Row positions in sort order; ties keep file order and missing values sort last."""
+        return self._sorted(sort_by, sort_dir)[0]
+
+    def _sorted(self, sort_by: Optional[str], sort_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(order, rank) where rank[row] is the row's position in order."""
+        if not sort_by or sort_by not in self.columns:
+            identity = np.arange(self.size)
+            return identity, identity
+        key = (sort_by, sort_dir)
+        cached = self._orders.get(key)
+        if cached is None:
+            values = [r.get(sort_by) for r in self.records]
+            missing = np.array([v is None for v in values], dtype=bool)
+            present = np.flatnonzero(~missing)
+            kept = [values[i] for i in present]
+            if not all(isinstance(v, numbers.Real) for v in kept):
+                kept = [str(v) for v in kept]
+            # Dense rank of each present value; equal values share a rank
+            dense = np.unique(np.array(kept), return_inverse=True)[1] if kept else np.array([], dtype=np.int64)
+            if sort_dir == "desc":
+                dense = -dense
+            order = np.concatenate([present[np.argsort(dense, kind="stable")], np.flatnonzero(missing)])
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            cached = (order, rank)
+            with self._lock:
+                self._orders[key] = cached
+        return cached
+
+    def _search(self, search: str, fuzzy: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, relevance) of the rows matching `search`."""
+        matches = self.search_index.search(search, fuzzy=fuzzy)
+        position = self.position
+        hits = [(position[lead_id], score) for lead_id, score in matches.items() if lead_id in position]
+        if not hits:
+            return np.array([], dtype=np.int64), np.array([])
+        positions, scores = zip(*hits)
+        return np.fromiter(positions, dtype=np.int64, count=len(hits)), np.fromiter(scores, dtype=float, count=len(hits))
+
+    def _filter_mask(self, region: Optional[str], lead_source: Optional[str]) -> Optional[np.ndarray]:
+        mask = None
+        for column, value in (("region", region), ("lead_source", lead_source)):
+            if not value:
+                continue
+            bitmap = self.bitmaps.get(column, {}).get(value.lower())
+            if bitmap is None:
+                return np.zeros(self.size, dtype=bool)
+            mask = bitmap if mask is None else mask & bitmap
+        return mask
+
+    def view(self, sort_by: Optional[str], sort_dir: str, search: Optional[str] = None,
+             region: Optional[str] = None, lead_source: Optional[str] = None,
+             fuzzy: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(positions, ranks) of the matching rows in sort order.
+
+        `ranks` are the rows' positions in the full sort order (None when the
+        view is the full order). Searches without `sort_by` are ordered by
+        relevance, then intent_score, and have no full order either.
+        """
+        key = (sort_by, sort_dir, search and search.lower(), region and region.lower(),
+               lead_source and lead_source.lower(), fuzzy)
+        with self._lock:
+            cached = self._views.get(key)
+            if cached is not None:
+                self._views.move_to_end(key)
+                return cached
+        mask = self._filter_mask(region, lead_source)
+        if search:
+            positions, scores = self._search(search, fuzzy)
+            if mask is not None:
+                keep = mask[positions]
+                positions, scores = positions[keep], scores[keep]
+            if sort_by:
+                order, rank = self._sorted(sort_by, sort_dir)
+                ranks = np.sort(rank[positions])
+                view = (order[ranks], ranks)
+            else:
+                # Best match first, then highest intent, then file order
+                ranked = np.lexsort((positions, -self.intent[positions], -scores))
+                view = (positions[ranked], None)
+        elif mask is None:
+            view = (self.order(sort_by, sort_dir), None)
+        else:
+            order = self.order(sort_by, sort_dir)
+            ranks = np.flatnonzero(mask[order])
+            view = (order[ranks], ranks)
+        with self._lock:
+            self._views[key] = view
+            if len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+    def query(self, page: int = 1, page_size: int = 25, search: Optional[str] = None, region: Optional[str] = None,
+              lead_source: Optional[str] = None, sort_by: Optional[str] = None, sort_dir: str = "asc",
+              cursor: Optional[str] = None, fuzzy: bool = False) -> dict:
+        if sort_by not in self.columns:
+            sort_by = None
+        positions, ranks = self.view(sort_by, sort_dir, search, region, lead_source, fuzzy)
+        total = len(positions)
+
+        if cursor:
+            token = decode_cursor(cursor)
+            if (token["sort_by"], token["sort_dir"]) != (sort_by, sort_dir):
+                raise InvalidCursor("Cursor was issued for a different sort order")
+            last = self.position.get(str(token["last_lead_id"]))
+            if last is None:
+                raise InvalidCursor("Cursor refers to a lead that no longer exists")
+            if search and not sort_by:
+                # Relevance order only exists within this view
+                found = np.flatnonzero(positions == last)
+                start = int(found[0]) + 1 if len(found) else len(positions)
+            elif ranks is None:
+                # Rank of the last served lead in the full order; resume right after it
+                start = int(self._sorted(sort_by, sort_dir)[1][last]) + 1
+            else:
+                last_rank = int(self._sorted(sort_by, sort_dir)[1][last])
+                start = int(np.searchsorted(ranks, last_rank, side="right"))
+        else:
+            start = (page - 1) * page_size
+
+        selected = positions[start:start + page_size]
+        data = [self.records[i] for i in selected]
+        next_cursor = None
+        if start + page_size < total and len(selected):
+            next_cursor = encode_cursor(sort_by, sort_dir, self.lead_ids[selected[-1]])
+        return {"data": data, "total": total, "next_cursor": next_cursor}
+
+
+# Built indexes by scope: None for the cross-batch ledger, else a batch id
+_indexes = OrderedDict()
+_index_lock = threading.Lock()
+# One builder per scope; builds run outside _index_lock so other scopes are not held up
+_build_locks: Dict[Optional[str], threading.Lock] = {}
+INDEX_CACHE_SIZE = 8
+
+
+def get_leads_index(batch_id: Optional[str], version: str, load: Callable[[], List[dict]],
+                    changes: Optional[Callable[[str, str], Optional[List[dict]]]] = None) -> LeadsIndex:
+    """Return the index of the ledger (or one batch of it) at `version`.
+
+    On a version change, `changes(cached_version, version)` may return the rows
+    written in between, which are applied to the cached index; when it returns
+    None the index is rebuilt from `load()`. The cross-batch index keeps the
+    shared LEAD_SEARCH_INDEX in sync; per-batch indexes get their own search index.
+    """
+    with _index_lock:
+        cached = _indexes.get(batch_id)
+        if cached is not None and cached[0] == version:
+            _indexes.move_to_end(batch_id)
+            return cached[1]
+        build_lock = _build_locks.setdefault(batch_id, threading.Lock())
+    with build_lock:
+        with _index_lock:
+            cached = _indexes.get(batch_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]  # Built by the request we waited for
+        rows = changes(cached[0], version) if cached is not None and changes is not None else None
+        if rows is not None:
+            index = cached[1].updated(rows)
+        else:
+            index = LeadsIndex(load(), LEAD_SEARCH_INDEX if batch_id is None else None)
+        with _index_lock:
+            _indexes[batch_id] = (version, index)
+            _indexes.move_to_end(batch_id)
+            while len(_indexes) > INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        return index
@@ -0,0 +1,86 @@
+"""
+Ollama LLM client used by the batch pipeline and the agent endpoints.
+
+Imported lazily (it pulls in `requests` and loads `.env`), so API startup
+does not pay for it.
+"""
+
+import os
+import time
+
+import requests
+from dotenv import load_dotenv
+
+from utils.logger import get_logger
+from api.accounting import record_llm_call
+
+logger = get_logger(__name__)
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Load environment variables for LangGraph LLM
+load_dotenv(os.path.join(root_dir, ".env"))
+
+
+class OllamaResponse:
+    def __init__(self, text):
+        self.text = text
+
+class OllamaWrapper:
+    # Opt-in: connection errors, timeouts and 5xx responses are retried with linear backoff
+    MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+    RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "1.0"))
+
+    def __init__(self, model_name="minimax-m2.5:cloud", cassette=None):
+        self.model_name = model_name
+        # Optional LLMCassette: "record" stores every call, "replay" serves them back offline
+        self.cassette = cassette
+        
+    def generate_content(self, prompt):
+        if self.cassette is not None and self.cassette.mode == "replay":
+            replayed = self.cassette.replay(self.model_name, prompt)
+            if replayed is None:
+                logger.warning("Cassette miss for model %s; no recorded response", self.model_name)
+                record_llm_call()
+                return OllamaResponse("{}")
+            record_llm_call(seconds=replayed[1] if self.cassette.simulate_latency else 0.0, cache_hit=True)
+            return OllamaResponse(replayed[0])
+        
+        url = "http://127.0.0.1:11434/api/generate"
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False
+        }
+        headers = {"Content-Type": "application/json"}
+        data = {}
+        retries = 0
+        start = time.perf_counter()
+        while True:
+            res = None
+            try:
+                res = requests.post(url, json=payload, headers=headers, timeout=120)
+                res.raise_for_status()
+                data = res.json()
+                response = OllamaResponse(data.get("response", ""))
+                break
+            except requests.exceptions.RequestException as e:
+                transient = res is None or res.status_code >= 500
+                if transient and retries < self.MAX_RETRIES:
+                    retries += 1
+                    logger.warning("Ollama call failed (%s), retry %d/%d", e, retries, self.MAX_RETRIES)
+                    time.sleep(self.RETRY_BACKOFF_SECONDS * retries)
+                    continue
+                error_msg = str(e)
+                if res is not None and hasattr(res, 'text'):
+                    error_msg += f" Response: {res.text}"
+                logger.error("Ollama generation failed: %s", error_msg)
+                response = OllamaResponse("{}")
+                break
+        elapsed = time.perf_counter() - start
+        
+        # Ollama reports token usage as prompt_eval_count / eval_count
+        record_llm_call(data.get("prompt_eval_count", 0), data.get("eval_count", 0), elapsed, retries)
+        if self.cassette is not None and self.cassette.mode == "record":
+            self.cassette.record(self.model_name, prompt, response.text, elapsed)
+        return response
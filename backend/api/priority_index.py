@@ -0,0 +1,158 @@
+"""
+Score index behind the dashboard's priority targets.
+
+Every lead with an intel record gets a priority score: a weighted sum of
+its intent_score, its behavioral columns and the strength of the intent
+agent's key_signals (weights from PRIORITY_WEIGHTS, e.g.
+"intent_score=1,visits=0.5"). Entries are kept in a list sorted by
+(-score, lead_id), so the top N is a slice and a changed lead moves with
+two bisects.
+
+The batch worker and the status patch endpoint upsert the leads they
+write, inside `writing` so the index stays current with the store version
+their write produced; `sync` reconciles the index with the intel store only
+when another API worker changed it, re-scoring only leads whose record
+changed.
+"""
+
+import bisect
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_WEIGHTS = {
+    "intent_score": 1.0,
+    "signal_strength": 5.0,
+    "visits": 0.5,
+    "pages_per_visit": 1.0,
+    "time_on_site": 0.01,
+}
+SIGNAL_STRENGTH = {"high": 1.0, "medium": 0.5, "low": 0.25}
+BEHAVIOR_COLUMNS = ("visits", "pages_per_visit", "time_on_site")
+SIGNALS_PER_TARGET = 3
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """DEFAULT_WEIGHTS overridden by a "name=weight,..." spec; unknown names are rejected."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise ValueError(f"Unknown priority weight '{name}', expected one of {sorted(weights)}")
+        weights[name] = float(value)
+    return weights
+
+
+def _number(value) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if number == number else 0.0  # NaN counts as 0
+
+
+def _signals(record: dict) -> Tuple[List[str], float]:
+    """Text of the record's key signals, strongest first, and their summed strength."""
+    ranked = []
+    for signal in record.get("key_signals") or []:
+        if isinstance(signal, dict):
+            text = signal.get("signal")
+            strength = SIGNAL_STRENGTH.get(str(signal.get("strength", "")).lower(), 0.5)
+        else:
+            text, strength = signal, 0.5
+        if text:
+            ranked.append((strength, str(text)))
+    ranked.sort(key=lambda pair: -pair[0])
+    return [text for _, text in ranked], sum(strength for strength, _ in ranked)
+
+
+class PriorityIndex:
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights if weights is not None else parse_weights(os.getenv("PRIORITY_WEIGHTS"))
+        self._keys: List[Tuple[float, str]] = []
+        self._targets: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.version = None
+
+    def __len__(self):
+        return len(self._targets)
+
+    def target(self, lead_id: str, record: dict) -> dict:
+        """Dashboard entry of one intel record, with its score."""
+        lead = record.get("lead", {})
+        signals, strength = _signals(record)
+        intent_score = _number(record.get("intent_score"))
+        features = {"intent_score": intent_score, "signal_strength": strength}
+        features.update({column: _number(lead.get(column)) for column in BEHAVIOR_COLUMNS})
+        score = sum(self.weights.get(name, 0.0) * value for name, value in features.items())
+        return {
+            "lead_id": lead_id,
+            "name": lead.get("name", "Unknown"),
+            "title": lead.get("title", "Unknown"),
+            "company": lead.get("company", "Unknown"),
+            "region": lead.get("region", ""),
+            "intent_score": intent_score,
+            "score": round(score, 2),
+            "signal": signals[0] if signals else f"Intent score {intent_score:g}",
+            "signals": signals[:SIGNALS_PER_TARGET],
+        }
+
+    def upsert(self, lead_id: str, record: dict):
+        target = self.target(lead_id, record)
+        with self._lock:
+            previous = self._targets.get(lead_id)
+            if previous == target:
+                return
+            if previous is not None:
+                self._drop_key(previous)
+            bisect.insort(self._keys, (-target["score"], lead_id))
+            self._targets[lead_id] = target
+
+    def remove(self, lead_id: str):
+        with self._lock:
+            previous = self._targets.pop(lead_id, None)
+            if previous is not None:
+                self._drop_key(previous)
+
+    def _drop_key(self, target: dict):
+        key = (-target["score"], target["lead_id"])
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def sync(self, records: Iterable[Tuple[str, dict]], version=None):
+        """Bring the index in line with (lead_id, record) pairs; unchanged leads keep their place."""
+        seen = set()
+        for lead_id, record in records:
+            seen.add(lead_id)
+            self.upsert(lead_id, record)
+        for lead_id in [l for l in self._targets if l not in seen]:
+            self.remove(lead_id)
+        self.version = version
+
+    def ensure(self, version, load: Callable[[], Iterable[Tuple[str, dict]]]):
+        """Sync from `load()` unless the index already reflects `version` of the store."""
+        if self.version != version:
+            self.sync(load(), version)
+
+    @contextmanager
+    def writing(self, store):
+        """Wrap a write of `store` whose leads are upserted here: if the index was
+        current before the write, it is current at the version the write produced."""
+        before, _ = store.version()
+        yield
+        after, _ = store.version()
+        with self._lock:
+            if self.version == before:
+                self.version = after
+
+    def top(self, n: int) -> List[dict]:
+        with self._lock:
+            return [dict(self._targets[lead_id], index=i) for i, (_, lead_id) in enumerate(self._keys[:n])]
+
+
+PRIORITY_INDEX = PriorityIndex()
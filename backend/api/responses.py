@@ -0,0 +1,183 @@
+"""
+Response layer shared by the API routers.
+
+- `FastJSONResponse` serializes with orjson when it is installed (falling
+  back to the standard json module), including numpy scalars and arrays.
+- `conditional_json` answers polled endpoints from a data version (the
+  files they are computed from): the ETag and Last-Modified come from the
+  version, so a matching If-None-Match / If-Modified-Since returns 304
+  without computing the payload at all.
+- `CompressionMiddleware` brotli- or gzip-encodes JSON responses above a size
+  threshold, depending on the client's Accept-Encoding (brotli only when the
+  optional `brotli` package is installed).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(content, default=str, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def file_version(paths: Iterable[str]) -> Tuple[str, Optional[float]]:
+    """Version string and latest mtime of the files a response is computed from."""
+    parts, latest = [], None
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append(f"{path}:-")
+            continue
+        parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        latest = stat.st_mtime if latest is None else max(latest, stat.st_mtime)
+    return "|".join(parts), latest
+
+
+def parse_file_version(version: str) -> Dict[str, Optional[Tuple[int, int]]]:
+    """path -> (mtime_ns, size) of each file of a `file_version` string; None for missing files."""
+    files = {}
+    for part in version.split("|") if version else ():
+        if part.endswith(":-"):
+            files[part[:-2]] = None
+        else:
+            path, mtime, size = part.rsplit(":", 2)
+            files[path] = (int(mtime), int(size))
+    return files
+
+
+def _validators(etag: str, last_modified: Optional[float]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def json_with_etag(request: Request, content: Any, etag: str, last_modified: Optional[float] = None) -> Response:
+    """Serve `content` under a known ETag, or a 304 if the client already has it."""
+    headers = _validators(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content, headers=headers)
+
+
+def conditional_json(request: Request, version: str, build: Callable[[], Any],
+                     last_modified: Optional[float] = None) -> Response:
+    """Serve `build()` tagged with an ETag derived from `version` and the query string.
+
+    `build` only runs when the client's cached copy is stale.
+    """
+    seed = f"{request.url.path}?{request.url.query}#{version}"
+    etag = '"' + hashlib.sha1(seed.encode("utf-8")).hexdigest()[:20] + '"'
+    headers = _validators(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(build(), headers=headers)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON/text responses of at least `minimum_size` bytes."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES, gzip_level: int = 5, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, scope) -> Optional[str]:
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1").lower()
+        offered = {part.split(";")[0].strip() for part in accept.split(",")}
+        if brotli is not None and "br" in offered:
+            return "br"
+        if "gzip" in offered:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    start = False
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or start is False:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+            if len(body) >= self.minimum_size:
+                if encoding == "br":
+                    body = brotli.compress(body, quality=self.brotli_quality)
+                else:
+                    body = gzip.compress(body, compresslevel=self.gzip_level)
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"vary", b"Accept-Encoding"))
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
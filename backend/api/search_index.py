@@ -0,0 +1,205 @@
+"""
+Inverted index for the Ledger's name/company/title search.
+
+Fields are lower-cased and split into word tokens. Each token keeps the set
+of leads containing it (postings), the vocabulary is kept sorted so a prefix
+resolves to a contiguous range with bisect, and a trigram -> tokens map over
+the vocabulary finds infix and (optionally) misspelled tokens without
+scanning it. Two-letter terms, the first thing typed in the search box,
+look up their infix tokens in a bigram -> tokens map.
+
+Every query term must match some token of a lead. A match is scored by
+quality: exact token > token prefix > infix > fuzzy, and a lead's score is
+the sum over the query terms.
+
+The index is maintained incrementally: the batch worker upserts each lead as
+it is written, and `sync` only re-tokenizes leads whose fields changed.
+"""
+
+import bisect
+import re
+import threading
+from typing import Dict, Iterable
+
+SEARCH_FIELDS = ("name", "company", "title")
+
+EXACT, PREFIX, INFIX, FUZZY = 3.0, 2.0, 1.0, 0.5
+FUZZY_MIN_SIMILARITY = 0.4
+MIN_INFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def trigrams(token: str):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bigrams(token: str):
+    return {token[i:i + 2] for i in range(len(token) - 1)}
+
+
+def _infix_trigrams(term: str):
+    """Trigrams every token containing `term` must have (no padding: term may sit mid-token)."""
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class LeadSearchIndex:
+    """Thread-safe inverted index keyed by lead_id."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._fields: Dict[str, tuple] = {}        # lead_id -> indexed field values
+        self._tokens: Dict[str, set] = {}          # lead_id -> tokens
+        self._postings: Dict[str, set] = {}        # token -> lead_ids
+        self._vocab: list = []                     # sorted tokens
+        self._grams: Dict[str, set] = {}           # trigram -> tokens
+        self._bigrams: Dict[str, set] = {}         # bigram -> tokens, for two-letter infix terms
+
+    def __len__(self):
+        return len(self._fields)
+
+    def _add_token(self, token: str, lead_id: str):
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = set()
+            bisect.insort(self._vocab, token)
+            for gram in trigrams(token):
+                self._grams.setdefault(gram, set()).add(token)
+            for gram in bigrams(token):
+                self._bigrams.setdefault(gram, set()).add(token)
+        postings.add(lead_id)
+
+    def _drop_token(self, token: str, lead_id: str):
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        postings.discard(lead_id)
+        if not postings:
+            del self._postings[token]
+            del self._vocab[bisect.bisect_left(self._vocab, token)]
+            for grams, token_grams in ((self._grams, trigrams(token)), (self._bigrams, bigrams(token))):
+                for gram in token_grams:
+                    tokens = grams.get(gram)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del grams[gram]
+
+    def upsert(self, lead_id: str, lead: dict):
+        """Index (or re-index) one lead from a dict holding the search fields."""
+        lead_id = str(lead_id)
+        fields = tuple(str(lead.get(f) or "") for f in SEARCH_FIELDS)
+        with self._lock:
+            if self._fields.get(lead_id) == fields:
+                return
+            new_tokens = set()
+            for value in fields:
+                new_tokens.update(tokenize(value))
+            old_tokens = self._tokens.get(lead_id, set())
+            for token in old_tokens - new_tokens:
+                self._drop_token(token, lead_id)
+            for token in new_tokens - old_tokens:
+                self._add_token(token, lead_id)
+            self._fields[lead_id] = fields
+            self._tokens[lead_id] = new_tokens
+
+    def remove(self, lead_id: str):
+        lead_id = str(lead_id)
+        with self._lock:
+            for token in self._tokens.pop(lead_id, ()):
+                self._drop_token(token, lead_id)
+            self._fields.pop(lead_id, None)
+
+    def sync(self, records: Iterable[dict]):
+        """Bring the index in line with `records`; unchanged leads are not re-tokenized."""
+        seen = set()
+        with self._lock:
+            for record in records:
+                lead_id = str(record.get("lead_id"))
+                seen.add(lead_id)
+                self.upsert(lead_id, record)
+            for lead_id in [l for l in self._fields if l not in seen]:
+                self.remove(lead_id)
+
+    def _prefix_tokens(self, term: str):
+        start = bisect.bisect_left(self._vocab, term)
+        end = bisect.bisect_left(self._vocab, term + "\uffff")
+        return self._vocab[start:end]
+
+    def _infix_tokens(self, term: str):
+        grams = _infix_trigrams(term)
+        if not grams:
+            return []
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self._grams.get(g, ()))):
+            tokens = self._grams.get(gram)
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & tokens
+            if not candidates:
+                return []
+        return [t for t in candidates if term in t]
+
+    def _fuzzy_tokens(self, term: str):
+        grams = trigrams(term)
+        shared = {}
+        for gram in grams:
+            for token in self._grams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        matches = []
+        for token, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(token)) - count)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((token, similarity))
+        return matches
+
+    def _term_matches(self, term: str, fuzzy: bool) -> Dict[str, float]:
+        """token -> best match quality of `term` against that vocabulary token."""
+        tiers = []
+        if fuzzy:
+            tiers += [([token], FUZZY * sim) for token, sim in sorted(self._fuzzy_tokens(term), key=lambda m: m[1])]
+        if len(term) >= MIN_INFIX_LENGTH:
+            infix = self._infix_tokens(term) if len(term) >= 3 else list(self._bigrams.get(term, ()))
+            tiers.append((infix, INFIX))
+        tiers.append((self._prefix_tokens(term), PREFIX))
+        tiers.append(([term] if term in self._postings else [], EXACT))
+
+        matches = {}
+        # Lowest quality first so better matches overwrite worse ones
+        for tokens, quality in tiers:
+            matches.update(dict.fromkeys(tokens, quality))
+        return matches
+
+    def search(self, query: str, fuzzy: bool = False) -> Dict[str, float]:
+        """Return lead_id -> relevance for leads matching every term of `query`."""
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        with self._lock:
+            per_term = [self._term_matches(term, fuzzy) for term in terms]
+            # Expand the most selective term's postings, then check the other
+            # terms against each candidate's own tokens
+            cost = [sum(len(self._postings[t]) for t in matches) for matches in per_term]
+            first = min(range(len(terms)), key=cost.__getitem__)
+            results = {}
+            for token, quality in sorted(per_term[first].items(), key=lambda m: m[1]):
+                results.update(dict.fromkeys(self._postings[token], quality))
+            for i, matches in enumerate(per_term):
+                if i == first or not results:
+                    continue
+                scored = {}
+                for lead_id, score in results.items():
+                    best = max((matches.get(t, 0.0) for t in self._tokens[lead_id]), default=0.0)
+                    if best:
+                        scored[lead_id] = score + best
+                results = scored
+        return results
+
+
+# Shared by the ledger endpoints and the batch worker that writes leads
+LEAD_SEARCH_INDEX = LeadSearchIndex()
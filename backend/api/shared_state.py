@@ -0,0 +1,173 @@
+"""
+State shared between API worker processes.
+
+With `uvicorn --workers N` every worker has its own module globals and
+threading locks, so anything that must agree across workers lives here:
+
+- `locked(path)` holds an exclusive lock on `<path>.lock` (fcntl.flock),
+  which serializes threads and processes alike. `update_json` wraps the
+  read-modify-write of a JSON file (an intel partition, a batch's
+  _progress.json) in it and replaces the file atomically, so concurrent
+  writers never lose each other's updates and readers never see a partial
+  file.
+- `StateStore` is a small JSON key/value store in SQLite (WAL journal, so
+  readers do not block the writer) for state that used to be in-memory
+  dicts, such as the agent status board. `merge` runs in an immediate
+  transaction, so concurrent partial updates compose.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single-process locking only
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+BUSY_TIMEOUT_MS = 10000
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def locked(path: str):
+    """Exclusive lock on `path` across threads and processes."""
+    path = os.path.abspath(path)
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + LOCK_SUFFIX, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = 4):
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(temp_file, path)
+
+
+def update_json(path: str, mutate: Callable[[Any], Any], default: Callable[[], Any] = dict,
+                indent: Optional[int] = 4) -> Any:
+    """Locked read-modify-write of a JSON file.
+
+    `mutate(data)` edits the parsed document in place (a missing or
+    unreadable file starts from `default()`); its return value is passed
+    back to the caller.
+    """
+    with locked(path):
+        data = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                data = None
+        if data is None:
+            data = default()
+        result = mutate(data)
+        write_json_atomic(path, data, indent)
+    return result
+
+
+class StateStore:
+    """JSON values by (namespace, key) in a SQLite database shared by all workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def items(self, namespace: str) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM state WHERE namespace = ?", (namespace,)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, namespace: str, key: str, value: Any):
+        with self._transaction() as conn:
+            self._put(conn, namespace, key, value)
+
+    def merge(self, namespace: str, key: str, updates: dict) -> dict:
+        """Atomically merge `updates` into the dict stored under `key` and return the result."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            value = json.loads(row[0]) if row else {}
+            value.update(updates)
+            self._put(conn, namespace, key, value)
+        return value
+
+    @staticmethod
+    def _put(conn: sqlite3.Connection, namespace: str, key: str, value: Any):
+        conn.execute(
+            "INSERT INTO state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (namespace, key, json.dumps(value, default=str), datetime.now().isoformat()),
+        )
+
+
+_stores: Dict[str, StateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_state_store(path: str) -> StateStore:
+    """The process-wide store for the database at `path` (STATE_DB overrides it)."""
+    path = os.path.abspath(os.getenv("STATE_DB", path))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = StateStore(path)
+        return store
@@ -0,0 +1,84 @@
+"""
+Stage-level memoization of the lead pipeline.
+
+Each LLM stage is keyed by the state fields it actually reads (see
+STAGE_READS) plus its own version (its prompt templates and the model, see
+`fingerprints.stage_versions`). A stage whose key was seen before is not
+invoked; the state changes it made then are applied from the memo instead.
+Changing one agent's prompt therefore only reruns that stage, and the
+downstream stages whose inputs it actually changes.
+
+The memo lives in a StateStore (SQLite) next to the intel records, so it is
+shared by every API worker. Stages that end in an error are not memoized.
+"""
+
+from typing import Dict, Optional
+
+from api.fingerprints import digest
+
+# State fields each LLM stage reads. The CRM logger and the timing stage (predicted
+# from the send-time model, with dates relative to today) make no LLM calls and always run.
+STAGE_READS = {
+    "research": ("lead", "deal_context"),
+    "intent": ("lead", "email_history", "email_data"),
+    "message": ("lead", "intent_score", "key_signals", "company_info"),
+}
+# Fields each LLM stage may set from the model's answer (used by the dry-run plan)
+STAGE_WRITES = {
+    "research": ("lead", "company_key", "company_analysis", "quality_indicators", "recommendation"),
+    "intent": ("lead", "email_history", "intent_score", "key_signals", "intent_recommendation"),
+    "message": ("subject", "personalization_factors", "email_preview"),
+}
+PIPELINE_STAGES = ("research", "intent", "message", "timing", "logger")
+# Every LLM stage makes one generate_content call per lead (before retries)
+LLM_CALLS_PER_STAGE = 1
+
+
+def state_delta(before: dict, after: dict) -> dict:
+    """Fields a stage added or changed."""
+    return {k: v for k, v in after.items() if k not in before or before[k] != v}
+
+
+class StageMemo:
+    def __init__(self, store, versions: Dict[str, str]):
+        self.store = store
+        self.versions = versions
+
+    def key(self, stage: str, state: dict) -> Optional[str]:
+        """Memo key of `stage` for this input state, or None for stages that are never memoized."""
+        reads = STAGE_READS.get(stage)
+        if reads is None:
+            return None
+        return digest({"version": self.versions[stage], "inputs": {k: state.get(k) for k in reads}})
+
+    def get(self, stage: str, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+        return self.store.get(f"stage:{stage}", key)
+
+    def put(self, stage: str, key: Optional[str], before: dict, after: dict):
+        if key is None or after.get("status") == "error":
+            return
+        self.store.set(f"stage:{stage}", key, state_delta(before, after))
+
+    def plan(self, states, force: bool = False) -> dict:
+        """Dry run: per-stage counts of memo hits and stage runs for these input states.
+
+        The outputs of a stage that has to run are unknown until it does, so
+        later stages reading them are counted as runs too: the counts are an
+        upper bound.
+        """
+        counts = {stage: {"cached": 0, "run": 0} for stage in STAGE_READS}
+        for state in states:
+            unknown = set()
+            for stage, reads in STAGE_READS.items():
+                cached = None if force or unknown.intersection(reads) else self.get(stage, self.key(stage, state))
+                if cached is None:
+                    counts[stage]["run"] += 1
+                    unknown.update(STAGE_WRITES[stage])
+                else:
+                    counts[stage]["cached"] += 1
+                    state = {**state, **cached}
+        for stage_counts in counts.values():
+            stage_counts["llm_calls"] = stage_counts["run"] * LLM_CALLS_PER_STAGE
+        return counts
@@ -1,11 +1,46 @@
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from api.responses import FastJSONResponse, CompressionMiddleware
 from api.dashboard import router as dashboard_router
 from api.leads import router as leads_router
 from api.agents import router as agents_router
 from api.batch import router as batch_router
 
-app = FastAPI(title="Strategic Grid API")
+# The routers import pandas, langgraph and the LLM client on first use. After
+# startup a background thread imports them so the first batch or dashboard
+# request does not pay for it; set API_WARMUP=0 to skip.
+WARMUP_MODULES = (
+    "pandas",
+    "api.leads_index",
+    "api.llm",
+    "langgraph_nodes.lead_research_node",
+    "langgraph_nodes.intent_qualifier_node",
+    "langgraph_nodes.email_strategy_node",
+    "langgraph_nodes.followup_timing_node",
+    "langgraph_nodes.crm_logger_node",
+)
+
+
+def warm_up():
+    import importlib
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if os.getenv("API_WARMUP", "1") != "0":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Strategic Grid API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+app.add_middleware(CompressionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
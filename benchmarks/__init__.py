@@ -0,0 +1,13 @@
+"""Offline benchmarks for the multi_ai batch pipeline and API"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+
+# The backend routers import each other as `api.*`, so the backend directory
+# has to be importable alongside the project root.
+for _path in (ROOT_DIR, BACKEND_DIR):
+    if _path not in sys.path:
+        sys.path.append(_path)
@@ -0,0 +1,203 @@
+"""Deterministic fake LLM
+
+Drop-in replacement for `OllamaWrapper` that answers every pipeline prompt with
+schema-valid canned JSON, after sleeping for a latency drawn from a
+configurable distribution. Responses depend only on the seed and the prompt,
+so repeated runs produce identical outputs. Given a recorded LLM cassette, the
+canned payloads are drawn from real responses instead.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from typing import Dict, Any
+
+from benchmarks import BACKEND_DIR  # noqa: F401  (puts `api` on sys.path)
+from api.accounting import record_llm_call
+from api.llm import OllamaResponse
+from api.cassette import LLMCassette
+
+
+class LatencyModel:
+    """Samples per-call latencies in seconds.
+
+    Specs are written as ``kind:arg1,arg2``:
+
+    - ``zero``                  no latency
+    - ``fixed:0.5``             constant 0.5s
+    - ``uniform:0.2,1.5``       uniform between 0.2s and 1.5s
+    - ``normal:1.0,0.2``        mean 1.0s, stddev 0.2s (clipped at 0)
+    - ``lognormal:1.0,0.5``     median 1.0s, sigma 0.5 (long tail, like real LLMs)
+    - ``exponential:0.8``       mean 0.8s
+    """
+
+    KINDS = ("zero", "fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, spec: str = "zero", seed: int = 0):
+        kind, _, args = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency model '{kind}', expected one of {self.KINDS}")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "zero":
+                return 0.0
+            if self.kind == "fixed":
+                return self.args[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(self.args[0], self.args[1])
+            if self.kind == "normal":
+                return max(0.0, self._rng.gauss(self.args[0], self.args[1]))
+            if self.kind == "lognormal":
+                return self._rng.lognormvariate(math.log(self.args[0]), self.args[1])
+            return self._rng.expovariate(1.0 / self.args[0])
+
+
+def _research_payload(rng: random.Random) -> Dict[str, Any]:
+    levels = ["High", "Medium", "Low"]
+    return {
+        "quality_indicators": [
+            {"metric": "Industry Match", "value": rng.choice(levels), "reasoning": "Synthetic ICP comparison."},
+            {"metric": "Website Engagement", "value": rng.choice(levels), "reasoning": "Synthetic visit analysis."},
+        ],
+        "recommendation": {
+            "segment": rng.choice(["Enterprise Tech", "Mid-Market", "SMB"]),
+            "strategy": "Value-based approach focusing on scalability",
+            "expected_impact": round(rng.random(), 2),
+        },
+    }
+
+
+def _company_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "industry": rng.choice(["B2B SaaS", "Manufacturing", "Financial Services", "Healthcare"]),
+        "company_fit": rng.choice(["High", "Medium", "Low"]),
+        "fit_reasoning": "Synthetic ICP comparison.",
+        "segment": rng.choice(["Enterprise Tech", "Mid-Market", "SMB"]),
+        "talking_points": ["Pipeline visibility", "Scaling outbound"],
+    }
+
+
+def _intent_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "intent_score": round(rng.uniform(0, 100), 1),
+        "key_signals": [
+            {"signal": "Visited pricing page", "strength": rng.choice(["High", "Medium", "Low"])},
+            {"signal": "Opened recent outreach", "strength": rng.choice(["High", "Medium", "Low"])},
+        ],
+        "recommendation": {
+            "next_best_action": "Schedule a direct demo call",
+            "urgency": rng.choice(["High", "Medium", "Low"]),
+        },
+    }
+
+
+def _email_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "subject": f"Quick idea for your team #{rng.randint(1, 999)}",
+        "personalization_factors": ["Role", "Recent activity"],
+        "email_preview": "Hi there,\n\nNoticed your team has been exploring pipeline automation.\n\nWorth a 15 minute call next week?",
+    }
+
+
+def _followup_payload(rng: random.Random) -> Dict[str, Any]:
+    urgency = rng.randint(0, 100)
+    approach = "soft_nudge" if urgency <= 30 else "value_add" if urgency <= 70 else "social_proof"
+    return {
+        "timing": {
+            "recommended_date": f"2025-04-{rng.randint(10, 28)}",
+            "send_time": f"{rng.randint(8, 17):02d}:00",
+            "optimal_time_window": "Tuesday 2-4 PM",
+            "reasoning": "Synthetic timing pattern",
+        },
+        "approach": {
+            "type": approach,
+            "urgency": urgency,
+            "reasoning": "Synthetic urgency",
+            "content_suggestions": ["Quick check-in", "Share update"],
+        },
+        "engagement_prediction": {
+            "response_probability": round(rng.random(), 2),
+            "expected_delay": rng.choice([12, 24, 48]),
+        },
+    }
+
+
+# First matching marker decides which canned payload a prompt receives.
+PROMPT_MARKERS = (
+    ("account-level analysis", _company_payload),
+    ("LeadResearch Agent", _research_payload),
+    ("Intent Qualifier AI Agent", _intent_payload),
+    ("craft personalized emails", _email_payload),
+    ("optimize follow-up timing", _followup_payload),
+)
+
+# Top-level key that identifies which prompt a recorded response answered
+RESPONSE_MARKERS = {
+    "quality_indicators": _research_payload,
+    "company_fit": _company_payload,
+    "intent_score": _intent_payload,
+    "email_preview": _email_payload,
+    "timing": _followup_payload,
+}
+
+
+def load_recorded_payloads(cassette_path: str) -> Dict[Any, list]:
+    """Group the parseable responses of a cassette by the payload they replace."""
+    pools = {}
+    for entry in LLMCassette(cassette_path, "replay").entries():
+        try:
+            payload = json.loads(entry["r"])
+        except (ValueError, TypeError):
+            continue
+        if not isinstance(payload, dict):
+            continue
+        for key, build in RESPONSE_MARKERS.items():
+            if key in payload:
+                pools.setdefault(build, []).append(payload)
+                break
+    return pools
+
+
+class FakeOllamaWrapper:
+    """Offline stand-in for `OllamaWrapper` with simulated latency."""
+
+    def __init__(self, model_name: str = "fake-llm", latency: str = "zero", seed: int = 0, sleep: bool = True,
+                 cassette_path: str = None):
+        self.model_name = model_name
+        self.seed = seed
+        self.sleep = sleep
+        self.latency = LatencyModel(latency, seed)
+        self.calls = 0
+        self.simulated_latency = 0.0
+        self._lock = threading.Lock()
+        self.recorded = load_recorded_payloads(cassette_path) if cassette_path else {}
+
+    def _payload(self, prompt: str) -> Dict[str, Any]:
+        rng = random.Random(self.seed ^ zlib.crc32(prompt.encode("utf-8")))
+        for marker, build in PROMPT_MARKERS:
+            if marker in prompt:
+                if self.recorded.get(build):
+                    return rng.choice(self.recorded[build])
+                return build(rng)
+        return {}
+
+    def generate_content(self, prompt):
+        delay = self.latency.sample()
+        with self._lock:
+            self.calls += 1
+            self.simulated_latency += delay
+        if self.sleep and delay > 0:
+            time.sleep(delay)
+        text = json.dumps(self._payload(prompt))
+        # Rough 4-characters-per-token estimate stands in for Ollama's counts
+        record_llm_call(len(prompt) // 4, len(text) // 4, delay)
+        return OllamaResponse(text)
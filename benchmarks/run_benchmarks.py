@@ -0,0 +1,330 @@
+"""Offline benchmark runner
+
+Drives `process_batch_background` and the `/api/leads` and `/api/dashboard`
+endpoints against synthetic datasets using `FakeOllamaWrapper`, so pipeline
+overhead can be measured separately from LLM latency. Each dataset size runs
+in its own subprocess so peak RSS and bytes written are not shared between
+scenarios.
+
+The default sizes (300, 2,000 and 10,000 leads) run in about three minutes at
+zero latency, with batch writes growing linearly in the number of leads
+(roughly 60-80 KB written and 10-20 ms of overhead per lead). Each size must finish within
+`--timeout` seconds (600 by default); a size that does not is reported as
+timed out and the run exits non-zero.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 --timeout 7200 \\
+        --latency lognormal:0.05,0.5 --output benchmarks/results.json \\
+        --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import ROOT_DIR
+from benchmarks.synthetic_data import generate
+
+DEFAULT_SIZES = (300, 2000, 10000)
+# Seconds each dataset size may take, subprocess start to results
+DEFAULT_TIMEOUT = 600
+BATCH_ID = "BENCH_BATCH"
+
+# Endpoint name -> path template, `{last_page}` is filled in per dataset size
+ENDPOINTS = {
+    "leads_first_page": "/api/leads?page=1&page_size=25",
+    "leads_deep_page_sorted": "/api/leads?page={last_page}&page_size=25&sort_by=intent_score&sort_dir=desc",
+    "leads_search": "/api/leads?search=ana&page_size=25",
+    "leads_stats": "/api/leads/stats",
+    "dashboard_stats": "/api/dashboard/stats",
+    "dashboard_pipeline": "/api/dashboard/pipeline",
+    "dashboard_priority_targets": "/api/dashboard/priority-targets",
+}
+
+# Metrics compared against a baseline; True means higher is better
+COMPARED_METRICS = {
+    "pipeline.wall_seconds": False,
+    "pipeline.leads_per_second": True,
+    "pipeline.per_lead_overhead_ms": False,
+    "peak_rss_mb": False,
+    "bytes_written": False,
+}
+
+
+def build_workspace(root: str, n_leads: int, seed: int = 0) -> dict:
+    """Generate a synthetic dataset and an uploaded batch under `root`."""
+    data_dir = os.path.join(root, "data")
+    batch_dir = os.path.join(data_dir, "batches", BATCH_ID)
+    outputs_dir = os.path.join(root, "outputs")
+    for path in (batch_dir, outputs_dir):
+        os.makedirs(path, exist_ok=True)
+
+    counts = generate(data_dir, n_leads, seed=seed)
+    for filename in counts:
+        shutil.copyfile(os.path.join(data_dir, filename), os.path.join(batch_dir, filename))
+
+    return {"root": root, "data_dir": data_dir, "batches_dir": os.path.dirname(batch_dir), "outputs_dir": outputs_dir}
+
+
+def use_workspace(workspace: dict, setattr=setattr):
+    """Point the API modules at a benchmark workspace instead of the repo data.
+
+    Tests pass `monkeypatch.setattr` (see the `use_workspace` fixture in
+    tests/conftest.py) so everything set here is restored afterwards.
+    """
+    from api import agents, batch, dashboard, leads
+    from api.priority_index import PRIORITY_INDEX
+    from api.search_index import LEAD_SEARCH_INDEX
+
+    setattr(batch, "BATCHES_DIR", workspace["batches_dir"])
+    setattr(batch, "OUTPUTS_DIR", workspace["outputs_dir"])
+    setattr(batch, "UI_GRACE_SECONDS", 0)
+    setattr(leads, "DATA_DIR", workspace["data_dir"])
+    setattr(leads, "BATCHES_DIR", workspace["batches_dir"])
+    setattr(leads, "OUTPUTS_DIR", workspace["outputs_dir"])
+    setattr(agents, "OUTPUTS_DIR", workspace["outputs_dir"])
+    setattr(dashboard, "DATA_DIR", workspace["data_dir"])
+    setattr(dashboard, "OUTPUTS_DIR", workspace["outputs_dir"])
+    # The shared indexes start empty, as in a fresh process
+    for index in (PRIORITY_INDEX, LEAD_SEARCH_INDEX):
+        for name, value in vars(type(index)()).items():
+            setattr(index, name, value)
+
+
+def _io_written() -> int:
+    """Bytes this process passed to write(), or -1 where /proc is unavailable."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+    return total
+
+
+def _bench_endpoints(n_leads: int, repeats: int) -> dict:
+    from starlette.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    last_page = max(1, -(-n_leads // 25))
+    results = {}
+    for name, template in ENDPOINTS.items():
+        path = template.format(last_page=last_page)
+        timings = []
+        response_bytes = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            res = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            response_bytes = len(res.content)
+        results[name] = {
+            "status": res.status_code,
+            "p50_ms": round(float(np.percentile(timings, 50)), 2),
+            "p95_ms": round(float(np.percentile(timings, 95)), 2),
+            "response_bytes": response_bytes,
+        }
+    return results
+
+
+def run_scenario(n_leads: int, workdir: str, latency: str = "zero", seed: int = 0, endpoint_repeats: int = 5,
+                 cassette: str = None, archetype_bins: int = None) -> dict:
+    """Run one dataset size in-process and return its metrics.
+
+    `cassette` points at a recorded LLM cassette whose real responses are used
+    as the fake LLM's payloads. `archetype_bins` sets the batch's archetype
+    granularity (see api/archetypes.py).
+    """
+    from benchmarks.fake_llm import FakeOllamaWrapper
+    from api import batch
+
+    workspace = build_workspace(workdir, n_leads, seed)
+    use_workspace(workspace)
+    llm = FakeOllamaWrapper(latency=latency, seed=seed, cassette_path=cassette)
+
+    written_before = _io_written()
+    start = time.perf_counter()
+    batch.process_batch_background(BATCH_ID, llm=llm, archetype_bins=archetype_bins)
+    wall = time.perf_counter() - start
+    written = _io_written() - written_before if written_before >= 0 else -1
+
+    progress = batch.get_batch_progress(BATCH_ID)
+    from api.accounting import aggregate_costs
+    company_research = aggregate_costs(batch._intel_store().records(BATCH_ID))["company_research"]
+    # With `MAX_WORKERS` concurrent leads, simulated LLM time overlaps
+    ideal = llm.simulated_latency / batch.MAX_WORKERS
+    pipeline = {
+        "status": progress.get("status"),
+        "processed_count": progress.get("processed_count"),
+        "wall_seconds": round(wall, 3),
+        "leads_per_second": round(n_leads / wall, 2) if wall > 0 else None,
+        "llm_calls": llm.calls,
+        "company_analyses": company_research["analyses"],
+        "company_hit_rate": company_research["hit_rate"],
+        "archetype_calls_saved": progress.get("archetypes", {}).get("calls_saved", 0),
+        "simulated_llm_seconds": round(llm.simulated_latency, 3),
+        "per_lead_overhead_ms": round(max(0.0, wall - ideal) / n_leads * 1000, 3),
+    }
+
+    return {
+        "n_leads": n_leads,
+        "latency": latency,
+        "pipeline": pipeline,
+        "endpoints": _bench_endpoints(n_leads, endpoint_repeats),
+        "peak_rss_mb": _peak_rss_mb(),
+        "bytes_written": written,
+        "disk_bytes": _dir_size(workspace["outputs_dir"]) + _dir_size(workspace["batches_dir"]),
+    }
+
+
+def _run_child(n_leads: int, args) -> dict:
+    """Run a scenario in a fresh interpreter so RSS and IO are isolated."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{n_leads}_")
+    result_file = os.path.join(workdir, "result.json")
+    cmd = [
+        sys.executable, "-m", "benchmarks.run_benchmarks", "--child",
+        "--sizes", str(n_leads), "--latency", args.latency, "--seed", str(args.seed),
+        "--repeats", str(args.repeats), "--workdir", workdir, "--output", result_file,
+    ]
+    if args.cassette:
+        cmd += ["--cassette", os.path.abspath(args.cassette)]
+    if args.archetype_bins is not None:
+        cmd += ["--archetype-bins", str(args.archetype_bins)]
+    try:
+        subprocess.run(cmd, cwd=ROOT_DIR, check=True, timeout=args.timeout,
+                       stdout=subprocess.DEVNULL if not args.verbose else None)
+        with open(result_file, "r") as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return {"n_leads": n_leads, "error": f"timed out after {args.timeout}s"}
+    except subprocess.CalledProcessError as e:
+        return {"n_leads": n_leads, "error": f"exited with status {e.returncode}"}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _metric(result: dict, dotted: str):
+    value = result
+    for key in dotted.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (size, metric, baseline, current, change) tuples that regressed."""
+    regressions = []
+    for size, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(size)
+        if not previous:
+            continue
+        metrics = dict(COMPARED_METRICS)
+        metrics.update({f"endpoints.{name}.p50_ms": False for name in ENDPOINTS})
+        for dotted, higher_is_better in metrics.items():
+            old, new = _metric(previous, dotted), _metric(current, dotted)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old <= 0 or new < 0:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            print(f"  [{size}] {dotted}: {old} -> {new} ({change:+.1%})")
+            if worse > threshold:
+                regressions.append((size, dotted, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--latency", default="zero", help="Fake LLM latency model, e.g. fixed:0.2 or lognormal:0.8,0.5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", help="Recorded LLM cassette to draw real response payloads from")
+    parser.add_argument("--archetype-bins", type=int, help="Archetype granularity (0 runs every lead separately)")
+    parser.add_argument("--repeats", type=int, default=5, help="Requests per endpoint")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="Seconds allowed per dataset size")
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = run_scenario(args.sizes[0], args.workdir, args.latency, args.seed, args.repeats, args.cassette,
+                              args.archetype_bins)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "latency": args.latency,
+            "seed": args.seed,
+            "cassette": args.cassette,
+            "archetype_bins": args.archetype_bins,
+        },
+        "scenarios": {},
+    }
+    for n_leads in args.sizes:
+        print(f"Running {n_leads} leads (latency={args.latency})...")
+        result = _run_child(n_leads, args)
+        results["scenarios"][str(n_leads)] = result
+        if "error" in result:
+            print(f"  {result['error']}")
+        else:
+            p = result["pipeline"]
+            print(f"  {p['leads_per_second']} leads/s, {p['per_lead_overhead_ms']} ms overhead/lead, "
+                  f"peak RSS {result['peak_rss_mb']} MB, {result['bytes_written']:,} bytes written")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to: {args.output}")
+
+    failed = [size for size, result in results["scenarios"].items() if "error" in result]
+    if failed:
+        print(f"{len(failed)} size(s) did not complete: {', '.join(failed)}")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.baseline}:")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+"""Synthetic dataset generator
+
+Emits the five upload CSVs (`Leads_Data.csv`, `Email_Logs.csv`,
+`Sales_Pipeline.csv`, `CRM_Pipeline.csv`, `Agent_Mapping.csv`) at any scale
+with consistent lead_id / company_id / agent_id foreign keys. Categorical and
+numeric distributions are fitted from the bundled `data/*.csv`; rows are
+generated in vectorized chunks and streamed straight to disk.
+
+Usage:
+    python -m benchmarks.synthetic_data --out /tmp/synthetic --leads 100000 --emails 1000000 --seed 42
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Any, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import ROOT_DIR
+
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+DEFAULT_CHUNK_SIZE = 200_000
+
+# Bundled data has no Leads_Data.csv, so lead behaviour defaults to the
+# public lead-scoring dataset the project was built on. A Leads_Data.csv in
+# the source directory overrides these.
+DEFAULT_LEAD_PROFILE = {
+    "region": {"North America": 0.34, "Europe": 0.27, "Asia Pacific": 0.21, "Latin America": 0.10, "Middle East & Africa": 0.08},
+    "lead_source": {"Google": 0.31, "Direct Traffic": 0.275, "Olark Chat": 0.19, "Organic Search": 0.125,
+                    "Reference": 0.058, "Welingak Website": 0.015, "Referral Sites": 0.027},
+    "title": {"CEO": 0.06, "CTO": 0.07, "VP Engineering": 0.09, "VP Sales": 0.08, "Director of Marketing": 0.10,
+              "Head of Operations": 0.08, "Data Analyst": 0.14, "Software Engineer": 0.16, "Sales Manager": 0.12,
+              "Procurement Lead": 0.10},
+    "visits_mean": 3.4,
+    "visits_dispersion": 1.2,
+    "zero_time_rate": 0.24,
+    "time_on_site_mean": 650.0,
+    "pages_per_visit_mean": 2.4,
+    "converted_rate": 0.385,
+}
+
+# Bundled logs contain no replies at all, so the reply rate is a parameter;
+# replies are skewed towards opened, high-engagement emails.
+DEFAULT_REPLY_RATE = 0.12
+
+LEAD_COLUMNS = ["lead_id", "name", "title", "company", "region", "lead_source", "visits", "time_on_site",
+                "pages_per_visit", "converted", "company_normalized", "company_id"]
+EMAIL_COLUMNS = ["email_id", "from_name", "to_name", "topic", "sentiment", "opened", "device", "work_hour", "workday",
+                 "email_text", "lead_id", "from_agent_id", "to_agent_id", "from_lead_id", "to_lead_id", "agent_id",
+                 "company_id", "stage", "confidence_tag", "subject", "reply_status", "email_type", "engagement_score",
+                 "inferred_direction"]
+SALES_COLUMNS = ["opportunity_id", "sales_agent", "product", "company", "deal_stage", "engage_date", "close_date",
+                 "close_value", "company_normalized", "agent_normalized", "company_id", "agent_id", "lead_id",
+                 "confidence_tag", "lead_id_valid", "company_id_valid", "agent_id_valid"]
+CRM_COLUMNS = ["deal_id", "lead_id", "company_id", "company_normalized", "agent_id", "agent_normalized",
+               "sales_agent", "stage", "value"]
+
+_SYLLABLES = np.array(["ac", "bel", "cor", "dyn", "el", "fin", "gen", "hex", "ion", "jet", "kin", "lum", "max",
+                       "nov", "omn", "pro", "quan", "ren", "sol", "tek", "uni", "vor", "wav", "xen", "zen"])
+_SUFFIXES = np.array(["", " Inc", " Labs", " Systems", " Group", " Analytics", " Technologies", " Partners"])
+
+
+def _freq(series: pd.Series) -> Dict[str, float]:
+    counts = series.dropna().value_counts(normalize=True)
+    return {str(k): float(v) for k, v in counts.items()}
+
+
+def fit_profile(source_dir: str = DATA_DIR) -> Dict[str, Any]:
+    """Fit value distributions from the CSVs in `source_dir`."""
+    emails = pd.read_csv(os.path.join(source_dir, "Email_Logs.csv"))
+    sales = pd.read_csv(os.path.join(source_dir, "Sales_Pipeline.csv"))
+    crm = pd.read_csv(os.path.join(source_dir, "CRM_Pipeline.csv"))
+    agents = pd.read_csv(os.path.join(source_dir, "Agent_Mapping.csv"))
+
+    names = pd.concat([emails["to_name"], emails["from_name"], agents["sales_agent"]]).dropna()
+    names = names[names.str.count(" ") == 1].str.split(" ", expand=True)
+
+    # Bodies become templates: greeting and signature are re-generated per row
+    bodies = emails["email_text"].dropna().str.split("\n\n", n=1).str[1].dropna()
+    templates = bodies.str.rsplit("\n", n=1).str[0].drop_duplicates()
+
+    won = sales.loc[sales["deal_stage"] == "Won", ["engage_date", "close_date", "close_value"]].dropna()
+    cycle_days = (pd.to_datetime(won["close_date"]) - pd.to_datetime(won["engage_date"])).dt.days
+    engage = pd.to_datetime(sales["engage_date"].dropna())
+
+    profile = {
+        "first_names": sorted(set(names[0])),
+        "last_names": sorted(set(names[1])),
+        "emails_per_lead": float(emails.groupby("lead_id").size().mean()),
+        "deals_per_lead": float(crm.groupby("lead_id").size().mean()),
+        "email": {
+            "topic": _freq(emails["topic"]),
+            "sentiment": _freq(emails["sentiment"]),
+            "device": _freq(emails["device"]),
+            "stage": _freq(emails["stage"]),
+            "confidence_tag": _freq(emails["confidence_tag"]),
+            "subject": _freq(emails["subject"]),
+            "opened_rate": float(emails["opened"].mean()),
+            "work_hour_rate": float(emails["work_hour"].mean()),
+            "workday_rate": float(emails["workday"].mean()),
+            "from_agent_rate": float(emails["agent_id"].notna().mean()),
+            "engagement_score": emails["engagement_score"].dropna().astype(int).tolist(),
+            "templates": templates.tolist(),
+        },
+        "sales": {
+            "product": _freq(sales["product"]),
+            "deal_stage": _freq(sales["deal_stage"]),
+            "company_missing_rate": float(sales["company"].isna().mean()),
+            "won_value": won["close_value"].astype(float).tolist(),
+            "cycle_days": cycle_days.clip(lower=0).astype(int).tolist(),
+            "engage_start": engage.min().strftime("%Y-%m-%d"),
+            "engage_end": engage.max().strftime("%Y-%m-%d"),
+        },
+        "crm": {
+            "stage": _freq(crm["stage"]),
+            "value": crm["value"].astype(int).tolist(),
+        },
+        "leads": dict(DEFAULT_LEAD_PROFILE),
+    }
+
+    leads_path = os.path.join(source_dir, "Leads_Data.csv")
+    if os.path.exists(leads_path):
+        leads = pd.read_csv(leads_path)
+        for col in ("region", "lead_source", "title"):
+            if col in leads.columns:
+                profile["leads"][col] = _freq(leads[col])
+        if "visits" in leads.columns:
+            profile["leads"]["visits_mean"] = float(pd.to_numeric(leads["visits"], errors="coerce").mean())
+        if "time_on_site" in leads.columns:
+            time_on_site = pd.to_numeric(leads["time_on_site"], errors="coerce").fillna(0)
+            profile["leads"]["zero_time_rate"] = float((time_on_site == 0).mean())
+            profile["leads"]["time_on_site_mean"] = float(time_on_site[time_on_site > 0].mean())
+        if "pages_per_visit" in leads.columns:
+            profile["leads"]["pages_per_visit_mean"] = float(pd.to_numeric(leads["pages_per_visit"], errors="coerce").mean())
+        if "converted" in leads.columns:
+            profile["leads"]["converted_rate"] = float(pd.to_numeric(leads["converted"], errors="coerce").mean())
+
+    return profile
+
+
+class SyntheticDataGenerator:
+    """Seedable, chunked generator for the five upload CSV schemas."""
+
+    def __init__(self, n_leads: int, n_emails: Optional[int] = None, n_opportunities: Optional[int] = None,
+                 n_deals: Optional[int] = None, n_agents: int = 107, leads_per_company: float = 3.0,
+                 reply_rate: float = DEFAULT_REPLY_RATE, seed: int = 0, profile: Optional[Dict[str, Any]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.profile = profile or fit_profile()
+        self.n_leads = n_leads
+        self.n_emails = n_emails if n_emails is not None else int(n_leads * self.profile["emails_per_lead"])
+        self.n_deals = n_deals if n_deals is not None else int(n_leads * 0.5 * self.profile["deals_per_lead"])
+        self.n_opportunities = n_opportunities if n_opportunities is not None else int(n_leads * 0.5)
+        self.n_agents = n_agents
+        self.n_companies = max(1, int(n_leads / leads_per_company))
+        self.reply_rate = reply_rate
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self._build_dimensions()
+
+    def _rng(self, stream: int, chunk: int = 0) -> np.random.Generator:
+        # Independent, reproducible stream per table and chunk
+        return np.random.default_rng([self.seed, stream, chunk])
+
+    @staticmethod
+    def _choice(rng: np.random.Generator, freq: Dict[str, float], size: int) -> np.ndarray:
+        values = np.array(list(freq.keys()), dtype=object)
+        probs = np.array(list(freq.values()), dtype=float)
+        return values[rng.choice(len(values), size=size, p=probs / probs.sum())]
+
+    def _names(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        first = np.array(self.profile["first_names"], dtype=object)
+        last = np.array(self.profile["last_names"], dtype=object)
+        return first[rng.integers(0, len(first), size)] + " " + last[rng.integers(0, len(last), size)]
+
+    def _build_dimensions(self):
+        """Agents, companies and the lead -> company/agent assignment."""
+        rng = self._rng(0)
+
+        self.agent_ids = np.char.add("SA", np.char.zfill(np.arange(1, self.n_agents + 1).astype(str), 3)).astype(object)
+        self.agent_names = self._names(rng, self.n_agents)
+        self.agent_normalized = pd.Series(self.agent_names).str.lower().str.replace(" ", "_").to_numpy(dtype=object)
+
+        n = self.n_companies
+        stems = (_SYLLABLES[rng.integers(0, len(_SYLLABLES), n)].astype(object)
+                 + _SYLLABLES[rng.integers(0, len(_SYLLABLES), n)].astype(object))
+        self.company_names = (pd.Series(stems).str.capitalize() + _SUFFIXES[rng.integers(0, len(_SUFFIXES), n)]
+                              + " " + pd.Series(np.arange(1, n + 1)).astype(str)).to_numpy(dtype=object)
+        self.company_ids = np.char.add("C", np.arange(1, n + 1).astype(str)).astype(object)
+        self.company_normalized = pd.Series(self.company_names).str.lower().to_numpy(dtype=object)
+
+        # Zipf-like account sizes: a few companies have dozens of contacts
+        weights = 1.0 / np.arange(1, n + 1) ** 0.8
+        self.lead_company = rng.choice(n, size=self.n_leads, p=weights / weights.sum())
+        self.lead_agent = rng.integers(0, self.n_agents, self.n_leads)
+        self.lead_ids = np.char.add("L", np.arange(1, self.n_leads + 1).astype(str)).astype(object)
+        self.lead_names = self._names(rng, self.n_leads)
+
+    def _chunks(self, total: int) -> Iterator[tuple]:
+        for number, start in enumerate(range(0, total, self.chunk_size)):
+            yield number, start, min(total, start + self.chunk_size)
+
+    def agent_mapping(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "agent_id": self.agent_ids,
+            "sales_agent": self.agent_names,
+            "normalized_name": self.agent_normalized,
+            "email": self.agent_normalized + "@company.com",
+        })
+
+    def leads_chunks(self) -> Iterator[pd.DataFrame]:
+        p = self.profile["leads"]
+        for number, start, stop in self._chunks(self.n_leads):
+            rng, size = self._rng(1, number), stop - start
+            companies = self.lead_company[start:stop]
+            # Negative binomial keeps the long tail of heavy visitors
+            visits = rng.negative_binomial(p["visits_dispersion"], p["visits_dispersion"] / (p["visits_dispersion"] + p["visits_mean"]), size)
+            time_on_site = np.where(rng.random(size) < p["zero_time_rate"], 0.0,
+                                    rng.exponential(p["time_on_site_mean"], size).round(0))
+            pages = np.where(visits == 0, 0.0, rng.gamma(2.0, p["pages_per_visit_mean"] / 2.0, size).round(2))
+            yield pd.DataFrame({
+                "lead_id": self.lead_ids[start:stop],
+                "name": self.lead_names[start:stop],
+                "title": self._choice(rng, p["title"], size),
+                "company": self.company_names[companies],
+                "region": self._choice(rng, p["region"], size),
+                "lead_source": self._choice(rng, p["lead_source"], size),
+                "visits": visits,
+                "time_on_site": time_on_site,
+                "pages_per_visit": pages,
+                "converted": (rng.random(size) < p["converted_rate"]).astype(int),
+                "company_normalized": self.company_normalized[companies],
+                "company_id": self.company_ids[companies],
+            }, columns=LEAD_COLUMNS)
+
+    def email_chunks(self) -> Iterator[pd.DataFrame]:
+        p = self.profile["email"]
+        templates = np.array(p["templates"], dtype=object)
+        scores = np.array(p["engagement_score"])
+        for number, start, stop in self._chunks(self.n_emails):
+            rng, size = self._rng(2, number), stop - start
+            leads = rng.integers(0, self.n_leads, size)
+            agents = self.lead_agent[leads]
+            has_agent = rng.random(size) < p["from_agent_rate"]
+            agent_ids = np.where(has_agent, self.agent_ids[agents], None)
+            from_names = np.where(has_agent, self.agent_names[agents], None)
+            to_names = self.lead_names[leads]
+
+            opened = (rng.random(size) < p["opened_rate"]).astype(int)
+            engagement = scores[rng.integers(0, len(scores), size)]
+            reply_p = self.reply_rate * opened / max(p["opened_rate"], 1e-9) * (engagement / scores.mean())
+            replied = rng.random(size) < np.clip(reply_p, 0.0, 1.0)
+
+            signature = pd.Series(from_names).fillna("None").to_numpy(dtype=object)
+            text = "Hi " + to_names + ",\n\n" + templates[rng.integers(0, len(templates), size)] + "\n" + signature
+
+            yield pd.DataFrame({
+                "email_id": np.arange(start + 1, stop + 1),
+                "from_name": from_names,
+                "to_name": to_names,
+                "topic": self._choice(rng, p["topic"], size),
+                "sentiment": self._choice(rng, p["sentiment"], size),
+                "opened": opened,
+                "device": self._choice(rng, p["device"], size),
+                "work_hour": (rng.random(size) < p["work_hour_rate"]).astype(int),
+                "workday": (rng.random(size) < p["workday_rate"]).astype(int),
+                "email_text": text,
+                "lead_id": self.lead_ids[leads],
+                "from_agent_id": agent_ids,
+                "to_agent_id": None,
+                "from_lead_id": None,
+                "to_lead_id": self.lead_ids[leads],
+                "agent_id": agent_ids,
+                "company_id": self.company_ids[self.lead_company[leads]],
+                "stage": self._choice(rng, p["stage"], size),
+                "confidence_tag": self._choice(rng, p["confidence_tag"], size),
+                "subject": self._choice(rng, p["subject"], size),
+                "reply_status": np.where(replied, "replied", "ignored"),
+                "email_type": "outreach",
+                "engagement_score": engagement,
+                "inferred_direction": "Agent → Lead",
+            }, columns=EMAIL_COLUMNS)
+
+    def sales_chunks(self) -> Iterator[pd.DataFrame]:
+        p = self.profile["sales"]
+        won_values = np.array(p["won_value"])
+        cycle = np.array(p["cycle_days"])
+        engage_start = np.datetime64(p["engage_start"])
+        span = int((np.datetime64(p["engage_end"]) - engage_start).astype(int))
+        for number, start, stop in self._chunks(self.n_opportunities):
+            rng, size = self._rng(3, number), stop - start
+            leads = rng.integers(0, self.n_leads, size)
+            companies = self.lead_company[leads]
+            agents = self.lead_agent[leads]
+            stage = self._choice(rng, p["deal_stage"], size)
+
+            engage = engage_start + rng.integers(0, span + 1, size).astype("timedelta64[D]")
+            close = engage + cycle[rng.integers(0, len(cycle), size)].astype("timedelta64[D]")
+            closed = np.isin(stage, ["Won", "Lost"])
+            engage_date = pd.Series(engage.astype(str)).where(stage != "Prospecting")
+            close_date = pd.Series(close.astype(str)).where(closed)
+            close_value = pd.Series(np.where(stage == "Won", won_values[rng.integers(0, len(won_values), size)], 0.0)).where(closed)
+
+            company_known = rng.random(size) >= p["company_missing_rate"]
+            yield pd.DataFrame({
+                "opportunity_id": np.char.add("O", np.arange(start + 1, stop + 1).astype(str)),
+                "sales_agent": self.agent_names[agents],
+                "product": self._choice(rng, p["product"], size),
+                "company": np.where(company_known, self.company_names[companies], None),
+                "deal_stage": stage,
+                "engage_date": engage_date,
+                "close_date": close_date,
+                "close_value": close_value,
+                "company_normalized": np.where(company_known, self.company_normalized[companies], None),
+                "agent_normalized": self.agent_normalized[agents],
+                "company_id": self.company_ids[companies],
+                "agent_id": self.agent_ids[agents],
+                "lead_id": self.lead_ids[leads],
+                "confidence_tag": "Exact Match",
+                "lead_id_valid": True,
+                "company_id_valid": company_known,
+                "agent_id_valid": True,
+            }, columns=SALES_COLUMNS)
+
+    def crm_chunks(self) -> Iterator[pd.DataFrame]:
+        p = self.profile["crm"]
+        values = np.array(p["value"])
+        for number, start, stop in self._chunks(self.n_deals):
+            rng, size = self._rng(4, number), stop - start
+            leads = rng.integers(0, self.n_leads, size)
+            companies = self.lead_company[leads]
+            agents = self.lead_agent[leads]
+            yield pd.DataFrame({
+                "deal_id": np.char.add("D", np.arange(start + 1, stop + 1).astype(str)),
+                "lead_id": self.lead_ids[leads],
+                "company_id": self.company_ids[companies],
+                "company_normalized": self.company_normalized[companies],
+                "agent_id": self.agent_ids[agents],
+                "agent_normalized": self.agent_normalized[agents],
+                "sales_agent": self.agent_names[agents],
+                "stage": self._choice(rng, p["stage"], size),
+                "value": values[rng.integers(0, len(values), size)],
+            }, columns=CRM_COLUMNS)
+
+    def write(self, out_dir: str) -> Dict[str, int]:
+        """Stream all five CSVs into `out_dir` and return their row counts."""
+        os.makedirs(out_dir, exist_ok=True)
+        tables = {
+            "Agent_Mapping.csv": iter([self.agent_mapping()]),
+            "Leads_Data.csv": self.leads_chunks(),
+            "Email_Logs.csv": self.email_chunks(),
+            "Sales_Pipeline.csv": self.sales_chunks(),
+            "CRM_Pipeline.csv": self.crm_chunks(),
+        }
+        counts = {}
+        for filename, chunks in tables.items():
+            path = os.path.join(out_dir, filename)
+            rows = 0
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                for i, chunk in enumerate(chunks):
+                    chunk.to_csv(f, index=False, header=(i == 0))
+                    rows += len(chunk)
+            counts[filename] = rows
+        return counts
+
+
+def generate(out_dir: str, n_leads: int, seed: int = 0, **kwargs) -> Dict[str, int]:
+    """Convenience wrapper: fit from the bundled data and write all files."""
+    return SyntheticDataGenerator(n_leads, seed=seed, **kwargs).write(out_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--leads", type=int, required=True)
+    parser.add_argument("--emails", type=int, help="Defaults to the bundled emails-per-lead ratio")
+    parser.add_argument("--opportunities", type=int, help="Sales_Pipeline rows (default: leads / 2)")
+    parser.add_argument("--deals", type=int, help="CRM_Pipeline rows")
+    parser.add_argument("--agents", type=int, default=107)
+    parser.add_argument("--leads-per-company", type=float, default=3.0)
+    parser.add_argument("--reply-rate", type=float, default=DEFAULT_REPLY_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=DATA_DIR, help="Directory to fit distributions from")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generator = SyntheticDataGenerator(
+        args.leads, n_emails=args.emails, n_opportunities=args.opportunities, n_deals=args.deals,
+        n_agents=args.agents, leads_per_company=args.leads_per_company, reply_rate=args.reply_rate,
+        seed=args.seed, profile=fit_profile(args.source), chunk_size=args.chunk_size,
+    )
+    counts = generator.write(args.out)
+    elapsed = time.perf_counter() - start
+    for filename, rows in counts.items():
+        print(f"{filename}: {rows:,} rows")
+    print(f"Generated {sum(counts.values()):,} rows in {elapsed:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ from typing import Dict, Any
 from datetime import datetime
 from langgraph.graph import StateGraph, END
 
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
 def create_crm_logger_graph():
     """Create CRM Logger workflow (no LLM required)"""
     workflow = StateGraph(Dict[str, Any])
@@ -21,7 +25,7 @@ def create_crm_logger_graph():
     return workflow.compile()
 
 def prepare_data(state: Dict[str, Any]) -> Dict[str, Any]:
-    print("\n=== prepare_data Step (CRM Logger) ===")
+    logger.debug("prepare_data step (CRM Logger)", extra=SAMPLED)
     return {
         **state,
         "status": "data_prepared"
@@ -29,7 +33,7 @@ def prepare_data(state: Dict[str, Any]) -> Dict[str, Any]:
 
 def generate_log(state: Dict[str, Any]) -> Dict[str, Any]:
     """Mock the final CRM event log and summarize"""
-    print("\n=== generate_log Step ===")
+    logger.debug("generate_log step", extra=SAMPLED)
     
     lead = state.get("lead", {})
     email_history = state.get("email_history", [])
@@ -7,6 +7,10 @@ import json
 from typing import Dict, Any
 from langgraph.graph import StateGraph, END
 
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
 def create_email_strategy_graph(llm, prompt_templates):
     """Create email strategy workflow"""
     workflow = StateGraph(Dict[str, Any])
@@ -22,7 +26,7 @@ def create_email_strategy_graph(llm, prompt_templates):
 
 def prepare_data(state):
     """Clean and validate data for single lead"""
-    print("\n=== prepare_data Step (Email Strategy) ===")
+    logger.debug("prepare_data step (Email Strategy)", extra=SAMPLED)
     
     lead = state.get("lead", {})
     if not lead:
@@ -37,7 +41,7 @@ def prepare_data(state):
 
 def generate_email(state, llm=None, prompt_templates=None):
     """Generate email using LLM for single lead"""
-    print("\n=== generate_email Step ===")
+    logger.debug("generate_email step", extra=SAMPLED)
     
     if not llm or not prompt_templates:
         return {**state, "status": "error", "error": "Missing LLM or prompts"}
@@ -74,7 +78,7 @@ def generate_email(state, llm=None, prompt_templates=None):
         }
         
     except Exception as e:
-        print(f"Error parsing response: {str(e)}")
+        logger.warning("Error parsing email response: %s", e)
         return {
             **state, 
             "status": "error", 
@@ -7,12 +7,20 @@ import json
 from typing import Dict, Any
 from langgraph.graph import StateGraph, END
 
-def create_followup_timing_graph(llm, prompt_templates):
-    """Create follow-up timing workflow"""
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
+def create_followup_timing_graph(llm, prompt_templates, send_times=None):
+    """Create follow-up timing workflow
+
+    With a `send_times` model (utils/send_time_model.py) the strategy is
+    predicted from the email logs without an LLM call.
+    """
     workflow = StateGraph(Dict[str, Any])
     
     workflow.add_node("prepare_data", prepare_data)
-    workflow.add_node("generate_strategy", lambda x: generate_strategy(x, llm, prompt_templates))
+    workflow.add_node("generate_strategy", lambda x: generate_strategy(x, llm, prompt_templates, send_times))
     
     workflow.add_edge("prepare_data", "generate_strategy")
     workflow.add_edge("generate_strategy", END)
@@ -22,7 +30,7 @@ def create_followup_timing_graph(llm, prompt_templates):
 
 def prepare_data(state: Dict[str, Any]) -> Dict[str, Any]:
     """Clean and prepare email data for analysis."""
-    print("\n=== prepare_data Step (Followup Timing) ===")
+    logger.debug("prepare_data step (Followup Timing)", extra=SAMPLED)
     
     lead = state.get("lead", {})
     email_history = state.get("email_history", [])
@@ -35,9 +43,20 @@ def prepare_data(state: Dict[str, Any]) -> Dict[str, Any]:
         "status": "data_prepared"
     }
 
-def generate_strategy(state: Dict[str, Any], llm=None, prompt_templates=None) -> Dict[str, Any]:
-    """Generate follow-up strategy using LLM."""
-    print("\n=== generate_strategy Step ===")
+def generate_strategy(state: Dict[str, Any], llm=None, prompt_templates=None, send_times=None) -> Dict[str, Any]:
+    """Generate follow-up strategy from the send-time model, or using LLM without one."""
+    logger.debug("generate_strategy step", extra=SAMPLED)
+    
+    if send_times is not None:
+        lead = state.get("lead", {})
+        strategy = send_times.strategy(lead.get("lead_id"), lead.get("device"))
+        return {
+            **state,
+            "timing": strategy["timing"],
+            "approach": strategy["approach"],
+            "engagement_prediction": strategy["engagement_prediction"],
+            "status": "completed"
+        }
     
     if not llm or not prompt_templates:
         return {**state, "status": "error", "error": "Missing LLM or prompts"}
@@ -85,7 +104,7 @@ def generate_strategy(state: Dict[str, Any], llm=None, prompt_templates=None) ->
         }
         
     except Exception as e:
-        print(f"Error parsing response: {str(e)}")
+        logger.warning("Error parsing timing response: %s", e)
         return {
             **state,
             "status": "error",
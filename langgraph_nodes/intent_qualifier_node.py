@@ -2,9 +2,13 @@ from typing import Dict, Any, List
 from langgraph.graph import StateGraph
 import json
 
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
 def prepare_data(state):
     """Clean and prepare individual lead and email data"""
-    print("\n=== prepare_data Step ===")
+    logger.debug("prepare_data step (Intent Qualifier)", extra=SAMPLED)
     
     lead = state.get("lead", {})
     emails = state.get("email_data", [])
@@ -53,7 +57,7 @@ def analyze_patterns(state):
 
 def generate_insights(state, llm=None, prompt_templates=None):
     """Generate precise intent scoring using LLM for a single lead"""
-    print("\n=== generating Intent Insights ===")
+    logger.debug("generate_insights step (Intent Qualifier)", extra=SAMPLED)
     
     if not llm or not prompt_templates:
         return {**state, "status": "error", "error": "Missing LLM or prompts"}
@@ -87,7 +91,7 @@ def generate_insights(state, llm=None, prompt_templates=None):
         }
         
     except Exception as e:
-        print(f"Error generating intent insights: {str(e)}")
+        logger.warning("Error generating intent insights: %s", e)
         return {
             **state,
             "status": "error",
@@ -1,10 +1,36 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langgraph.graph import StateGraph
 import json
+import re
+
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
+# Legal-form words dropped when normalizing company names
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "corp", "corporation", "co", "company", "plc", "gmbh", "sa", "ag"}
+
+def company_key(lead) -> Optional[str]:
+    """Normalized company of a lead, shared by every contact at the account (None if unknown)."""
+    name = lead.get("company_normalized") or lead.get("company")
+    if not isinstance(name, str):
+        return None
+    words = [w for w in re.sub(r"[^a-z0-9]+", " ", name.lower()).split() if w not in COMPANY_SUFFIXES]
+    key = " ".join(words)
+    return key if key and key not in ("unknown", "nan", "none") else None
+
+def _parse_json(response_text: str):
+    # Strip markdown syntax if LLM returns it
+    if response_text.startswith("```"):
+        start = response_text.find("{")
+        end = response_text.rfind("}") + 1
+        if start != -1 and end != 0:
+            response_text = response_text[start:end]
+    return json.loads(response_text)
 
 def prepare_data(state):
     """Prepare and clean individual lead data"""
-    print("\n=== prepare_data Step ===")
+    logger.debug("prepare_data step (Lead Research)", extra=SAMPLED)
     
     lead = state.get("lead", {})
     if not lead:
@@ -29,12 +55,13 @@ def prepare_data(state):
     return {
         **state,
         "lead": clean_lead,
+        "company_key": company_key(lead),
         "status": "data_prepared"
     }
 
 def analyze_patterns(state):
     """Pass-through enrichment for single lead"""
-    print("\n=== analyze_patterns Step ===")
+    logger.debug("analyze_patterns step (Lead Research)", extra=SAMPLED)
     
     lead = state.get("lead", {})
     if not lead:
@@ -45,9 +72,23 @@ def analyze_patterns(state):
         "status": "patterns_analyzed"
     }
 
-def generate_insights(state, llm=None, prompt_templates=None):
-    """Generate insights from a single lead using LLM."""
-    print("\n=== Generating Lead Research Insights ===")
+def analyze_company(state, llm, prompt_templates):
+    """Company-level part of the research, shared by every lead at the company."""
+    lead = state.get("lead", {})
+    company_data = {"company": lead.get("company", "")}
+    company_deals = (state.get("deal_context") or {}).get("company")
+    if company_deals:
+        company_data["deal_history"] = company_deals
+    prompt = prompt_templates["company_analysis"].format(company_data=json.dumps(company_data, indent=2))
+    return _parse_json(llm.generate_content(prompt).text.strip())
+
+def generate_insights(state, llm=None, prompt_templates=None, company_cache=None):
+    """Generate insights from a single lead using LLM.
+
+    With a `company_cache`, the company analysis comes from the cache (or is
+    made once and cached) and the LLM only assesses the contact.
+    """
+    logger.debug("generate_insights step (Lead Research)", extra=SAMPLED)
     
     if not llm or not prompt_templates:
         return {
@@ -59,33 +100,39 @@ def generate_insights(state, llm=None, prompt_templates=None):
         }
     
     try:
-        lead_data_json = json.dumps(state.get("lead", {}), indent=2)
+        lead_data = state.get("lead", {})
+        if state.get("deal_context"):
+            # The lead's opportunities in the sales and CRM pipelines
+            lead_data = {**lead_data, "deal_context": state["deal_context"]}
+        lead_data_json = json.dumps(lead_data, indent=2)
         
-        prompt = prompt_templates["generate_insights"].format(
-            lead_data=lead_data_json
-        )
+        company = {}
+        key = state.get("company_key")
+        if company_cache is not None and key and "person_insights" in prompt_templates:
+            analysis, _ = company_cache.get_or_compute(key, lambda: analyze_company(state, llm, prompt_templates))
+            company = {"company_analysis": analysis}
+            prompt = prompt_templates["person_insights"].format(
+                company_analysis=json.dumps(analysis, indent=2),
+                lead_data=lead_data_json
+            )
+        else:
+            prompt = prompt_templates["generate_insights"].format(
+                lead_data=lead_data_json
+            )
         
         response = llm.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Strip markdown syntax if LLM returns it
-        if response_text.startswith("```"):
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start != -1 and end != 0:
-                response_text = response_text[start:end]
-            
-        result = json.loads(response_text)
+        result = _parse_json(response.text.strip())
         
         return {
             **state,
+            **company,
             "status": "completed",
             "quality_indicators": result.get("quality_indicators", []),
             "recommendation": result.get("recommendation", {})
         }
         
     except Exception as e:
-        print(f"Error in generate_insights: {str(e)}")
+        logger.warning("Error in generate_insights: %s", e)
         return {
             **state,
             "status": "error",
@@ -104,11 +151,15 @@ def generate_insights(state, llm=None, prompt_templates=None):
             }
         }
 
-def create_lead_research_graph(llm, prompt_templates):
-    """Create the LangGraph workflow for individual lead research"""
+def create_lead_research_graph(llm, prompt_templates, company_cache=None):
+    """Create the LangGraph workflow for individual lead research.
+
+    `company_cache` (see backend api/company_research.py) shares company
+    analyses between leads of the same company.
+    """
     
     def generate_insights_with_llm(state):
-        return generate_insights(state, llm, prompt_templates)
+        return generate_insights(state, llm, prompt_templates, company_cache)
     
     workflow = StateGraph(state_schema=Dict[str, Any])
     
@@ -36,5 +36,70 @@ DO NOT:
 1. Add any markdown code blocks (e.g., ```json) around the response. Just output raw JSON.
 2. Include explanations or text outside the JSON.
 3. Ignore the provided lead data. Tailor the reasoning specifically to them.
+""",
+    "company_analysis": """You are the LeadResearch Agent, preparing an account-level analysis of a company several of our leads work at. It is shared by every contact at this company, so only assess the company itself.
+
+Company to analyze:
+{company_data}
+
+Generate the analysis in the following STRICT JSON format:
+
+{{
+    "industry": "B2B SaaS",
+    "company_fit": "High",
+    "fit_reasoning": "Mid-sized software vendor with an active sales team, a core part of our ICP.",
+    "segment": "Enterprise Tech",
+    "talking_points": ["Scaling outbound without adding headcount", "Pipeline visibility"]
+}}
+
+YOU MUST:
+1. Respond with ONLY a valid JSON object.
+2. "company_fit" must be one of "High", "Medium" or "Low".
+3. Base the analysis on the company name and its deal history with us, when provided.
+
+DO NOT:
+1. Add any markdown code blocks (e.g., ```json) around the response. Just output raw JSON.
+2. Include explanations or text outside the JSON.
+3. Discuss individual contacts.
+""",
+    "person_insights": """You are the LeadResearch Agent, qualifying one contact at a company we have already analyzed.
+
+Analysis of the contact's company (industry, fit and segment are settled there):
+{company_analysis}
+
+Contact to analyze:
+{lead_data}
+
+Generate an analysis of this contact in the following STRICT JSON format:
+
+{{
+    "quality_indicators": [
+        {{
+            "metric": "Role Fit",
+            "value": "High",
+            "reasoning": "A VP Sales owns the outbound process we improve."
+        }},
+        {{
+            "metric": "Website Engagement",
+            "value": "Medium",
+            "reasoning": "12 visits is above average, but time on site is normal."
+        }}
+    ],
+    "recommendation": {{
+        "segment": "Enterprise Tech",
+        "strategy": "Value-based approach focusing on scalability",
+        "expected_impact": 0.85
+    }}
+}}
+
+YOU MUST:
+1. Respond with ONLY a valid JSON object.
+2. The root keys must be exactly "quality_indicators" (array) and "recommendation" (object).
+3. "quality_indicators" should contain 2-3 metrics about the contact's role and behavior; reuse the company's fit and segment instead of re-deriving them.
+4. "expected_impact" must be a float between 0.0 and 1.0 representing the likelihood of conversion.
+
+DO NOT:
+1. Add any markdown code blocks (e.g., ```json) around the response. Just output raw JSON.
+2. Include explanations or text outside the JSON.
 """
-}
\ No newline at end of file
+}
@@ -0,0 +1,20 @@
+"""Shared test fixtures."""
+
+import pytest
+
+from benchmarks import run_benchmarks
+
+
+@pytest.fixture
+def use_workspace(monkeypatch):
+    """`run_benchmarks.use_workspace` undone at the end of the test, so later tests
+    never run against an earlier test's deleted workspace. It also replaces the
+    call inside `run_scenario`."""
+    point_at = run_benchmarks.use_workspace
+
+    def use(workspace: dict) -> dict:
+        point_at(workspace, setattr=monkeypatch.setattr)
+        return workspace
+
+    monkeypatch.setattr(run_benchmarks, "use_workspace", use)
+    return use
@@ -0,0 +1,63 @@
+"""Test per-lead cost and latency accounting."""
+
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.accounting import LeadAccount, record_llm_call, aggregate_costs
+
+
+def test_calls_are_charged_to_the_active_stage():
+    account = LeadAccount(queue_wait_seconds=0.5)
+    record_llm_call(10, 10)  # Outside any lead: ignored
+    with account.active():
+        with account.stage("intent"):
+            record_llm_call(100, 20, 1.5, retries=1)
+            record_llm_call(cache_hit=True)
+        with account.stage("logger"):
+            pass
+    record_llm_call(10, 10)
+
+    block = account.to_dict()
+    assert block["llm_calls"] == 2
+    assert block["queue_wait_seconds"] == 0.5
+    assert block["stages"]["intent"]["prompt_tokens"] == 100
+    assert block["stages"]["intent"]["completion_tokens"] == 20
+    assert block["stages"]["intent"]["retries"] == 1
+    assert block["stages"]["intent"]["cache_hits"] == 1
+    assert block["stages"]["logger"]["llm_calls"] == 0
+
+
+def test_aggregate_costs():
+    def record(region, source, tokens):
+        stages = {"intent": {"wall_seconds": 1.0, "llm_calls": 1, "prompt_tokens": tokens, "completion_tokens": 0}}
+        return {"lead": {"region": region, "lead_source": source},
+                "accounting": {"queue_wait_seconds": 0.0, "stages": stages}}
+
+    costs = aggregate_costs({"a": record("EU", "Web", 10), "b": record("EU", "Ads", 30), "c": record("US", "Web", 5)})
+    by_region = {row["region"]: row for row in costs["by"]["region"]}
+    assert costs["leads"] == 3
+    assert costs["totals"]["prompt_tokens"] == 45
+    assert by_region["EU"]["leads"] == 2
+    assert by_region["EU"]["tokens_per_lead"] == 20
+    assert aggregate_costs({"x": {"lead": {}}})["leads"] == 0
+
+
+def test_batch_cost_endpoint(tmp_path, use_workspace):
+    use_workspace(build_workspace(str(tmp_path), 12))
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    from main import app
+    client = TestClient(app)
+    res = client.get(f"/api/batch/{BATCH_ID}/cost")
+    assert res.status_code == 200
+    costs = res.json()
+    assert costs["leads"] == 12
+    assert costs["totals"]["llm_calls"] == 12 * 3 + costs["company_research"]["analyses"]
+    assert costs["totals"]["prompt_tokens"] > 0
+    stages = {row["stage"] for row in costs["by"]["stage"]}
+    assert stages == {"research", "intent", "message", "timing", "logger"}
+    assert sum(row["leads"] for row in costs["by"]["region"]) == 12
+
+    assert client.get("/api/batch/UNKNOWN/cost").status_code == 404
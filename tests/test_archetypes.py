@@ -0,0 +1,68 @@
+"""Test archetype bucketing and the fan-out of shared stage outputs."""
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.archetypes import Archetypes, quantile_buckets, seniority
+
+
+def test_leads_with_equal_buckets_share_an_archetype():
+    assert seniority(pd.Series(["CEO", "VP Sales", "Director of Marketing", "Sales Manager", "Analyst", None])).tolist() \
+        == [4, 3, 2, 1, 0, 0]
+    assert quantile_buckets(np.array([1.0, 2.0, 3.0, 4.0, np.nan]), 2).tolist() == [0, 0, 1, 1, -1]
+
+    leads = pd.DataFrame({
+        "lead_id": ["L1", "L2", "L3", "L4"],
+        "title": ["CTO", "CEO", "CTO", "Analyst"],
+        "region": ["EU", "EU", "EU", "EU"],
+        "lead_source": ["Google", "Google", "Google", "Google"],
+        "visits": [10, 11, 1, 10],
+        "time_on_site": [500, 510, 20, 500],
+        "pages_per_visit": [4, 4, 1, 4],
+    })
+    archetypes = Archetypes(leads, bins=2)
+    research = [archetypes.key("research", i) for i in leads.index]
+    assert research[0] == research[1] != research[2]
+    assert research[3] != research[0]
+    # Timing is predicted per lead without the LLM
+    assert archetypes.key("timing", 0) is None
+    assert archetypes.key("intent", 0) is None
+    # Same features at another company, or with deal context: another archetype
+    other = leads.assign(company=["Acme", "Globex", "Acme", "Acme"])
+    split = Archetypes(other, bins=2)
+    assert split.key("research", 0) != split.key("research", 1)
+    with_deals = Archetypes(leads.assign(company="Acme"), bins=2, deal_leads={1})
+    assert with_deals.key("research", 0) != with_deals.key("research", 1)
+    assert Archetypes(leads, bins=0).key("research", 0) is None
+
+
+def test_batch_runs_each_archetype_once(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 40)
+    use_workspace(workspace)
+    llm = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=llm, archetype_bins=1)
+
+    report = batch.get_batch_progress(BATCH_ID)["archetypes"]
+    assert report["bins"] == 1
+    research = report["stages"]["research"]
+    assert research["llm_runs"] == research["archetypes"] < 40
+    assert research["llm_runs"] + research["calls_saved"] == 40
+    assert report["calls_saved"] == research["calls_saved"]
+
+    costs = batch.get_batch_cost(BATCH_ID)
+    # Intent and message still run per lead
+    assert llm.calls == 40 * 2 + research["llm_runs"] + costs["company_research"]["analyses"]
+    assert costs["totals"]["archetype_hits"] == report["calls_saved"]
+
+    records = batch._intel_store().records(BATCH_ID)
+    assert all(record["status"] != "error" and record["timing"] for record in records.values())
+    # Fanned-out leads carry their own company's analysis
+    analyses = {}
+    for record in records.values():
+        assert record["company_analysis"]
+        analyses.setdefault(record["company_key"], []).append(record["company_analysis"])
+    assert all(all(a == group[0] for a in group) for group in analyses.values())
+    assert all(record["lead"]["lead_id"] == lead_id for lead_id, record in records.items())
@@ -0,0 +1,86 @@
+"""Test cancelling, pausing and prioritizing running batches."""
+
+import threading
+import time
+
+from fastapi import HTTPException
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.batch_control import SlotPool
+
+
+def test_slot_pool_serves_higher_priority_first():
+    pool = SlotPool(1)
+    assert pool.acquire(0)
+    order = []
+
+    def waiter(name, priority):
+        pool.acquire(priority)
+        order.append(name)
+        pool.release()
+
+    threads = [threading.Thread(target=waiter, args=args) for args in (("low", 0), ("high", 5))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    pool.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["high", "low"]
+
+
+def _wait_for(predicate, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _start_batch(tmp_path, n_leads, use_workspace):
+    use_workspace(build_workspace(str(tmp_path), n_leads))
+    llm = FakeOllamaWrapper(latency="fixed:0.01")
+    worker = threading.Thread(target=batch.process_batch_background, args=(BATCH_ID,), kwargs={"llm": llm})
+    worker.start()
+    from main import app
+    return worker, TestClient(app)
+
+
+def _processed():
+    try:
+        return batch.get_batch_progress(BATCH_ID).get("processed_count", 0)
+    except HTTPException:  # worker has not written progress yet
+        return 0
+
+
+def test_cancel_stops_a_running_batch(tmp_path, use_workspace):
+    worker, client = _start_batch(tmp_path, 400, use_workspace)
+    assert _wait_for(lambda: _processed() >= 5)
+    assert client.post(f"/api/batch/{BATCH_ID}/cancel").json()["state"] == "cancelled"
+    worker.join(20)
+
+    progress = batch.get_batch_progress(BATCH_ID)
+    assert progress["status"] == "cancelled"
+    assert progress["processed_count"] < 400
+    assert client.post(f"/api/batch/{BATCH_ID}/resume").status_code == 409
+
+
+def test_pause_holds_and_resume_finishes(tmp_path, use_workspace):
+    worker, client = _start_batch(tmp_path, 60, use_workspace)
+    assert _wait_for(lambda: _processed() >= 3)
+    assert client.post(f"/api/batch/{BATCH_ID}/pause").status_code == 200
+    time.sleep(0.5)
+    held = _processed()
+    time.sleep(0.5)
+    assert _processed() == held < 60
+    assert batch.LLM_SLOTS.in_use() == 0
+
+    assert client.post(f"/api/batch/{BATCH_ID}/priority", params={"priority": 3}).json()["priority"] == 3
+    client.post(f"/api/batch/{BATCH_ID}/resume")
+    worker.join(30)
+    progress = batch.get_batch_progress(BATCH_ID)
+    assert progress["status"] == "completed" and progress["priority"] == 3
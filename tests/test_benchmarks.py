@@ -0,0 +1,50 @@
+"""Test the offline benchmark harness and fake LLM."""
+
+import json
+
+import pytest
+
+from benchmarks.fake_llm import FakeOllamaWrapper, LatencyModel
+from benchmarks.run_benchmarks import run_scenario, compare_to_baseline, main
+from prompts.intent_qualifier_prompts import intent_qualifier_prompts
+
+
+def test_fake_llm_is_deterministic():
+    """Same seed and prompt must give the same schema-valid payload"""
+    prompt = intent_qualifier_prompts["generate_insights"].format(lead_data="{}", email_data="[]")
+    first = json.loads(FakeOllamaWrapper(seed=7).generate_content(prompt).text)
+    second = json.loads(FakeOllamaWrapper(seed=7).generate_content(prompt).text)
+    assert first == second
+    assert 0.0 <= first["intent_score"] <= 100.0
+    assert first["recommendation"]["urgency"] in ("High", "Medium", "Low")
+
+
+def test_latency_models():
+    assert LatencyModel("zero").sample() == 0.0
+    assert LatencyModel("fixed:0.25").sample() == 0.25
+    assert all(0.1 <= LatencyModel("uniform:0.1,0.2", seed=3).sample() <= 0.2 for _ in range(20))
+
+
+@pytest.mark.usefixtures("use_workspace")
+def test_small_scenario(tmp_path):
+    """Run the whole batch pipeline offline on a handful of leads"""
+    result = run_scenario(20, str(tmp_path), endpoint_repeats=1)
+    pipeline = result["pipeline"]
+    print(json.dumps(pipeline, indent=2))
+
+    assert pipeline["status"] == "completed"
+    assert pipeline["processed_count"] == 20
+    # Three LLM stage calls per lead (timing uses the send-time model) plus one analysis per company
+    assert pipeline["llm_calls"] == 20 * 3 + pipeline["company_analyses"]
+    assert 0 < pipeline["company_analyses"] < 20 and pipeline["company_hit_rate"] > 0
+    assert all(e["status"] == 200 for e in result["endpoints"].values())
+
+    # A run compared to itself never regresses
+    results = {"scenarios": {"20": result}}
+    assert compare_to_baseline(results, results, threshold=0.0) == []
+
+
+def test_sizes_over_their_time_budget_fail_the_run(tmp_path):
+    output = tmp_path / "results.json"
+    assert main(["--sizes", "5", "--timeout", "0", "--output", str(output)]) == 1
+    assert "timed out" in json.loads(output.read_text())["scenarios"]["5"]["error"]
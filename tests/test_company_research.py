@@ -0,0 +1,80 @@
+"""Test the company research cache shared by leads of the same company."""
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.accounting import LeadAccount
+from api.company_research import CompanyResearchCache
+from api.shared_state import StateStore
+from langgraph_nodes.lead_research_node import company_key
+
+
+def test_cache_is_shared_expires_and_refreshes(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    cache = CompanyResearchCache(store, "v1", ttl_seconds=60)
+    calls = []
+
+    def analyze():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"industry": "SaaS"}
+
+    account = LeadAccount()
+    results = []
+
+    def lookup():
+        with account.active(), account.stage("research"):
+            results.append(cache.get_or_compute("acme", analyze))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Concurrent leads of one company wait for a single analysis
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False] + [True] * 7
+    stage = account.to_dict()["stages"]["research"]
+    assert (stage["company_hits"], stage["company_misses"]) == (7, 1)
+
+    assert CompanyResearchCache(store, "v2").get("acme") is None
+    assert CompanyResearchCache(store, "v1", ttl_seconds=0).get("acme") is None
+    refreshed = CompanyResearchCache(store, "v1", refresh=True)
+    assert refreshed.get_or_compute("acme", analyze)[1] is False
+    assert refreshed.get_or_compute("acme", analyze)[1] is True
+    assert len(calls) == 2
+
+    assert company_key({"company": "Acme, Inc."}) == company_key({"company_normalized": "acme"}) == "acme"
+    assert company_key({"company": "Unknown"}) is None
+
+
+def test_batch_pays_one_analysis_per_company(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 40)
+    use_workspace(workspace)
+    llm = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=llm)
+
+    leads = pd.read_csv(os.path.join(workspace["batches_dir"], BATCH_ID, "Leads_Data.csv"))
+    companies = leads["company_normalized"].nunique()
+    assert companies < len(leads)
+    costs = batch.get_batch_cost(BATCH_ID)
+    assert costs["company_research"]["analyses"] == companies
+    assert costs["company_research"]["lookups"] == len(leads)
+    assert llm.calls == len(leads) * 3 + companies
+
+    record = batch._intel_store().get(leads["lead_id"].iloc[0])
+    assert record["company_analysis"]["company_fit"] in ("High", "Medium", "Low")
+
+    # A rerun with changed leads finds their companies analyzed already
+    leads["visits"] += 1
+    leads.to_csv(os.path.join(workspace["batches_dir"], BATCH_ID, "Leads_Data.csv"), index=False)
+    rerun = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=rerun)
+    assert batch.get_batch_cost(BATCH_ID)["company_research"]["hit_rate"] == 1.0
+    assert rerun.calls == len(leads) * 3
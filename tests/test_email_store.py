@@ -0,0 +1,48 @@
+"""Test the email log store with memory-mapped bodies."""
+
+import os
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from api import batch
+from utils.email_store import load_email_log, BODY_COLUMN
+
+
+def test_metadata_is_typed_and_bodies_are_lazy(tmp_path):
+    path = str(tmp_path / "Email_Logs.csv")
+    emails = pd.DataFrame({
+        "email_id": [1, 2, 3, 4],
+        "lead_id": ["L1", "L1", "L2", "L1"],
+        "opened": [1, 0, 1, 1],
+        "reply_status": ["replied", "none", "none", "replied"],
+        BODY_COLUMN: ["Hi Ana,\n\nQuick \"question\"?", None, "Olá — ça va?", "Short"],
+    })
+    emails.to_csv(path, index=False)
+
+    log = load_email_log(path)
+    assert BODY_COLUMN not in log.meta.columns
+    assert log.meta["opened"].dtype.itemsize == 1
+    assert str(log.meta["lead_id"].dtype) == "category"
+    assert not os.path.exists(tmp_path / "_Email_Logs.bodies.bin")
+
+    assert log.bodies[0] == "Hi Ana,\n\nQuick \"question\"?"
+    assert log.bodies.get([3, 2, 1]) == ["Short", "Olá — ça va?", ""]
+    replied = log.meta[log.meta["reply_status"] == "replied"]
+    assert log.with_bodies(replied)[BODY_COLUMN].tolist() == ["Hi Ana,\n\nQuick \"question\"?", "Short"]
+    assert load_email_log(path) is log
+
+    # A changed CSV gets new metadata and a rebuilt blob
+    emails.assign(**{BODY_COLUMN: ["a", "b", "c", "d"]}).to_csv(path, index=False)
+    os.utime(path, ns=(0, 10 ** 18))
+    assert load_email_log(path).bodies.get(range(4)) == ["a", "b", "c", "d"]
+    assert load_email_log(str(tmp_path / "missing.csv")) is None
+
+
+def test_batch_email_histories_carry_no_bodies(tmp_path):
+    workspace = build_workspace(str(tmp_path), 20)
+    emails_file = os.path.join(workspace["batches_dir"], BATCH_ID, "Email_Logs.csv")
+    histories = batch._email_histories(batch._email_metadata(emails_file))
+    emails = [email for history in histories.values() for email in history]
+    assert len(emails) == len(pd.read_csv(emails_file))
+    assert all(BODY_COLUMN not in email and isinstance(email["lead_id"], str) for email in emails)
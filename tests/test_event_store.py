@@ -0,0 +1,106 @@
+"""Test the time-ordered, persistable CRM logger event store."""
+
+from agents.crm_logger_agent import CRMLoggerAgent
+
+
+def _email(lead_id, email_id, sent_time, replied):
+    return {
+        "lead_id": lead_id,
+        "source_agent": "email_strategy",
+        "email_id": email_id,
+        "sent_time": sent_time,
+        "replied_time": "2024-01-10T00:00:00" if replied else None,
+    }
+
+
+def _fill(logger):
+    # Out of order on purpose
+    logger.process_event(_email("L1", "E2", "2024-01-05T09:00:00", replied=True))
+    logger.process_event(_email("L1", "E1", "2024-01-02T09:00:00", replied=False))
+    logger.process_event(_email("L1", "E3", "2024-01-03T09:00:00", replied=False))
+    logger.process_event({"lead_id": "L1", "source_agent": "followup_timing", "scheduled_time": "2024-02-01T10:00:00"})
+    logger.process_event({"lead_id": "L2", "event_type": "note", "source_agent": "manual",
+                          "timestamp": "2023-12-31T00:00:00", "data": {"text": "called"}})
+
+
+def _check(logger):
+    history = logger.get_lead_history("L1")
+    assert [e["data"].get("email_id") for e in history[:3]] == ["E1", "E3", "E2"]
+    timestamps = [e["timestamp"] for e in history]
+    assert timestamps == sorted(timestamps)
+
+    metrics = logger.get_lead_metrics("L1")
+    assert metrics["total_events"] == 4
+    assert metrics["event_counts"] == {"email_sent": 3, "followup_scheduled": 1}
+    assert metrics["email_metrics"]["total_replies"] == 1
+    assert abs(metrics["email_metrics"]["response_rate"] - 1 / 3) < 1e-9
+
+    timeline = logger.get_lead_timeline("L1")
+    assert timeline["first_contact"] == "2024-01-02T09:00:00"
+    assert timeline["last_email_sent"] == "2024-01-05T09:00:00"
+    assert timeline["next_scheduled_followup"] == "2024-02-01T10:00:00"
+
+    assert logger.get_lead_history("L2")[0]["data"] == {"text": "called"}
+    assert logger.get_lead_history("missing") == []
+    assert logger.get_lead_timeline("missing")["first_contact"] is None
+
+
+def test_events_are_time_ordered_with_incremental_summaries():
+    logger = CRMLoggerAgent()
+    _fill(logger)
+    _check(logger)
+    assert logger.process_event({"lead_id": "L3"})["status"] == "error"
+
+
+def test_saved_store_reopens_memory_mapped(tmp_path):
+    logger = CRMLoggerAgent()
+    _fill(logger)
+    logger.save(str(tmp_path))
+
+    reopened = CRMLoggerAgent(store_path=str(tmp_path))
+    assert reopened.store._mapped is not None
+    _check(reopened)
+
+    # New events still go in order next to the mapped ones
+    reopened.process_event(_email("L1", "E0", "2024-01-01T09:00:00", replied=True))
+    assert reopened.get_lead_history("L1")[0]["data"]["email_id"] == "E0"
+    assert reopened.get_lead_timeline("L1")["first_contact"] == "2024-01-01T09:00:00"
+    reopened.save(str(tmp_path))
+    assert CRMLoggerAgent(store_path=str(tmp_path)).get_lead_metrics("L1")["total_events"] == 5
+
+
+def test_bulk_ingestion_matches_per_event_processing():
+    import pandas as pd
+
+    emails = pd.DataFrame({
+        "lead_id": ["L1", "L2", "L1", None],
+        "email_id": [3, 4, 5, 6],
+        "subject": ["Hi,\nthere", "Intro", "Proposal", "x"],
+        "email_type": ["initial", "initial", "followup", "initial"],
+        "opened": [1, 0, 1, 1],
+        "engagement_score": [0.25, 0.5, 0.75, 0.0],
+        "sent_time": ["2024-01-03T09:00:00", "2024-01-01T09:00:00", "2024-01-02T09:00:00", "2024-01-01"],
+        "replied_time": ["2024-01-04T09:00:00", None, None, None],
+    })
+    followups = pd.DataFrame({"lead_id": ["L2"], "scheduled_time": ["2024-03-01T10:00:00"], "urgency_score": [80.0]})
+
+    bulk = CRMLoggerAgent()
+    result = bulk.process_events_bulk(emails, source_agent="email_strategy")
+    assert (result["processed"], result["rejected"]) == (3, 1)
+    bulk.process_events_bulk(followups.assign(source_agent="followup_timing"))
+
+    single = CRMLoggerAgent()
+    for event in emails.dropna(subset=["lead_id"]).to_dict("records"):
+        event["replied_time"] = event["replied_time"] if isinstance(event["replied_time"], str) else None
+        single.process_event({**event, "source_agent": "email_strategy"})
+    for event in followups.to_dict("records"):
+        single.process_event({**event, "source_agent": "followup_timing"})
+
+    for lead_id in ("L1", "L2"):
+        assert bulk.get_lead_metrics(lead_id) == single.get_lead_metrics(lead_id)
+        assert bulk.get_lead_timeline(lead_id)["next_scheduled_followup"] == \
+            single.get_lead_timeline(lead_id)["next_scheduled_followup"]
+        assert [e["data"] for e in bulk.get_lead_history(lead_id)] == \
+            [e["data"] for e in single.get_lead_history(lead_id)]
+    assert bulk.get_lead_timeline("L1") == single.get_lead_timeline("L1")
+    assert bulk.get_lead_history("L1")[1]["data"]["subject"] == "Hi,\nthere"
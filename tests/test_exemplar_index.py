@@ -0,0 +1,82 @@
+"""Test the retrieval index of successful emails used as drafting exemplars."""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from agents.email_strategy_agent import EmailStrategyAgent
+from utils.email_store import load_email_log, BODY_COLUMN
+from utils.exemplar_index import load_exemplar_index, successful
+
+
+def write_log(path):
+    pd.DataFrame({
+        "email_id": [1, 2, 3, 4, 5],
+        "subject": ["Cloud costs", "Data pipelines", "Hiring plans", "Data pipelines", "Budget review"],
+        "topic": ["Finance", "Engineering", "HR", "Engineering", "Finance"],
+        "stage": ["Proposal", "Prospecting", "Prospecting", "Prospecting", "Proposal"],
+        "sentiment": ["positive", "neutral", "positive", "neutral", "neutral"],
+        "opened": [1, 1, 1, 0, 1],
+        "reply_status": ["replied", "replied", "replied", "replied", "ignored"],
+        "engagement_score": [0.9, 0.4, 0.7, 1.0, 1.0],
+        BODY_COLUMN: [
+            "Cutting cloud spend for finance teams this quarter.",
+            "Your data engineering team could ship pipelines faster with automated reviews.",
+            "Scaling recruiting with fewer manual steps.",
+            "Data pipelines for data engineering teams.",
+            "Data engineering data pipelines budget.",
+        ],
+    }).to_csv(path, index=False)
+
+
+def test_search_ranks_successful_emails_by_similarity_and_keys(tmp_path):
+    path = str(tmp_path / "Email_Logs.csv")
+    write_log(path)
+    log = load_email_log(path)
+    index = load_exemplar_index(log)
+    # Unopened (4) and unanswered (5) emails are never exemplars
+    assert successful(log.meta).tolist() == [0, 1, 2]
+    assert len(index) == 3
+    assert load_exemplar_index(load_email_log(path)) is index
+
+    best = index.search("VP Data Engineering pipelines", k=2)
+    assert best[0]["email_id"] == 2
+    assert best[0]["email_text"].startswith("Your data engineering team")
+    assert best[0]["similarity"] > best[1]["similarity"]
+
+    # Matching key fields outweighs a weak text match
+    keyed = index.search("hello", k=3, stage="Proposal", sentiment="positive", industry="Retail")
+    assert keyed[0]["email_id"] == 1
+    # Ties go to the more engaging email
+    assert [e["email_id"] for e in index.search("unrelated", k=3)] == [1, 3, 2]
+    assert index.search("anything", k=0) == []
+
+
+def test_agent_prompts_with_relevant_exemplars(tmp_path):
+    path = str(tmp_path / "Email_Logs.csv")
+    write_log(path)
+    prompts = []
+
+    class RecordingLLM:
+        def generate_content(self, prompt):
+            prompts.append(prompt)
+            return SimpleNamespace(text=json.dumps({"subject": "Hi", "body": "Hello", "personalization": ["Role"]}))
+
+    agent = EmailStrategyAgent(RecordingLLM(), {"name": "Acme"})
+    agent.load_data(path)
+    email = agent.craft_email({"title": "Head of Data Engineering", "industry": "Software"},
+                              {"intent_signals": [{"signal": "Docs", "evidence": "Read pipeline docs"}]})
+    assert email["subject"] == "Hi"
+    examples = json.loads(prompts[0].split("do not copy):\n", 1)[1])
+    assert examples[0]["email_id"] == 2
+    assert len(examples) == 3
+
+    # A generated email log has replies to index
+    workspace = build_workspace(str(tmp_path / "bench"), 200)
+    log = load_email_log(os.path.join(workspace["batches_dir"], BATCH_ID, "Email_Logs.csv"))
+    index = load_exemplar_index(log)
+    assert 0 < len(index) < len(log)
+    assert all(e["similarity"] >= 0 for e in index.search("Manager follow up on pricing", k=5))
@@ -0,0 +1,50 @@
+"""Test incremental reprocessing of re-uploaded batches."""
+
+import os
+
+import pandas as pd
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.fingerprints import lead_fingerprint
+
+
+def test_fingerprint_ignores_formatting_and_outputs():
+    lead = {"lead_id": "L1", "visits": 5, "company": "Acme"}
+    emails = [{"email_id": 1, "opened": 1}]
+    base = lead_fingerprint(lead, emails, "v1")
+    assert lead_fingerprint({"lead_id": "L1", "visits": 5.0, "company": " Acme ", "status": "Ready"}, emails, "v1") == base
+    assert lead_fingerprint({**lead, "visits": 6}, emails, "v1") != base
+    assert lead_fingerprint(lead, emails + [{"email_id": 2}], "v1") != base
+    assert lead_fingerprint(lead, emails, "v2") != base
+
+
+def test_rerun_only_processes_changed_leads(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 30)
+    use_workspace(workspace)
+    first = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=first)
+    calls_per_lead = first.calls // 30
+
+    # Re-export with two changed rows
+    leads_file = os.path.join(workspace["batches_dir"], BATCH_ID, "Leads_Data.csv")
+    leads = pd.read_csv(leads_file)
+    leads.loc[[3, 17], "visits"] += 1
+    leads.to_csv(leads_file, index=False)
+
+    second = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=second)
+    progress = batch.get_batch_progress(BATCH_ID)
+    assert second.calls == 2 * calls_per_lead
+    assert progress["reused_count"] == 28 and progress["processed_count"] == 30
+
+    from main import app
+    # Reused leads carry an empty accounting block: the rerun only paid for two
+    cost = TestClient(app).get(f"/api/batch/{BATCH_ID}/cost").json()
+    assert cost["leads"] == 2
+
+    forced = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=forced, force=True)
+    assert forced.calls == first.calls
@@ -0,0 +1,93 @@
+"""Test batch-partitioned intel records, the cross-batch view and compaction."""
+
+import json
+import os
+
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace
+from api.intel_store import IntelStore, INTEL_DIR, LEGACY_BATCH
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _record(name, region, score, batch_id):
+    return {"lead": {"name": name, "company": "Acme", "region": region}, "intent_score": score, "batch_id": batch_id}
+
+
+def test_partitions_latest_view_and_compaction(tmp_path):
+    store = IntelStore(str(tmp_path))
+    store.put("B1", {"L1": _record("Ana", "EU", 10, "B1"), "L2": _record("Bo", "US", 20, "B1")})
+    store.put("B2", {"L2": _record("Bo", "APAC", 90, "B2"), "L3": _record("Cy", "US", 30, "B2")})
+
+    assert store.latest() == {"L1": "B1", "L2": "B2", "L3": "B2"}
+    assert [r["region"] for r in store.rows("B1")] == ["EU", "US"]
+    assert {r["lead_id"]: r["intent_score"] for r in store.rows()} == {"L1": 10, "L2": 90, "L3": 30}
+    assert store.get("L2")["intent_score"] == 90 and store.get("L2", "B1")["intent_score"] == 20
+
+    version = store.version("B1")
+    assert store.compact("B1")["leads"] == 2
+    assert store.is_compacted("B1") and store.version("B1") != version
+    assert not os.path.exists(os.path.join(str(tmp_path), INTEL_DIR, "B1.json"))
+    assert [r["region"] for r in store.rows("B1")] == ["EU", "US"]
+    assert store.get("L1")["lead"]["name"] == "Ana"
+    assert store.records("B1")["L2"]["intent_score"] == 20
+
+    # Patching a compacted batch turns it back into a plain partition
+    assert store.patch("L1", lambda record: record.update(status="Contacted"))
+    assert not store.is_compacted("B1")
+    assert store.get("L1")["status"] == "Contacted" and store.get("L2", "B1")["intent_score"] == 20
+
+
+def test_running_batch_journals_records_until_folded(tmp_path):
+    store = IntelStore(str(tmp_path))
+    store.put("B1", {"L1": _record("Ana", "EU", 10, "B1"), "L2": _record("Bo", "US", 20, "B1")})
+    store.compact("B1")
+    latest = os.path.getmtime(store.latest_path)
+    for lead_id, score in (("L2", 80), ("L3", 30)):
+        store.append("B2", {lead_id: _record(lead_id, "US", score, "B2")})
+
+    # Appends touch neither a partition nor _latest.json, yet read as the latest records
+    assert not os.path.exists(os.path.join(str(tmp_path), INTEL_DIR, "B2.json"))
+    assert os.path.getmtime(store.latest_path) == latest
+    assert store.latest() == {"L1": "B1", "L2": "B2", "L3": "B2"}
+    assert {r["lead_id"]: r["intent_score"] for r in store.rows()} == {"L1": 10, "L2": 80, "L3": 30}
+    assert store.get("L2")["intent_score"] == 80 and store.get("L2", "B1")["intent_score"] == 20
+    assert store.patch("L3", lambda record: record.update(status="Contacted"))
+    assert store.records("B2")["L3"]["status"] == "Contacted"
+
+    # Appending to a compacted batch (a replay) overlays its compacted records
+    store.append("B1", {"L1": _record("Ana", "EU", 50, "B1")})
+    assert store.get("L1")["intent_score"] == 50 and store.is_compacted("B1")
+
+    assert store.fold("B2") == 2 and store.fold("B2") == 0
+    assert store.fold("B1") == 1 and not store.is_compacted("B1")
+    assert _load_json(os.path.join(str(tmp_path), INTEL_DIR, "_latest.json")) == {"L1": "B1", "L2": "B2", "L3": "B2"}
+    assert store.records("B2")["L3"]["status"] == "Contacted"
+    assert {r["lead_id"]: r["intent_score"] for r in store.rows()} == {"L1": 50, "L2": 80, "L3": 30}
+
+
+def test_legacy_db_is_split_and_ledger_filters_by_batch(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 1)
+    use_workspace(workspace)
+    legacy = {"L1": _record("Ana", "EU", 10, "B1"), "L2": _record("Bo", "US", 20, "B2"), "L3": _record("Cy", "US", 5, None)}
+    with open(os.path.join(workspace["outputs_dir"], "intel_db.json"), "w") as f:
+        json.dump(legacy, f)
+
+    from main import app
+    client = TestClient(app)
+    assert client.get("/api/leads").json()["total"] == 3
+    assert IntelStore(workspace["outputs_dir"]).latest()["L3"] == LEGACY_BATCH
+
+    page = client.get("/api/leads", params={"batch_id": "B2"}).json()
+    assert [row["lead_id"] for row in page["data"]] == ["L2"]
+    assert client.get("/api/leads/stats", params={"batch_id": "B1"}).json()["total"] == 1
+    assert client.get("/api/leads/filters", params={"batch_id": "B2"}).json()["regions"] == ["US"]
+    assert client.get("/api/leads", params={"batch_id": "../x"}).status_code == 400
+
+    assert client.post("/api/batch/B1/compact").json()["compacted"]
+    assert client.get("/api/leads/L1", params={"batch_id": "B1"}).json()["profile"]["name"] == "Ana"
+    assert client.post("/api/batch/NOPE/compact").status_code == 404
@@ -0,0 +1,99 @@
+"""Test the materialized intel report views and their ETags."""
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.intel_views import build_report_view
+from api.intel_store import IntelStore, ledger_row
+
+
+def test_build_report_view():
+    state = {
+        "lead": {"name": "Ana Diaz", "company": "Acme", "title": "CTO", "visits": 3},
+        "quality_indicators": [{"metric": "Industry Match", "value": "High"}],
+        "email_preview": "Hi Ana,\n\nWorth a call?",
+        "timing": {"recommended_date": "2025-04-10", "send_time": "09:00"},
+        "intent_score": 80,
+    }
+    view = build_report_view("L1", state)
+    assert view["agents"]["research"]["signals"] == ["Industry Match: High"]
+    assert view["agents"]["message"]["draft"] == [
+        {"type": "text", "content": "Hi Ana,"}, {"type": "br"}, {"type": "text", "content": "Worth a call?"}]
+    assert view["agents"]["timing"]["recommended"] == "2025-04-10 09:00"
+    assert view["agents"]["intent"]["score"] == 80
+    assert view["agents"]["message"]["subject"] == "Checking in"
+    assert view["status"] == "Ready"
+
+
+def test_details_served_from_view_with_etag(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 5)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+    lead_id = next(iter(IntelStore(workspace["outputs_dir"]).records(BATCH_ID)))
+
+    from main import app
+    client = TestClient(app)
+    first = client.get(f"/api/leads/{lead_id}")
+    assert first.status_code == 200
+    assert first.json()["lead_id"] == lead_id
+    etag = first.headers["etag"]
+
+    cached = client.get(f"/api/leads/{lead_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # Patching the status rebuilds the view, so the old ETag no longer matches
+    assert client.patch(f"/api/leads/{lead_id}/status", json={"status": "Contacted"}).status_code == 200
+    updated = client.get(f"/api/leads/{lead_id}", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.json()["status"] == "Contacted"
+    assert updated.headers["etag"] != etag
+
+    assert client.get("/api/leads/NOPE").status_code == 404
+
+
+def test_detail_status_matches_ledger_row(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 3)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+    store = IntelStore(workspace["outputs_dir"])
+    lead_id, record = next(iter(store.records(BATCH_ID).items()))
+    # The pipeline's node status stays internal
+    assert record["status"] == "completed"
+
+    from main import app
+    client = TestClient(app)
+    detail = client.get(f"/api/leads/{lead_id}").json()
+    assert detail["status"] == ledger_row(lead_id, record)["status"] == "Ready"
+
+    client.patch(f"/api/leads/{lead_id}/status", json={"status": "Contacted"})
+    record = store.records(BATCH_ID)[lead_id]
+    assert client.get(f"/api/leads/{lead_id}").json()["status"] == ledger_row(lead_id, record)["status"] == "Contacted"
+
+
+def test_status_patch_touches_only_the_lead_and_its_batch(tmp_path, monkeypatch, use_workspace):
+    workspace = build_workspace(str(tmp_path), 4)
+    use_workspace(workspace)
+    shutil.copytree(os.path.join(workspace["batches_dir"], BATCH_ID), os.path.join(workspace["batches_dir"], "OTHER"))
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+    batch.process_batch_background("OTHER", llm=FakeOllamaWrapper(), force=True)
+    first_csv = os.path.join(workspace["batches_dir"], BATCH_ID, "Leads_Data.csv")
+    before = os.path.getmtime(first_csv)
+
+    from main import app
+    client = TestClient(app)
+    monkeypatch.setattr(IntelStore, "rows", lambda *args: pytest.fail("the patch loaded the whole ledger"))
+    lead_id = next(iter(IntelStore(workspace["outputs_dir"]).records("OTHER")))
+    row = client.patch(f"/api/leads/{lead_id}/status", json={"status": "Contacted", "intent_score": 55}).json()
+    assert (row["lead_id"], row["status"], row["intent_score"]) == (lead_id, "Contacted", 55.0)
+
+    leads = pd.read_csv(os.path.join(workspace["batches_dir"], "OTHER", "Leads_Data.csv")).set_index("lead_id")
+    assert (leads.at[lead_id, "status"], leads.at[lead_id, "intent_score"]) == ("Contacted", 55.0)
+    assert os.path.getmtime(first_csv) == before
+    assert client.patch("/api/leads/NOPE/status", json={"status": "Contacted"}).status_code == 404
@@ -0,0 +1,77 @@
+"""Test the value-first processing order of batch leads."""
+
+import importlib
+
+import pandas as pd
+import pytest
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch, lead_ordering
+from api.lead_ordering import order_leads
+
+
+@pytest.fixture
+def batch_dir(tmp_path):
+    pd.DataFrame({
+        "deal_id": ["D1", "D2", "D3", "D4"],
+        "lead_id": ["L2", "L3", "L3", "L4"],
+        "stage": ["Proposal", "Closed Won", "Prospecting", "Negotiation"],
+        "value": [5000, 90000, 1000, 5000],
+    }).to_csv(tmp_path / "CRM_Pipeline.csv", index=False)
+    pd.DataFrame({
+        "opportunity_id": ["O1", "O2", "O3"],
+        "lead_id": ["L1", "L3", "L2"],
+        "deal_stage": ["Engaging", "Won", "Prospecting"],
+        "close_value": [70000, 3000, 2000],
+        "lead_id_valid": [False, True, True],
+    }).to_csv(tmp_path / "Sales_Pipeline.csv", index=False)
+    pd.DataFrame({
+        "lead_id": ["L1", "L1", "L4"],
+        "opened": [1, 0, 1],
+        "engagement_score": [20, 29, 5],
+    }).to_csv(tmp_path / "Email_Logs.csv", index=False)
+    return str(tmp_path)
+
+
+LEADS = pd.DataFrame({
+    "lead_id": ["L1", "L2", "L3", "L4"],
+    "visits": [9, 1, 2, 8],
+    "time_on_site": [300.0, 10.0, 20.0, 200.0],
+    "pages_per_visit": [5.0, 1.0, 1.0, 4.0],
+})
+
+
+def test_policies_order_leads(batch_dir):
+    order, value = order_leads(LEADS, batch_dir, "value")
+    # Closed deals and rows not validly matched to the lead do not count;
+    # equal pipeline value falls back to behavior
+    assert LEADS["lead_id"].iloc[order].tolist() == ["L2", "L4", "L3", "L1"]
+    assert value.tolist() == [0.0, 7000.0, 1000.0, 5000.0]
+
+    order, _ = order_leads(LEADS, batch_dir, "engagement")
+    assert LEADS["lead_id"].iloc[order].tolist() == ["L1", "L4", "L3", "L2"]
+
+    order, value = order_leads(LEADS, batch_dir, "file")
+    assert order.tolist() == [0, 1, 2, 3] and value.sum() == 4
+
+    with pytest.raises(ValueError):
+        order_leads(LEADS, batch_dir, "random")
+
+
+def test_unknown_default_ordering_fails_at_import(monkeypatch):
+    monkeypatch.setenv("BATCH_ORDERING", "random")
+    with pytest.raises(ValueError, match="BATCH_ORDERING"):
+        importlib.reload(lead_ordering)
+    monkeypatch.delenv("BATCH_ORDERING")
+    importlib.reload(lead_ordering)
+    assert lead_ordering.DEFAULT_ORDERING == "value"
+
+
+def test_progress_reports_processed_value(tmp_path, use_workspace):
+    use_workspace(build_workspace(str(tmp_path), 40))
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper(), ordering="behavior")
+    progress = batch.get_batch_progress(BATCH_ID)
+    assert progress["ordering"] == "behavior"
+    assert progress["value_total"] > 0
+    assert progress["value_processed"] == progress["value_total"] and progress["value_percent"] == 100
@@ -0,0 +1,114 @@
+"""Test the ledger query engine against the pandas implementation it replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import BACKEND_DIR  # noqa: F401  (puts `api` on sys.path)
+from api.leads_index import LeadsIndex, InvalidCursor
+
+
+def make_leads(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "lead_id": [f"L{i:04d}" for i in range(n)],
+        "name": [f"Person {i}" for i in range(n)],
+        "company": rng.choice(["Acme", "Globex", "Initech", "Umbrella"], n),
+        "title": rng.choice(["CTO", "VP Sales", "Analyst"], n),
+        "region": rng.choice(["EMEA", "APAC", "NA"], n),
+        "lead_source": rng.choice(["Web", "Referral", "Ads"], n),
+        "visits": rng.integers(0, 10, n),
+        "intent_score": rng.integers(0, 100, n).astype(float),
+    })
+    df.loc[::17, "intent_score"] = np.nan
+    return df
+
+
+def reference(df, search=None, region=None, lead_source=None, sort_by=None, sort_dir="asc"):
+    if search:
+        mask = (df["name"].str.lower().str.contains(search) | df["company"].str.lower().str.contains(search)
+                | df["title"].str.lower().str.contains(search))
+        df = df[mask]
+    if region:
+        df = df[df["region"].str.lower() == region.lower()]
+    if lead_source:
+        df = df[df["lead_source"].str.lower() == lead_source.lower()]
+    if sort_by:
+        df = df.sort_values(by=sort_by, ascending=sort_dir == "asc", kind="stable")
+    return df["lead_id"].tolist()
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"sort_by": "intent_score", "sort_dir": "desc"},
+    {"sort_by": "company"},
+    {"region": "emea", "sort_by": "visits", "sort_dir": "desc"},
+    {"region": "NA", "lead_source": "Web", "sort_by": "intent_score"},
+    {"search": "cto", "sort_by": "name"},
+])
+def test_pages_and_cursors_match_reference(params):
+    df = make_leads()
+    index = LeadsIndex(df.to_dict("records"))
+    expected = reference(df, **params)
+
+    paged = []
+    for page in range(1, 40):
+        result = index.query(page=page, page_size=25, **params)
+        assert result["total"] == len(expected)
+        paged += [r["lead_id"] for r in result["data"]]
+    assert paged == expected
+
+    walked, cursor = [], None
+    while True:
+        result = index.query(page_size=25, cursor=cursor, **params)
+        walked += [r["lead_id"] for r in result["data"]]
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    assert walked == expected
+
+
+def test_bad_cursors():
+    index = LeadsIndex(make_leads().to_dict("records"))
+    cursor = index.query(page_size=10, sort_by="visits")["next_cursor"]
+    with pytest.raises(InvalidCursor):
+        index.query(cursor=cursor, sort_by="intent_score")
+    with pytest.raises(InvalidCursor):
+        index.query(cursor="not-a-cursor")
+    assert index.query(region="nowhere")["total"] == 0
+    assert LeadsIndex([]).query()["total"] == 0
+
+
+def test_ledger_applies_journaled_rows_during_a_batch(tmp_path, monkeypatch, use_workspace):
+    from starlette.testclient import TestClient
+    from benchmarks.fake_llm import FakeOllamaWrapper
+    from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+    from api import batch
+    from api.intel_store import IntelStore
+    from main import app
+
+    use_workspace(build_workspace(str(tmp_path), 20))
+    client = TestClient(app)
+    loads = []
+    rows = IntelStore.rows
+    monkeypatch.setattr(IntelStore, "rows", lambda self, batch_id=None: loads.append(batch_id) or rows(self, batch_id))
+    update_batch_progress = batch.update_batch_progress
+    totals = []
+
+    def poll_on_progress(batch_id, progress):
+        update_batch_progress(batch_id, progress)
+        for scope in (None, BATCH_ID):
+            params = {"page_size": 100, "sort_by": "intent_score", "batch_id": scope}
+            totals.append(client.get("/api/leads", params={k: v for k, v in params.items() if v}).json()["total"])
+
+    monkeypatch.setattr(batch, "update_batch_progress", poll_on_progress)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    # One load per scope while the batch ran; later polls only read the journal's new lines
+    assert totals[-2:] == [20, 20] and totals[0] < 20
+    assert len(loads) == 2 and set(loads) == {None, BATCH_ID}
+
+    # After the batch folds its journal, the ledger is rebuilt once and matches the store
+    served = client.get("/api/leads", params={"page_size": 100, "sort_by": "intent_score"}).json()["data"]
+    expected = LeadsIndex(IntelStore(batch.OUTPUTS_DIR).rows()).query(page_size=100, sort_by="intent_score")["data"]
+    assert served == expected and len(loads) == 4
@@ -0,0 +1,119 @@
+"""Test LLM cassette record/replay."""
+
+import json
+import os
+import itertools
+import shutil
+
+import pytest
+
+from benchmarks.fake_llm import FakeOllamaWrapper
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from api import batch, llm
+from api.cassette import LLMCassette, CASSETTE_FILENAME
+from api.intel_store import IntelStore, INTEL_DIR
+from prompts.intent_qualifier_prompts import intent_qualifier_prompts
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.text = json.dumps(payload)
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def fake_ollama(monkeypatch):
+    """Stand in for the Ollama HTTP API; answers differ on every call"""
+    fake_llm = FakeOllamaWrapper()
+    counter = itertools.count()
+
+    def post(url, **kwargs):
+        payload = fake_llm._payload(kwargs["json"]["prompt"])
+        payload["call"] = next(counter)
+        return FakeResponse({"response": json.dumps(payload)})
+
+    monkeypatch.setattr(llm.requests, "post", post)
+    return counter
+
+
+def test_record_then_replay(tmp_path, monkeypatch):
+    fake_ollama(monkeypatch)
+    path = os.path.join(tmp_path, CASSETTE_FILENAME)
+
+    recorder = llm.OllamaWrapper("test-model", cassette=LLMCassette(path, "record"))
+    recorded = [recorder.generate_content(p).text for p in ("first prompt", "second prompt", "first prompt")]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("replay must not call the LLM")
+    monkeypatch.setattr(llm.requests, "post", fail)
+
+    cassette = LLMCassette(path, "replay")
+    player = llm.OllamaWrapper("test-model", cassette=cassette)
+    replayed = [player.generate_content(p).text for p in ("first prompt", "second prompt", "first prompt")]
+    assert replayed == recorded
+    assert cassette.hits == 3
+
+    # Unknown prompts and other models are misses, answered with an empty payload
+    assert player.generate_content("never recorded").text == "{}"
+    assert llm.OllamaWrapper("other-model", cassette=cassette).generate_content("first prompt").text == "{}"
+    assert cassette.misses == 2
+
+
+def test_benchmark_payloads_from_cassette(tmp_path, monkeypatch):
+    fake_ollama(monkeypatch)
+    path = os.path.join(tmp_path, CASSETTE_FILENAME)
+    recorder = llm.OllamaWrapper("test-model", cassette=LLMCassette(path, "record"))
+    prompt = intent_qualifier_prompts["generate_insights"].format(lead_data="{}", email_data="[]")
+    recorded = json.loads(recorder.generate_content(prompt).text)
+
+    fake = FakeOllamaWrapper(cassette_path=path)
+    assert json.loads(fake.generate_content(prompt + " another lead").text) == recorded
+
+
+def test_batch_replay_is_deterministic(tmp_path, monkeypatch, use_workspace):
+    fake_ollama(monkeypatch)
+    workspace = build_workspace(str(tmp_path), 15)
+    use_workspace(workspace)
+    intel_dir = os.path.join(workspace["outputs_dir"], INTEL_DIR)
+
+    cassettes = []
+
+    class RecordedCassette(LLMCassette):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            cassettes.append(self)
+
+    monkeypatch.setattr(batch, "LLMCassette", RecordedCassette)
+
+    def run(mode):
+        shutil.rmtree(intel_dir, ignore_errors=True)
+        # Forced, as /replay does: every stage must be answered by the cassette, not the stage memo
+        batch.process_batch_background(BATCH_ID, cassette_mode=mode, force=True)
+        intel = IntelStore(workspace["outputs_dir"]).records(BATCH_ID)
+        return {lead: (s["intent_score"], s["subject"], s["timing"]) for lead, s in intel.items()}
+
+    recorded = run("record")
+    assert os.path.exists(os.path.join(workspace["batches_dir"], BATCH_ID, CASSETTE_FILENAME))
+    monkeypatch.setattr(llm.requests, "post", lambda *args, **kwargs: pytest.fail("replay called the LLM"))
+    for _ in range(2):
+        assert run("replay") == recorded
+        assert cassettes[-1].hits > 0 and cassettes[-1].misses == 0
+
+
+def test_recording_ignores_warm_caches(tmp_path, monkeypatch, use_workspace):
+    counter = fake_ollama(monkeypatch)
+    workspace = build_workspace(str(tmp_path), 10)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID)  # warms the stage memo, fingerprints and company cache
+
+    before = next(counter)
+    batch.process_batch_background(BATCH_ID, cassette_mode="record")
+    calls = next(counter) - before - 1
+    path = os.path.join(workspace["batches_dir"], BATCH_ID, CASSETTE_FILENAME)
+    assert calls > 0
+    assert len(list(LLMCassette(path, "replay").entries())) == calls
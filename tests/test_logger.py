@@ -0,0 +1,80 @@
+"""Test the structured logging subsystem."""
+
+import io
+import json
+import logging
+
+from utils.logger import configure_logging, shutdown_logging, get_logger, log_context, SAMPLED
+
+
+class Expensive:
+    """Counts how often a log argument is rendered"""
+    renders = 0
+
+    def __str__(self):
+        Expensive.renders += 1
+        return "expensive"
+
+
+def capture(**kwargs):
+    stream = io.StringIO()
+    configure_logging(stream=stream, force=True, module_levels={}, **kwargs)
+    return stream
+
+
+def records(stream):
+    shutdown_logging()  # Flush the background writer
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_context_fields_and_levels():
+    stream = capture(level="INFO", fmt="json")
+    logger = get_logger("tests.logger")
+    with log_context(batch_id="B1", lead_id="L7"):
+        logger.info("lead done")
+    logger.warning("outside")
+
+    Expensive.renders = 0
+    logger.debug("skipped %s", Expensive())
+
+    logged = records(stream)
+    configure_logging(force=True)
+
+    assert [r["msg"] for r in logged] == ["lead done", "outside"]
+    assert logged[0]["batch_id"] == "B1" and logged[0]["lead_id"] == "L7"
+    assert "lead_id" not in logged[1]
+    # Disabled debug lines never render their arguments
+    assert Expensive.renders == 0
+
+
+def test_step_lines_are_sampled_per_lead():
+    stream = capture(level="DEBUG", fmt="json", sample_rate=0.5)
+    logger = get_logger("tests.logger.steps")
+    for i in range(200):
+        with log_context(lead_id=f"L{i}"):
+            logger.debug("prepare_data step", extra=SAMPLED)
+            logger.debug("generate step", extra=SAMPLED)
+            logger.debug("always kept")
+
+    logged = records(stream)
+    configure_logging(force=True)
+
+    kept = {}
+    for r in logged:
+        kept.setdefault(r["lead_id"], []).append(r["msg"])
+    assert len(kept) == 200
+    sampled = [lead for lead, msgs in kept.items() if len(msgs) == 3]
+    # Roughly half the leads keep all their step lines, the rest keep none
+    assert 60 < len(sampled) < 140
+    assert all(len(msgs) in (1, 3) for msgs in kept.values())
+
+
+def test_module_levels():
+    stream = capture(level="WARNING", fmt="json")
+    logging.getLogger("tests.verbose").setLevel("DEBUG")
+    get_logger("tests.verbose").debug("verbose module")
+    get_logger("tests.quiet").info("quiet module")
+    logged = records(stream)
+    logging.getLogger("tests.verbose").setLevel(logging.NOTSET)
+    configure_logging(force=True)
+    assert [r["msg"] for r in logged] == ["verbose module"]
@@ -0,0 +1,75 @@
+"""Test the lead -> opportunity join index over the sales and CRM pipelines."""
+
+import os
+
+import pandas as pd
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from utils.opportunity_index import load_opportunity_index
+
+
+def test_join_honors_validity_flags(tmp_path):
+    sales_path, crm_path = str(tmp_path / "Sales_Pipeline.csv"), str(tmp_path / "CRM_Pipeline.csv")
+    pd.DataFrame({
+        "opportunity_id": ["O1", "O2", "O3"],
+        "sales_agent": ["Ann", "Bo", "Ann"],
+        "company": ["Acme", "Acme", "Initech"],
+        "deal_stage": ["Won", "Engaging", "Lost"],
+        "engage_date": ["2017-01-01", "2017-05-01", "2017-03-01"],
+        "close_date": ["2017-02-01", None, "2017-04-01"],
+        "close_value": [100.0, None, 0.0],
+        "company_id": ["C1", "C1", "C2"],
+        "lead_id": ["L1", "L1", "L2"],
+        "lead_id_valid": [True, True, False],
+        "company_id_valid": [True, False, True],
+    }).to_csv(sales_path, index=False)
+    pd.DataFrame({
+        "deal_id": ["D1"], "lead_id": ["L1"], "company_id": ["C1"], "company_normalized": ["acme"],
+        "agent_id": ["SA1"], "sales_agent": ["Cy"], "stage": ["Proposal"], "value": [500],
+    }).to_csv(crm_path, index=False)
+
+    index = load_opportunity_index(sales_path, crm_path)
+    assert [o["opportunity_id"] for o in index.opportunities("L1")] == ["O2", "O1", "D1"]
+    # lead_id_valid=False: the deal only counts for its company
+    assert index.opportunities("L2") == ()
+    assert [o["opportunity_id"] for o in index.company_opportunities("C2")] == ["O3"]
+    # company_id_valid=False: the deal is not attributed to C1
+    assert [o["opportunity_id"] for o in index.company_opportunities("C1")] == ["O1", "D1"]
+
+    context = index.context("L1", "C1")
+    assert (context["opportunities"], context["open"], context["won"]) == (3, 2, 1)
+    assert (context["open_value"], context["won_value"]) == (500.0, 100.0)
+    assert context["recent"][0] == {"source": "sales", "opportunity_id": "O2", "stage": "Engaging",
+                                    "engage_date": "2017-05-01", "company": "Acme", "sales_agent": "Bo"}
+    assert context["company"]["opportunities"] == 2
+    assert index.context("L9") is None
+    assert load_opportunity_index(sales_path, crm_path) is index
+    assert load_opportunity_index(str(tmp_path / "missing.csv"), None).context("L1") is None
+
+
+def test_batch_leads_carry_deal_context(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 30)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    batch_dir = os.path.join(workspace["batches_dir"], BATCH_ID)
+    index = batch._opportunities(batch_dir)
+    lead_id = next(l for l in pd.read_csv(os.path.join(batch_dir, "Leads_Data.csv"))["lead_id"]
+                   if index.opportunities(l))
+
+    from main import app
+    client = TestClient(app)
+    deals = client.get(f"/api/leads/{lead_id}/deals", params={"batch_id": BATCH_ID})
+    assert deals.status_code == 200
+    body = deals.json()
+    assert body["deal_context"]["opportunities"] == len(body["opportunities"]) == len(index.opportunities(lead_id))
+    cached = client.get(f"/api/leads/{lead_id}/deals", params={"batch_id": BATCH_ID},
+                        headers={"If-None-Match": deals.headers["etag"]})
+    assert cached.status_code == 304
+    assert client.get(f"/api/leads/{lead_id}/deals", params={"batch_id": ".."}).status_code == 400
+
+    record = batch._intel_store().get(lead_id)
+    assert record["deal_context"] == body["deal_context"]
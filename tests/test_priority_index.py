@@ -0,0 +1,89 @@
+"""Test the dashboard's priority target index."""
+
+import pytest
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.intel_store import IntelStore
+from api.priority_index import PriorityIndex, PRIORITY_INDEX, parse_weights
+
+
+def _record(name, intent_score, signals=(), visits=0):
+    return {"lead": {"name": name, "visits": visits}, "intent_score": intent_score,
+            "key_signals": [{"signal": text, "strength": strength} for text, strength in signals]}
+
+
+def test_index_keeps_top_targets_sorted():
+    index = PriorityIndex(parse_weights("signal_strength=10,visits=1,pages_per_visit=0,time_on_site=0"))
+    index.upsert("L1", _record("Ana", 50, [("Visited pricing", "low"), ("Asked for demo", "high")]))
+    index.upsert("L2", _record("Bo", 70))
+    index.upsert("L3", _record("Cy", 10, visits=5))
+
+    top = index.top(2)
+    assert [t["lead_id"] for t in top] == ["L2", "L1"]
+    assert top[1]["score"] == 50 + 12.5 and top[1]["signal"] == "Asked for demo"
+    assert top[0]["signal"] == "Intent score 70"
+
+    index.upsert("L3", _record("Cy", 90, visits=5))
+    assert [t["lead_id"] for t in index.top(3)] == ["L3", "L2", "L1"]
+    index.sync([("L1", _record("Ana", 50))])
+    assert [t["lead_id"] for t in index.top(3)] == ["L1"]
+
+    with pytest.raises(ValueError):
+        parse_weights("charisma=3")
+
+
+def test_priority_targets_follow_batch_results_and_patches(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 40)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    from main import app
+    client = TestClient(app)
+    targets = client.get("/api/dashboard/priority-targets", params={"limit": 5}).json()["targets"]
+    expected = sorted((PRIORITY_INDEX.target(lead_id, record) for lead_id, record in
+                       IntelStore(workspace["outputs_dir"]).latest_records()),
+                      key=lambda t: (-t["score"], t["lead_id"]))[:5]
+    assert [t["lead_id"] for t in targets] == [t["lead_id"] for t in expected]
+    assert all(t["signals"] or t["signal"].startswith("Intent score") for t in targets)
+
+    last = client.get("/api/dashboard/priority-targets", params={"limit": 40}).json()["targets"][-1]
+    client.patch(f"/api/leads/{last['lead_id']}/status", json={"intent_score": 10000})
+    assert client.get("/api/dashboard/priority-targets").json()["targets"][0]["lead_id"] == last["lead_id"]
+
+
+def test_polls_during_a_batch_do_not_resync(tmp_path, monkeypatch, use_workspace):
+    workspace = build_workspace(str(tmp_path), 20)
+    use_workspace(workspace)
+    from main import app
+    client = TestClient(app)
+
+    loads = []
+    latest_records = IntelStore.latest_records
+    monkeypatch.setattr(IntelStore, "latest_records", lambda self: loads.append(1) or latest_records(self))
+    polled = []
+    update_batch_progress = batch.update_batch_progress
+
+    def poll_on_progress(batch_id, progress):
+        update_batch_progress(batch_id, progress)
+        polled.append(client.get("/api/dashboard/priority-targets").json()["targets"])
+
+    client.get("/api/dashboard/priority-targets")
+    assert len(loads) == 1
+    monkeypatch.setattr(batch, "update_batch_progress", poll_on_progress)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    # The index follows the batch's own writes without re-reading the store
+    assert len(polled) > 20 and len(polled[-1]) == 6
+    lead_id = polled[-1][-1]["lead_id"]
+    client.patch(f"/api/leads/{lead_id}/status", json={"intent_score": 10000})
+    assert client.get("/api/dashboard/priority-targets").json()["targets"][0]["lead_id"] == lead_id
+    assert len(loads) == 1
+
+    # A write this process did not make is picked up by a full sync
+    store = IntelStore(workspace["outputs_dir"])
+    store.put("other-batch", {"L-other": _record("Zed", 1e6)})
+    assert client.get("/api/dashboard/priority-targets").json()["targets"][0]["lead_id"] == "L-other"
+    assert len(loads) == 2
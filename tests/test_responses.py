@@ -0,0 +1,50 @@
+"""Test conditional GETs, compression and JSON serialization of the API."""
+
+import gzip
+import json
+
+import numpy as np
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.responses import dumps
+
+
+def test_dumps_handles_numpy():
+    payload = {"score": np.float64(0.5), "count": np.int64(3), "values": np.arange(2), 1: "key"}
+    assert json.loads(dumps(payload)) == {"score": 0.5, "count": 3, "values": [0, 1], "1": "key"}
+
+
+def test_polled_endpoints_revalidate_and_compress(tmp_path, use_workspace):
+    use_workspace(build_workspace(str(tmp_path), 60))
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    from main import app
+    client = TestClient(app)
+    for path in ("/api/leads?page_size=50", "/api/leads/stats", "/api/dashboard/stats",
+                 f"/api/batch/{BATCH_ID}/progress"):
+        first = client.get(path)
+        assert first.status_code == 200, path
+        assert "etag" in first.headers and "last-modified" in first.headers
+
+        by_etag = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+        assert by_etag.status_code == 304, path
+        assert by_etag.content == b""
+        by_date = client.get(path, headers={"If-Modified-Since": first.headers["last-modified"]})
+        assert by_date.status_code == 304, path
+
+    # Another query string is another representation
+    other = client.get("/api/leads?page_size=10", headers={"If-None-Match": first.headers["etag"]})
+    assert other.status_code == 200
+
+    # Large JSON bodies are gzipped for clients that accept it, small ones are not
+    raw = client.get("/api/leads?page_size=50", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers.get("content-encoding") == "gzip"
+    assert len(raw.json()["data"]) == 50
+    small = client.get(f"/api/batch/{BATCH_ID}/progress", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    plain = client.get("/api/leads?page_size=50", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(gzip.compress(plain.content)) < len(plain.content)
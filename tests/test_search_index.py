@@ -0,0 +1,79 @@
+"""Test the Ledger's inverted search index."""
+
+import pandas as pd
+
+from benchmarks import BACKEND_DIR  # noqa: F401  (puts `api` on sys.path)
+from api.search_index import LeadSearchIndex
+from api.leads_index import LeadsIndex
+
+
+LEADS = [
+    {"lead_id": "L1", "name": "Ana Diaz", "company": "Acme Corp", "title": "CTO", "intent_score": 40.0},
+    {"lead_id": "L2", "name": "Diana Analyst", "company": "Globex", "title": "Data Analyst", "intent_score": 90.0},
+    {"lead_id": "L3", "name": "Bob Stone", "company": "Initech", "title": "VP Sales", "intent_score": 70.0},
+    {"lead_id": "L4", "name": "Anastasia Ray", "company": "Acme Corp", "title": "Engineer", "intent_score": 10.0},
+]
+
+
+def build():
+    index = LeadSearchIndex()
+    for lead in LEADS:
+        index.upsert(lead["lead_id"], lead)
+    return index
+
+
+def test_match_quality():
+    index = build()
+    scores = index.search("ana")
+    # Exact token beats prefix, which beats infix ("diana")
+    assert scores["L1"] > scores["L2"] > 0
+    assert scores["L4"] < scores["L1"]
+    assert "L3" not in scores
+    assert set(index.search("acme ana")) == {"L1", "L4"}
+    assert index.search("stone bob") == {"L3": 6.0}
+    assert index.search("") == {}
+
+
+def test_fuzzy_matching():
+    index = build()
+    assert index.search("initeck") == {}
+    assert set(index.search("initeck", fuzzy=True)) == {"L3"}
+
+
+def test_incremental_updates():
+    index = build()
+    index.upsert("L3", {"name": "Bob Stone", "company": "Hooli", "title": "VP Sales"})
+    assert index.search("initech") == {}
+    assert set(index.search("hooli")) == {"L3"}
+    index.remove("L1")
+    assert "L1" not in index.search("acme")
+    index.sync(LEADS[1:2])
+    assert len(index) == 1
+
+
+def test_ledger_ranks_by_relevance_then_intent():
+    df = pd.DataFrame(LEADS)
+    ledger = LeadsIndex(df.to_dict("records"))
+    result = ledger.query(search="ana")
+    # L1 (exact) first; L2 (prefix "analyst" + infix "diana") before L4 (prefix) on intent
+    assert [r["lead_id"] for r in result["data"]] == ["L1", "L2", "L4"]
+
+    first = ledger.query(search="ana", page_size=1)
+    second = ledger.query(search="ana", page_size=1, cursor=first["next_cursor"])
+    assert second["data"][0]["lead_id"] == "L2"
+
+
+class NoScan(list):
+    def __iter__(self):
+        raise AssertionError("the vocabulary must not be scanned")
+
+
+def test_two_letter_infix_uses_bigrams():
+    index = build()
+    index._vocab = NoScan(index._vocab)
+    # "ia" is inside diaz, diana and anastasia
+    assert set(index.search("ia")) == {"L1", "L2", "L4"}
+    assert set(index.search("an")) == {"L1", "L2", "L4"}
+    index.upsert("L4", {"name": "Ray", "company": "Hooli", "title": "Engineer"})
+    assert set(index.search("ia")) == {"L1", "L2"}
+    assert "ia" in index._bigrams and "as" not in index._bigrams  # only anastasia had it
@@ -0,0 +1,89 @@
+"""Test the statistical send-time model and the LLM-free timing stage."""
+
+import os
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from utils.send_time_model import SendTimeModel, load_send_time_model
+
+
+def emails(lead_id, workday, work_hour, replied, n, device="desktop"):
+    return pd.DataFrame({
+        "lead_id": [lead_id] * n,
+        "device": [device] * n,
+        "workday": [workday] * n,
+        "work_hour": [work_hour] * n,
+        "opened": [1] * n,
+        "reply_status": ["replied" if replied else "ignored"] * n,
+        "engagement_score": [20.0 if replied else 5.0] * n,
+        "email_text": ["Hi,\n\nfollowing up"] * n,
+    })
+
+
+def test_smoothed_windows_and_incremental_refresh(tmp_path):
+    log = pd.concat([
+        emails("L1", 1, 0, True, 4),
+        emails("L1", 1, 1, False, 4),
+        emails("L2", 1, 1, True, 6, device="mobile"),
+        emails("L3", 0, 1, False, 2, device="mobile"),
+        emails("L4", 1, 1, False, 12),
+    ], ignore_index=True)
+    model = SendTimeModel(log)
+    # L1 replies in the evening; L3 has no replies and leans on its segment (mobile)
+    assert model.predict("L1")["window"] == (1, 0)
+    l3 = model.predict("L3")
+    assert (l3["level"], l3["device"], l3["window"]) == ("lead", "mobile", (1, 1))
+    assert 0 < l3["reply_rate"] < model.predict("L2")["reply_rate"] < 1
+    assert model.predict("L9", device="mobile")["level"] == "segment"
+    assert model.predict("L9")["level"] == "global"
+
+    strategy = model.strategy("L1", today=date(2025, 4, 11))  # a Friday
+    assert strategy["timing"]["recommended_date"] == "2025-04-14"
+    assert strategy["timing"]["send_time"] == "18:30"
+    # Leads replying above average get a softer approach than those below it
+    assert model.strategy("L2")["approach"]["type"] == "soft_nudge"
+    assert model.strategy("L4")["approach"]["type"] == "social_proof"
+
+    path = str(tmp_path / "Email_Logs.csv")
+    log.to_csv(path, index=False)
+    loaded = load_send_time_model(path)
+    assert loaded.version == model.version
+    assert load_send_time_model(path) is loaded
+
+    # Appended rows are folded into the same model
+    emails("L3", 0, 1, True, 6, device="mobile").to_csv(path, mode="a", header=False, index=False)
+    refreshed = load_send_time_model(path)
+    assert refreshed is loaded and refreshed.emails == len(log) + 6
+    assert refreshed.predict("L3")["window"] == (0, 1)
+    assert refreshed.version == SendTimeModel(pd.read_csv(path)).version
+
+    # A rewritten log is refitted
+    log.iloc[:4].to_csv(path, index=False)
+    assert load_send_time_model(path).emails == 4
+    assert load_send_time_model(str(tmp_path / "missing.csv")).emails == 0
+
+
+def test_batch_timing_needs_no_llm_call(tmp_path, use_workspace):
+    workspace = build_workspace(str(tmp_path), 20)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    costs = batch.get_batch_cost(BATCH_ID)
+    timing = next(row for row in costs["by"]["stage"] if row["stage"] == "timing")
+    assert timing["llm_calls"] == 0
+
+    emails_file = os.path.join(workspace["batches_dir"], BATCH_ID, "Email_Logs.csv")
+    model = load_send_time_model(emails_file)
+    for lead_id, record in batch._intel_store().records(BATCH_ID).items():
+        prediction = model.predict(lead_id)
+        assert record["engagement_prediction"]["response_probability"] == prediction["reply_rate"]
+        assert record["timing"]["send_time"]
+
+    # Not memoized: the recommended date is relative to the day of the run
+    assert batch._stage_memo("fake-llm").key("timing", {"lead": {"lead_id": lead_id}}) is None
+    plan = batch.plan_batch(BATCH_ID, force=True)
+    assert "timing" not in plan["stages"]
@@ -0,0 +1,60 @@
+"""Test the cross-process state shared by API workers."""
+
+import json
+import multiprocessing
+
+from starlette.testclient import TestClient
+
+from benchmarks import BACKEND_DIR  # noqa: F401  (puts `api` on sys.path)
+from benchmarks.run_benchmarks import build_workspace
+from api.shared_state import StateStore, update_json
+
+WORKERS, INCREMENTS = 4, 50
+
+
+def _bump_json(path, worker):
+    for _ in range(INCREMENTS):
+        update_json(path, lambda data: data.__setitem__("count", data.get("count", 0) + 1))
+
+
+def _bump_store(path, worker):
+    store = StateStore(path)
+    for i in range(INCREMENTS):
+        store.merge("counters", "shared", {f"w{worker}": i + 1})
+
+
+def _run_workers(target, *args):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=target, args=(*args, worker)) for worker in range(WORKERS)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+        assert proc.exitcode == 0
+
+
+def test_update_json_is_atomic_across_processes(tmp_path):
+    path = str(tmp_path / "intel_db.json")
+    _run_workers(_bump_json, path)
+    with open(path) as f:
+        assert json.load(f) == {"count": WORKERS * INCREMENTS}
+
+
+def test_state_store_merges_compose_across_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    _run_workers(_bump_store, path)
+    assert StateStore(path).get("counters", "shared") == {f"w{w}": INCREMENTS for w in range(WORKERS)}
+
+
+def test_agent_status_is_read_from_the_store(tmp_path, use_workspace):
+    use_workspace(build_workspace(str(tmp_path), 5))
+    from main import app
+    client = TestClient(app)
+
+    assert client.post("/api/agents/run/intent_qualifier", json={}).status_code == 200
+    # A fresh store on the same database stands in for another worker process
+    stored = StateStore(str(tmp_path / "outputs" / "state.db")).get("agent_status", "intent_qualifier")
+    assert stored["status"] == "completed"
+    agents = {a["id"]: a for a in client.get("/api/agents/status").json()["agents"]}
+    assert agents["intent_qualifier"]["status"] == "completed"
+    assert agents["lead_research"]["status"] == "idle"
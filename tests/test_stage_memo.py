@@ -0,0 +1,38 @@
+"""Test that reruns only recompute the stages whose inputs changed."""
+
+from starlette.testclient import TestClient
+
+from benchmarks.run_benchmarks import build_workspace, BATCH_ID
+from benchmarks.fake_llm import FakeOllamaWrapper
+from api import batch
+from api.intel_store import IntelStore
+from prompts.email_strategy_prompts import email_strategy_prompts
+
+
+def test_prompt_change_reruns_only_its_stage(tmp_path, monkeypatch, use_workspace):
+    workspace = build_workspace(str(tmp_path), 30)
+    use_workspace(workspace)
+    batch.process_batch_background(BATCH_ID, llm=FakeOllamaWrapper())
+
+    from main import app
+    client = TestClient(app)
+    plan = client.get(f"/api/batch/{BATCH_ID}/plan", params={"model": "fake-llm"}).json()
+    assert plan["reused_leads"] == 30 and plan["llm_calls"] == 0
+
+    monkeypatch.setitem(email_strategy_prompts, "craft_email",
+                        email_strategy_prompts["craft_email"] + "\nKeep the email under 120 words.")
+    plan = client.get(f"/api/batch/{BATCH_ID}/plan", params={"model": "fake-llm"}).json()
+    assert plan["leads_to_run"] == 30
+    assert {stage: counts["run"] for stage, counts in plan["stages"].items()} == \
+        {"research": 0, "intent": 0, "message": 30}
+    assert plan["llm_calls"] == 30
+
+    rerun = FakeOllamaWrapper()
+    batch.process_batch_background(BATCH_ID, llm=rerun)
+    assert rerun.calls == plan["llm_calls"]
+    record = next(iter(IntelStore(workspace["outputs_dir"]).records(BATCH_ID).values()))
+    stages = record["accounting"]["stages"]
+    assert stages["research"]["memo_hits"] == 1 and stages["message"]["llm_calls"] == 1
+
+    forced = client.get(f"/api/batch/{BATCH_ID}/plan", params={"model": "fake-llm", "force": True}).json()
+    assert forced["llm_calls"] == 3 * 30
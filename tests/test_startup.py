@@ -0,0 +1,28 @@
+"""Test that the API starts without importing its heavy dependencies."""
+
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import BACKEND_DIR
+
+HEAVY_MODULES = ("pandas", "numpy", "langgraph", "requests", "dotenv")
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "0.5"))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_import_main_skips_heavy_dependencies():
+    env = {**os.environ, "API_WARMUP": "0"}
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe["loaded"] == []
+    assert probe["seconds"] < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,40 @@
+"""Test the synthetic dataset generator."""
+
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic_data import SyntheticDataGenerator, fit_profile, EMAIL_COLUMNS, SALES_COLUMNS
+
+
+def test_generated_files_share_keys(tmp_path):
+    """Every foreign key must resolve to a generated lead, company or agent"""
+    counts = SyntheticDataGenerator(500, n_emails=2000, seed=1, chunk_size=300).write(str(tmp_path))
+    print(counts)
+    assert counts["Leads_Data.csv"] == 500
+    assert counts["Email_Logs.csv"] == 2000
+
+    leads = pd.read_csv(os.path.join(tmp_path, "Leads_Data.csv"))
+    emails = pd.read_csv(os.path.join(tmp_path, "Email_Logs.csv"))
+    sales = pd.read_csv(os.path.join(tmp_path, "Sales_Pipeline.csv"))
+    crm = pd.read_csv(os.path.join(tmp_path, "CRM_Pipeline.csv"))
+    agents = pd.read_csv(os.path.join(tmp_path, "Agent_Mapping.csv"))
+
+    assert list(emails.columns) == EMAIL_COLUMNS
+    assert list(sales.columns) == SALES_COLUMNS
+    assert leads["lead_id"].is_unique
+    assert emails["email_id"].is_unique
+    for frame in (emails, sales, crm):
+        assert frame["lead_id"].isin(leads["lead_id"]).all()
+        assert frame["company_id"].isin(leads["company_id"]).all()
+    assert emails["agent_id"].dropna().isin(agents["agent_id"]).all()
+    assert crm["agent_id"].isin(agents["agent_id"]).all()
+
+
+def test_generation_is_seedable():
+    profile = fit_profile()
+    first = pd.concat(SyntheticDataGenerator(300, seed=5, profile=profile).email_chunks())
+    second = pd.concat(SyntheticDataGenerator(300, seed=5, profile=profile).email_chunks())
+    other = pd.concat(SyntheticDataGenerator(300, seed=6, profile=profile).email_chunks())
+    assert first.equals(second)
+    assert not first.equals(other)
@@ -1 +1 @@
-
+"""Shared utilities for the multi_ai project"""
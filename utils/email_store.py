@@ -0,0 +1,165 @@
+"""Email log storage with lazily loaded bodies
+
+Email_Logs.csv carries the full `email_text` of every email, while most
+readers only need the metadata columns (lead_id, opened, reply_status, ...).
+`load_email_log` splits the file in two:
+
+- the metadata as a compact typed DataFrame (low-cardinality text columns
+  as categoricals, integer columns downcast), parsed once per version of
+  the CSV and cached in-process;
+- the bodies in a blob file next to the CSV (`_<name>.bodies.bin`, the
+  UTF-8 texts back to back, plus an offsets array in `_<name>.bodies.npy`),
+  built on first use and memory-mapped, so a body is only read when a
+  prompt asks for it.
+
+Row `i` of the metadata is body `i`.
+"""
+
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+BODY_COLUMN = "email_text"
+BUILD_CHUNK_ROWS = 50000
+# A text column becomes categorical when it has at most this share of distinct values
+CATEGORY_MAX_RATIO = 0.5
+CACHE_SIZE = 4
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _source_version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _blob_paths(path: str):
+    directory, name = os.path.split(path)
+    stem = os.path.splitext(name)[0]
+    base = os.path.join(directory, f"_{stem}.bodies")
+    return base + ".bin", base + ".npy", base + ".json"
+
+
+def _compact(meta: pd.DataFrame) -> pd.DataFrame:
+    """Categoricals for repetitive text columns, smallest integer dtypes for integer columns."""
+    for column in meta.columns:
+        values = meta[column]
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            meta[column] = pd.to_numeric(values, downcast="integer")
+        elif (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)) and len(values):
+            if values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+                meta[column] = values.astype("category")
+    return meta
+
+
+def read_email_metadata(path: str) -> pd.DataFrame:
+    """Every column of an email log except the bodies, typed compactly."""
+    header = pd.read_csv(path, nrows=0).columns
+    return _compact(pd.read_csv(path, usecols=[c for c in header if c != BODY_COLUMN]))
+
+
+class EmailBodies:
+    """Memory-mapped email bodies of one email log, built from the CSV on first access."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = None
+        self._mapped = None
+
+    def _open(self):
+        with self._lock:
+            if self._offsets is not None:
+                return
+            blob_path, offsets_path, header_path = _blob_paths(self.path)
+            version = _source_version(self.path)
+            try:
+                with open(header_path, "r") as f:
+                    fresh = json.load(f).get("source") == version
+            except (OSError, ValueError):
+                fresh = False
+            if not fresh:
+                self._build(blob_path, offsets_path, header_path, version)
+            self._offsets = np.load(offsets_path, mmap_mode="r")
+            if os.path.getsize(blob_path):
+                with open(blob_path, "rb") as f:
+                    self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _build(self, blob_path: str, offsets_path: str, header_path: str, version: str):
+        pid = os.getpid()
+        header = pd.read_csv(self.path, nrows=0).columns
+        offsets = [0]
+        with open(f"{blob_path}.{pid}.tmp", "wb") as out:
+            if BODY_COLUMN in header:
+                for chunk in pd.read_csv(self.path, usecols=[BODY_COLUMN], chunksize=BUILD_CHUNK_ROWS):
+                    for text in chunk[BODY_COLUMN].tolist():
+                        raw = text.encode("utf-8") if isinstance(text, str) else b""
+                        out.write(raw)
+                        offsets.append(offsets[-1] + len(raw))
+            else:
+                offsets.extend([0] * len(pd.read_csv(self.path, usecols=[0])))
+        with open(f"{offsets_path}.{pid}.tmp", "wb") as f:
+            np.save(f, np.asarray(offsets, dtype=np.int64))
+        os.replace(f"{blob_path}.{pid}.tmp", blob_path)
+        os.replace(f"{offsets_path}.{pid}.tmp", offsets_path)
+        # Written last: marks the blob files as matching this version of the CSV
+        with open(f"{header_path}.{pid}.tmp", "w") as f:
+            json.dump({"source": version, "count": len(offsets) - 1}, f)
+        os.replace(f"{header_path}.{pid}.tmp", header_path)
+
+    def __len__(self):
+        self._open()
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        self._open()
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        if start == end:
+            return ""
+        return self._mapped[start:end].decode("utf-8")
+
+    def get(self, rows) -> List[str]:
+        return [self[int(row)] for row in rows]
+
+
+class EmailLog:
+    """Typed metadata of an email log plus its lazily read bodies."""
+
+    def __init__(self, path: str, meta: pd.DataFrame):
+        self.path = path
+        self.meta = meta
+        self.bodies = EmailBodies(path)
+
+    def __len__(self):
+        return len(self.meta)
+
+    def with_bodies(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """`rows` (a slice of `meta`) with the email_text column filled in."""
+        return rows.assign(**{BODY_COLUMN: self.bodies.get(rows.index)})
+
+
+def load_email_log(path: str) -> Optional[EmailLog]:
+    """The email log at `path` (None when the file does not exist), cached per version of the file."""
+    try:
+        version = _source_version(path)
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(path)
+            return cached[1]
+    log = EmailLog(path, read_email_metadata(path))
+    with _cache_lock:
+        _cache[path] = (version, log)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return log
@@ -0,0 +1,163 @@
+"""Retrieval index of successful emails, used as exemplars when drafting
+
+Successful emails (opened and replied to) of an email log are indexed once
+per version of the log: each one becomes a TF-IDF vector of hashed word
+unigrams and bigrams of its subject, topic and body, stored as postings
+(feature -> rows, weights) sorted by feature. A query is scored against only
+the postings of its own features, so finding the top-k exemplars of a lead
+costs milliseconds instead of a scan of the log.
+
+The score mixes the cosine similarity of the texts with exact matches on the
+key fields (stage, topic, sentiment and industry) the query names; a log
+without one of those columns (Email_Logs has no industry) just leaves that
+key to the text similarity.
+"""
+
+import math
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.email_store import EmailLog
+
+HASH_BUCKETS = 1 << 20
+KEY_FIELDS = ("stage", "topic", "sentiment", "industry")
+# Share of the score that comes from matching key fields rather than text similarity
+KEY_WEIGHT = 0.5
+REPLIED = ("replied", "yes", "true", "1")
+EXEMPLAR_FIELDS = ("email_id", "subject", "stage", "topic", "sentiment", "engagement_score")
+CACHE_SIZE = 4
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def features(text: str) -> Counter:
+    """Hashed word unigram and bigram counts of a text."""
+    tokens = _TOKEN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return Counter(zlib.crc32(gram.encode("utf-8")) % HASH_BUCKETS for gram in grams)
+
+
+def successful(meta: pd.DataFrame) -> np.ndarray:
+    """Row positions of the emails that were opened and replied to."""
+    opened = pd.to_numeric(meta["opened"], errors="coerce").fillna(0).to_numpy() > 0 \
+        if "opened" in meta.columns else np.zeros(len(meta), dtype=bool)
+    if "reply_status" in meta.columns:
+        replied = meta["reply_status"].astype(str).str.strip().str.lower().isin(REPLIED).to_numpy()
+    else:
+        replied = np.zeros(len(meta), dtype=bool)
+    return np.flatnonzero(opened & replied)
+
+
+def _key(value) -> Optional[str]:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+def _text(*parts) -> str:
+    return " ".join(str(part) for part in parts if _key(part) is not None)
+
+
+class ExemplarIndex:
+    """Top-k successful emails of a log most similar to a lead."""
+
+    def __init__(self, log: EmailLog):
+        self.log = log
+        self.rows = successful(log.meta)
+        meta = log.meta.iloc[self.rows]
+        self.keys = {field: np.array([_key(v) for v in meta[field].tolist()], dtype=object)
+                     for field in KEY_FIELDS if field in meta.columns}
+        self.engagement = pd.to_numeric(meta.get("engagement_score", pd.Series(0.0, index=meta.index)),
+                                        errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+        counts = [features(_text(subject, topic, body)) for subject, topic, body in zip(
+            meta.get("subject", pd.Series("", index=meta.index)).tolist(),
+            meta.get("topic", pd.Series("", index=meta.index)).tolist(),
+            log.bodies.get(self.rows),
+        )]
+        document_frequency = Counter(feature for count in counts for feature in count)
+        n = len(counts)
+        self.idf = {feature: math.log((1 + n) / (1 + df)) + 1.0 for feature, df in document_frequency.items()}
+
+        feature_ids, row_ids, weights = [], [], []
+        for row, count in enumerate(counts):
+            vector = {feature: (1.0 + math.log(tf)) * self.idf[feature] for feature, tf in count.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            for feature, weight in vector.items():
+                feature_ids.append(feature)
+                row_ids.append(row)
+                weights.append(weight / norm)
+        order = np.argsort(np.asarray(feature_ids, dtype=np.int64), kind="stable")
+        self._features = np.asarray(feature_ids, dtype=np.int64)[order]
+        self._rows = np.asarray(row_ids, dtype=np.int64)[order]
+        self._weights = np.asarray(weights, dtype=float)[order]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _similarity(self, text: str) -> np.ndarray:
+        vector = {feature: (1.0 + math.log(tf)) * self.idf[feature]
+                  for feature, tf in features(text).items() if feature in self.idf}
+        scores = np.zeros(len(self.rows))
+        if not vector:
+            return scores
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        query = np.fromiter(vector, dtype=np.int64)
+        starts = np.searchsorted(self._features, query, side="left")
+        stops = np.searchsorted(self._features, query, side="right")
+        for start, stop, weight in zip(starts, stops, vector.values()):
+            # A row has at most one posting per feature
+            scores[self._rows[start:stop]] += self._weights[start:stop] * (weight / norm)
+        return scores
+
+    def _key_matches(self, keys: Dict[str, Any]) -> Optional[np.ndarray]:
+        wanted = {field: _key(value) for field, value in keys.items() if field in self.keys}
+        wanted = {field: value for field, value in wanted.items() if value is not None}
+        if not wanted:
+            return None
+        return sum((self.keys[field] == value).astype(float) for field, value in wanted.items()) / len(wanted)
+
+    def search(self, text: str, k: int = 5, **keys) -> List[Dict[str, Any]]:
+        """The `k` best exemplars for a query text and key fields (stage, topic, sentiment,
+        industry), best first, with their bodies read from the email log."""
+        if not len(self.rows) or k <= 0:
+            return []
+        scores = self._similarity(text)
+        matches = self._key_matches(keys)
+        if matches is not None:
+            scores = (1.0 - KEY_WEIGHT) * scores + KEY_WEIGHT * matches
+        # Best score first, more engaging emails first among ties
+        top = np.lexsort((-self.engagement, -scores))[:k]
+        meta = self.log.meta.iloc[self.rows[top]]
+        exemplars = []
+        for position, (row, body) in enumerate(zip(meta.to_dict("records"), self.log.bodies.get(self.rows[top]))):
+            exemplar = {field: row[field] for field in EXEMPLAR_FIELDS if field in row}
+            exemplar = {field: (value.item() if isinstance(value, np.generic) else value)
+                        for field, value in exemplar.items() if _key(value) is not None}
+            exemplars.append({**exemplar, "email_text": body, "similarity": round(float(scores[top[position]]), 4)})
+        return exemplars
+
+
+def load_exemplar_index(log: EmailLog) -> ExemplarIndex:
+    """The exemplar index of an email log, built once per loaded version of the log."""
+    with _cache_lock:
+        cached = _cache.get(log.path)
+        if cached is not None and cached.log is log:
+            _cache.move_to_end(log.path)
+            return cached
+    index = ExemplarIndex(log)
+    with _cache_lock:
+        _cache[log.path] = index
+        _cache.move_to_end(log.path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,154 @@
+"""Structured logging
+
+Asynchronous, leveled logging shared by the agents, LangGraph nodes and API.
+Records are enqueued on the calling thread and written by a single background
+listener thread, so worker threads never contend on stdout. Every record
+carries the batch_id / lead_id bound with `log_context`, and per-step debug
+lines can be sampled per lead.
+
+Configuration (environment variables, all optional):
+    LOG_LEVEL         root level, default INFO
+    LOG_LEVELS        per-module levels, e.g. "langgraph_nodes=DEBUG,api.batch=WARNING"
+    LOG_FORMAT        "text" (default) or "json"
+    LOG_SAMPLE_RATE   fraction of leads whose per-step debug lines are kept, default 0.05
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Pass as `extra=SAMPLED` on per-step debug lines to subject them to sampling
+SAMPLED = {"sampled": True}
+
+CONTEXT_FIELDS = ("batch_id", "lead_id")
+
+_context = contextvars.ContextVar("log_context", default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**fields):
+    """Bind fields (batch_id, lead_id, ...) to every record logged inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the bound context onto the record before it leaves the thread."""
+
+    def filter(self, record):
+        fields = _context.get()
+        record.context = fields
+        for name in CONTEXT_FIELDS:
+            setattr(record, name, fields.get(name, "-"))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps sampled debug lines for a stable subset of leads.
+
+    Sampling is keyed on lead_id, so a kept lead logs every one of its steps.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 10000)
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or record.levelno > logging.DEBUG:
+            return True
+        key = str(getattr(record, "lead_id", "-"))
+        return zlib.crc32(key.encode("utf-8")) % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [batch=%(batch_id)s lead=%(lead_id)s] %(message)s"
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str = None, module_levels: Dict[str, str] = None, fmt: str = None,
+                      sample_rate: float = None, stream=None, force: bool = False):
+    """Install the queue handler and start the background writer (idempotent)."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        module_levels = module_levels if module_levels is not None else parse_module_levels(os.getenv("LOG_LEVELS", ""))
+        fmt = fmt or os.getenv("LOG_FORMAT", "text")
+        sample_rate = sample_rate if sample_rate is not None else float(os.getenv("LOG_SAMPLE_RATE", "0.05"))
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(log_queue)
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(sample_rate))
+
+        root = logging.getLogger()
+        for existing in [h for h in root.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+        for name, module_level in module_levels.items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
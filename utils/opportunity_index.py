@@ -0,0 +1,181 @@
+"""Lead -> opportunity join index over Sales_Pipeline.csv and CRM_Pipeline.csv
+
+Both pipelines are read once per version of the two files and folded into
+one list of opportunities with common fields (source, opportunity_id, stage,
+value, dates, company, agent), grouped by lead_id and by company_id, so a
+lead's deal context is a dictionary lookup instead of a scan of the files.
+
+Sales_Pipeline rows carry `lead_id_valid` / `company_id_valid` flags from the
+matching that produced them: a row only joins to its lead when lead_id_valid
+holds, and only counts for its company when company_id_valid holds (its
+company_id is dropped otherwise). CRM_Pipeline rows have no flags and always
+join on their ids.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+SALES_FILE = "Sales_Pipeline.csv"
+CRM_FILE = "CRM_Pipeline.csv"
+WON_STAGES = ("Won", "Closed Won")
+LOST_STAGES = ("Lost", "Closed Lost")
+# Opportunities listed in a deal context, most recent first
+CONTEXT_OPPORTUNITIES = 5
+CACHE_SIZE = 4
+
+# Source column of each pipeline -> common opportunity field
+SALES_FIELDS = {
+    "opportunity_id": "opportunity_id",
+    "lead_id": "lead_id",
+    "company_id": "company_id",
+    "company": "company",
+    "deal_stage": "stage",
+    "close_value": "value",
+    "engage_date": "engage_date",
+    "close_date": "close_date",
+    "product": "product",
+    "agent_id": "agent_id",
+    "sales_agent": "sales_agent",
+}
+CRM_FIELDS = {
+    "deal_id": "opportunity_id",
+    "lead_id": "lead_id",
+    "company_id": "company_id",
+    "company_normalized": "company",
+    "stage": "stage",
+    "value": "value",
+    "agent_id": "agent_id",
+    "sales_agent": "sales_agent",
+}
+OPPORTUNITY_FIELDS = ("source", "opportunity_id", "stage", "value", "engage_date", "close_date", "product",
+                      "company_id", "company", "agent_id", "sales_agent")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _file_version(path: Optional[str]):
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+
+def _flag(frame: pd.DataFrame, column: str) -> pd.Series:
+    """A validity flag column as booleans; rows of files without the column count as valid."""
+    if column not in frame.columns:
+        return pd.Series(True, index=frame.index)
+    return frame[column].astype(str).str.strip().str.lower().isin(("true", "1", "1.0", "yes"))
+
+
+def _read(path: Optional[str], fields: Dict[str, str], source: str) -> pd.DataFrame:
+    if not path or not os.path.exists(path):
+        return pd.DataFrame(columns=["lead_id", *OPPORTUNITY_FIELDS])
+    header = pd.read_csv(path, nrows=0).columns
+    flags = [c for c in ("lead_id_valid", "company_id_valid") if c in header]
+    raw = pd.read_csv(path, usecols=[c for c in header if c in fields or c in flags],
+                      dtype={c: str for c in ("lead_id", "company_id", "deal_id", "opportunity_id") if c in header})
+    frame = raw.rename(columns=fields).reindex(columns=["lead_id", *OPPORTUNITY_FIELDS])
+    frame["source"] = source
+    frame["value"] = pd.to_numeric(frame["value"], errors="coerce")
+    frame.loc[~_flag(raw, "lead_id_valid"), "lead_id"] = None
+    frame.loc[~_flag(raw, "company_id_valid"), "company_id"] = None
+    return frame
+
+
+def _group(records: List[dict], key: str) -> Dict[str, Tuple[dict, ...]]:
+    groups: Dict[str, List[dict]] = {}
+    for record in records:
+        value = record[key]
+        if value is not None:
+            groups.setdefault(value, []).append(record)
+    return {value: tuple(group) for value, group in groups.items()}
+
+
+def summarize(opportunities) -> Dict[str, Any]:
+    """Counts and values of a set of opportunities by outcome."""
+    summary = {"opportunities": 0, "open": 0, "won": 0, "lost": 0,
+               "open_value": 0.0, "won_value": 0.0, "stages": {}}
+    for opportunity in opportunities:
+        stage = opportunity["stage"]
+        value = opportunity["value"] or 0.0
+        outcome = "won" if stage in WON_STAGES else "lost" if stage in LOST_STAGES else "open"
+        summary["opportunities"] += 1
+        summary[outcome] += 1
+        if outcome != "lost":
+            summary[f"{outcome}_value"] += value
+        if stage is not None:
+            summary["stages"][stage] = summary["stages"].get(stage, 0) + 1
+    summary["open_value"] = round(summary["open_value"], 2)
+    summary["won_value"] = round(summary["won_value"], 2)
+    return summary
+
+
+class OpportunityIndex:
+    """Opportunities of both pipelines by lead_id and by company_id."""
+
+    def __init__(self, sales_path: Optional[str] = None, crm_path: Optional[str] = None):
+        frame = pd.concat([_read(sales_path, SALES_FIELDS, "sales"), _read(crm_path, CRM_FIELDS, "crm")],
+                          ignore_index=True)
+        # Most recent first; CRM deals carry no dates and keep file order after the dated ones
+        frame = frame.sort_values(["engage_date"], ascending=False, na_position="last", kind="stable")
+        frame = frame.astype(object).where(frame.notna(), None)
+        records = frame.to_dict("records")
+        self.by_lead = _group(records, "lead_id")
+        self.by_company = _group(records, "company_id")
+        for record in records:
+            del record["lead_id"]
+
+    def opportunities(self, lead_id) -> Tuple[dict, ...]:
+        """A lead's own opportunities, most recent first; callers must not mutate them."""
+        return self.by_lead.get(str(lead_id), ())
+
+    def company_opportunities(self, company_id) -> Tuple[dict, ...]:
+        return self.by_company.get(str(company_id), ()) if company_id is not None else ()
+
+    def context(self, lead_id, company_id=None) -> Optional[Dict[str, Any]]:
+        """Deal context of a lead (None when neither the lead nor its company has opportunities).
+
+        Without a `company_id` the company of the lead's own opportunities is used.
+        """
+        own = self.opportunities(lead_id)
+        if company_id is None:
+            company_id = next((o["company_id"] for o in own if o["company_id"] is not None), None)
+        company = self.company_opportunities(company_id)
+        if not own and not company:
+            return None
+        context = {**summarize(own), "recent": [
+            {field: value for field, value in opportunity.items() if value is not None}
+            for opportunity in own[:CONTEXT_OPPORTUNITIES]
+        ]}
+        if company:
+            context["company"] = summarize(company)
+        return context
+
+
+def load_opportunity_index(sales_path: Optional[str], crm_path: Optional[str]) -> OpportunityIndex:
+    """The join index of these pipeline files, built once per version of the files."""
+    key = (sales_path, crm_path)
+    version = (_file_version(sales_path), _file_version(crm_path))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+    index = OpportunityIndex(sales_path, crm_path)
+    with _cache_lock:
+        _cache[key] = (version, index)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def load_directory_index(directory: str) -> OpportunityIndex:
+    """Join index of the pipeline files in a data or batch directory."""
+    return load_opportunity_index(os.path.join(directory, SALES_FILE), os.path.join(directory, CRM_FILE))
@@ -0,0 +1,318 @@
+"""Statistical send-time model fitted on Email_Logs.csv
+
+Email_Logs.csv flags every email with `workday` and `work_hour` (1 when it
+was sent on a weekday / during business hours), the `device` it was read on,
+whether it was `opened`, its `reply_status` and an `engagement_score`. The
+model counts sends, opens, replies and engagement per lead, device and send
+window (weekday or weekend x business hours or evening), and predicts for
+each lead the window with the best reply rate and the response probability
+in it.
+
+Rates are smoothed at three levels, each one a prior for the next: the
+window's rate over all emails, then the lead's segment (its most frequent
+device), then the lead itself, each pulled toward its prior with the weight
+of PRIOR_EMAILS emails. A lead without history gets its segment's, or the
+global, prediction.
+
+Counts are additive, so new rows are folded in with `update` instead of a
+refit; `load_send_time_model` reads only the rows appended to a log since
+the model last saw it.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Send windows by (workday, work_hour): label, send time, expected reply delay in hours
+WINDOWS = {
+    (1, 1): ("Weekday business hours (9 AM-5 PM)", "10:00", 24),
+    (1, 0): ("Weekday evening (after 6 PM)", "18:30", 36),
+    (0, 1): ("Weekend daytime", "11:00", 48),
+    (0, 0): ("Weekend evening", "18:00", 60),
+}
+SLOTS = tuple(WINDOWS)
+COLUMNS = ("lead_id", "device", "workday", "work_hour", "opened", "reply_status", "engagement_score")
+MEASURES = ("sent", "opened", "replied", "engagement")
+REPLIED = ("replied", "yes", "true", "1")
+UNKNOWN_DEVICE = "unknown"
+# Weight, in emails, of each level's prior
+PRIOR_EMAILS = 10.0
+# Urgency (0-100) of the approach when the lead replies as often as an average lead
+BASE_URGENCY = 50
+# Approach type by urgency band, with its content suggestions
+APPROACHES = (
+    (30, "soft_nudge", ["Quick check-in", "Share a short update"]),
+    (70, "value_add", ["Share a relevant case study", "Offer a resource tied to their interests"]),
+    (100, "social_proof", ["Reference a similar customer's results", "Include a short testimonial"]),
+)
+TAIL_CHECK_BYTES = 4096
+CACHE_SIZE = 4
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _slot_codes(frame: pd.DataFrame) -> np.ndarray:
+    def flag(column):
+        if column not in frame.columns:
+            return np.ones(len(frame), dtype=int)
+        return (pd.to_numeric(frame[column], errors="coerce").fillna(1).to_numpy() > 0).astype(int)
+    codes = {slot: i for i, slot in enumerate(SLOTS)}
+    return np.array([codes[slot] for slot in zip(flag("workday").tolist(), flag("work_hour").tolist())], dtype=int)
+
+
+def counts(frame: pd.DataFrame) -> pd.DataFrame:
+    """Sends, opens, replies and engagement summed per (lead_id, device, slot)."""
+    if frame.empty or "lead_id" not in frame.columns:
+        return pd.DataFrame(columns=list(MEASURES),
+                            index=pd.MultiIndex.from_arrays([[], [], []], names=["lead_id", "device", "slot"]))
+    opened = pd.to_numeric(frame["opened"], errors="coerce").fillna(0).to_numpy() > 0 \
+        if "opened" in frame.columns else np.zeros(len(frame), dtype=bool)
+    replied = frame["reply_status"].astype(str).str.strip().str.lower().isin(REPLIED).to_numpy() \
+        if "reply_status" in frame.columns else np.zeros(len(frame), dtype=bool)
+    engagement = pd.to_numeric(frame["engagement_score"], errors="coerce").fillna(0).to_numpy(dtype=float) \
+        if "engagement_score" in frame.columns else np.zeros(len(frame))
+    device = frame["device"].astype(str).str.strip().str.lower().replace({"": UNKNOWN_DEVICE, "nan": UNKNOWN_DEVICE}) \
+        if "device" in frame.columns else pd.Series(UNKNOWN_DEVICE, index=frame.index)
+    rows = pd.DataFrame({
+        "lead_id": frame["lead_id"].astype(str).to_numpy(),
+        "device": device.to_numpy(),
+        "slot": _slot_codes(frame),
+        "sent": 1,
+        "opened": opened.astype(int),
+        "replied": replied.astype(int),
+        "engagement": engagement,
+    })
+    return rows.groupby(["lead_id", "device", "slot"], sort=False)[list(MEASURES)].sum()
+
+
+def _smooth(observed: np.ndarray, sent: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    return (observed + PRIOR_EMAILS * prior) / (sent + PRIOR_EMAILS)
+
+
+def _by_slot(table: pd.DataFrame, level: str) -> Dict[str, np.ndarray]:
+    """Measures of a (lead_id, device, slot) count table per `level` value and slot, as arrays."""
+    grouped = table.groupby([level, "slot"]).sum().unstack("slot", fill_value=0)
+    grouped = grouped.reindex(columns=pd.MultiIndex.from_product([MEASURES, range(len(SLOTS))]), fill_value=0)
+    arrays = {measure: grouped[measure].to_numpy(dtype=float) for measure in MEASURES}
+    return {"index": grouped.index, **arrays}
+
+
+class SendTimeModel:
+    """Smoothed open / reply rates per send window, for every lead of an email log."""
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        self._lock = threading.Lock()
+        self.table = counts(pd.DataFrame())
+        self.emails = 0
+        self._checksum = hashlib.sha256()
+        self._fit()
+        if frame is not None:
+            self.update(frame)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever rows are added, so stored predictions can be keyed by it."""
+        return f"{self.emails}:{self._checksum.hexdigest()[:16]}"
+
+    def update(self, frame: pd.DataFrame):
+        """Fold new email rows into the counts and refit the smoothed rates."""
+        if frame.empty:
+            return
+        with self._lock:
+            self.table = counts(frame) if not len(self.table) else self.table.add(counts(frame), fill_value=0)
+            self.emails += len(frame)
+            self._checksum.update(pd.util.hash_pandas_object(
+                frame.reindex(columns=list(COLUMNS)).astype(str), index=False).to_numpy().tobytes())
+            self._fit()
+
+    def _fit(self):
+        table = self.table
+        slots = len(SLOTS)
+        if not len(table):
+            flat = np.zeros((1, slots))
+            totals = {measure: flat[0] for measure in MEASURES}
+            leads = {"index": pd.Index([]), **{measure: np.zeros((0, slots)) for measure in MEASURES}}
+            devices = {"index": pd.Index([]), **{measure: np.zeros((0, slots)) for measure in MEASURES}}
+            lead_devices = np.zeros(0, dtype=int)
+        else:
+            totals = {measure: table[measure].groupby(level="slot").sum().reindex(range(slots), fill_value=0)
+                      .to_numpy(dtype=float) for measure in MEASURES}
+            leads = _by_slot(table, "lead_id")
+            devices = _by_slot(table, "device")
+            # Segment of a lead: the device it read most of its emails on
+            per_device = table["sent"].groupby(level=["lead_id", "device"]).sum()
+            dominant = per_device.groupby(level="lead_id").idxmax().map(lambda key: key[1])
+            lead_devices = devices["index"].get_indexer(dominant.reindex(leads["index"]).to_numpy())
+
+        # Global level: each window pulled toward the overall rate
+        sent = totals["sent"]
+        overall = {measure: totals[measure].sum() / max(sent.sum(), 1.0) for measure in MEASURES[1:]}
+        global_rates = {measure: _smooth(totals[measure], sent, np.full(slots, overall[measure]))
+                        for measure in MEASURES[1:]}
+        # Segment level: each device pulled toward the global windows
+        segment_rates = {measure: _smooth(devices[measure], devices["sent"], global_rates[measure])
+                         for measure in MEASURES[1:]}
+        # Lead level: each lead pulled toward its segment
+        lead_rates = {measure: _smooth(leads[measure], leads["sent"],
+                                       segment_rates[measure][lead_devices] if len(lead_devices) else
+                                       np.zeros((0, slots)))
+                      for measure in MEASURES[1:]}
+        # A lead's reply rate over all its emails, pulled toward the overall rate
+        lead_sent = leads["sent"].sum(axis=1)
+        responsiveness = _smooth(leads["replied"].sum(axis=1), lead_sent, overall["replied"])
+        # One assignment, so concurrent predictions see either the old or the new fit
+        self._fit_state = {
+            "global": global_rates,
+            "segments": (devices["index"], segment_rates),
+            "leads": ({lead: i for i, lead in enumerate(leads["index"])}, lead_rates, lead_sent, responsiveness,
+                      [devices["index"][code] for code in lead_devices]),
+            "average_reply": float(overall["replied"]),
+        }
+
+    def predict(self, lead_id=None, device: Optional[str] = None) -> Dict[str, Any]:
+        """Best send window of a lead and its smoothed open / reply / engagement rates there."""
+        fit = self._fit_state
+        positions, lead_rates, lead_sent, lead_responsiveness, lead_devices = fit["leads"]
+        row = positions.get(str(lead_id)) if lead_id is not None else None
+        responsiveness = fit["average_reply"]
+        if row is not None:
+            rates = {measure: values[row] for measure, values in lead_rates.items()}
+            level, history, device = "lead", int(lead_sent[row]), lead_devices[row]
+            responsiveness = float(lead_responsiveness[row])
+        else:
+            index, segment_rates = fit["segments"]
+            code = index.get_indexer([device.strip().lower()])[0] if device and len(index) else -1
+            if code >= 0:
+                rates = {measure: values[code] for measure, values in segment_rates.items()}
+                level = "segment"
+            else:
+                rates, level, device = fit["global"], "global", None
+            history = 0
+        # Best reply rate; opens, then engagement break ties
+        best = int(np.lexsort((-rates["engagement"], -rates["opened"], -rates["replied"]))[0])
+        return {
+            "window": SLOTS[best],
+            "level": level,
+            "device": device,
+            "history": history,
+            "open_rate": round(float(rates["opened"][best]), 4),
+            "reply_rate": round(float(rates["replied"][best]), 4),
+            "engagement": round(float(rates["engagement"][best]), 2),
+            "lead_reply_rate": round(responsiveness, 4),
+            "average_reply_rate": round(fit["average_reply"], 4),
+        }
+
+    def strategy(self, lead_id=None, device: Optional[str] = None, today: Optional[date] = None) -> Dict[str, Any]:
+        """A follow-up strategy (timing, approach, engagement_prediction) from the prediction,
+        in the shape the timing prompt asks the LLM for."""
+        prediction = self.predict(lead_id, device)
+        workday, work_hour = prediction["window"]
+        label, send_time, delay = WINDOWS[prediction["window"]]
+        today = today or date.today()
+        send_date = today + timedelta(days=1)
+        while (send_date.weekday() < 5) != bool(workday):
+            send_date += timedelta(days=1)
+
+        reply_rate, average = prediction["reply_rate"], prediction["average_reply_rate"]
+        # Leads that reply less often than average get a stronger approach
+        ratio = prediction["lead_reply_rate"] / average if average else 1.0
+        urgency = int(np.clip(round(BASE_URGENCY * (2.0 - ratio)), 0, 100))
+        _, approach, suggestions = next(band for band in APPROACHES if urgency <= band[0])
+
+        basis = {"lead": f"the lead's email history ({prediction['history']} emails)",
+                 "segment": f"leads reading on {prediction['device']}",
+                 "global": "all logged emails"}[prediction["level"]]
+        return {
+            "timing": {
+                "recommended_date": send_date.isoformat(),
+                "send_time": send_time,
+                "optimal_time_window": label,
+                "reasoning": (f"{label} has the best smoothed reply rate ({reply_rate:.0%}, "
+                              f"open rate {prediction['open_rate']:.0%}) based on {basis}."),
+            },
+            "approach": {
+                "type": approach,
+                "urgency": urgency,
+                "reasoning": (f"The lead replies to {prediction['lead_reply_rate']:.0%} of emails "
+                              f"against an average of {average:.0%}."),
+                "content_suggestions": suggestions,
+            },
+            "engagement_prediction": {
+                "response_probability": reply_rate,
+                "open_probability": prediction["open_rate"],
+                "expected_engagement": prediction["engagement"],
+                "expected_delay": delay,
+            },
+        }
+
+
+def _tail_digest(handle, offset: int) -> str:
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    handle.seek(start)
+    return hashlib.sha256(handle.read(offset - start)).hexdigest()
+
+
+def _read_rows(path: str, offset: int = 0, header=None) -> pd.DataFrame:
+    """Model columns of a log's rows from byte `offset` on (0: the whole log)."""
+    if not offset:
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        return pd.read_csv(path, usecols=[c for c in header if c in COLUMNS])
+    with open(path, "rb") as f:
+        f.seek(offset)
+        tail = f.read()
+    if not tail.strip():
+        return pd.DataFrame(columns=header)
+    return pd.read_csv(io.BytesIO(tail), header=None, names=header, usecols=[c for c in header if c in COLUMNS])
+
+
+def _appended(path: str, entry: dict) -> Optional[bool]:
+    """Whether the log only grew since the model saw it (None: it did not change at all)."""
+    offset = entry.get("offset", 0)
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if entry.get("model") is None or not 0 < offset <= size or _tail_digest(f, offset) != entry["tail"]:
+            return False
+        if size == offset:
+            return None
+        # The fitted bytes must end with a complete row
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
+
+
+def load_send_time_model(path: str) -> SendTimeModel:
+    """The send-time model of an email log, refreshed incrementally when rows are appended.
+
+    A missing log gives an empty model (every lead gets the global prediction).
+    A log that changed other than by appending is refitted from scratch.
+    """
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is None:
+            entry = _cache[path] = {"lock": threading.Lock(), "model": None}
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    with entry["lock"]:
+        try:
+            appended = _appended(path, entry)
+        except OSError:
+            return SendTimeModel()
+        if appended is None:
+            return entry["model"]
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            tail = _tail_digest(f, size)
+        if appended:
+            entry["model"].update(_read_rows(path, entry["offset"], entry["header"]))
+        else:
+            entry.update(model=SendTimeModel(_read_rows(path)), header=pd.read_csv(path, nrows=0).columns.tolist())
+        entry.update(offset=size, tail=tail)
+        return entry["model"]